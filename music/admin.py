@@ -3,7 +3,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Genre, Album, Track
-from .models import User, Genre, Album, Track, Playlist, Favorite, Contract
+from .models import User, Genre, Album, Track, Playlist, PlaylistEntry, Favorite, Contract
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -52,12 +52,23 @@ class TrackAdmin(admin.ModelAdmin):
     ordering = ('album', 'track_number')
 
 
+class PlaylistEntryInline(admin.TabularInline):
+    model = PlaylistEntry
+    raw_id_fields = ('track',)
+    extra = 0
+
+
 @admin.register(Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
-    list_display = ('name', 'user', 'created_at')
+    list_display = ('name', 'user', 'track_count', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('name', 'user__username')
-    filter_horizontal = ('tracks',)
+    readonly_fields = ('track_count', 'total_duration')
+    inlines = (PlaylistEntryInline,)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        Playlist.refresh_aggregates([form.instance.pk])
 
 
 @admin.register(Favorite)
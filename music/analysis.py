@@ -0,0 +1,208 @@
+# music/analysis.py
+
+"""
+Автоматичний аналіз завантаженого аудіо поза запитом.
+
+Важкі обчислення (music/audio.py) виконуються в ProcessPoolExecutor, а в БД
+пише лише батьківський процес. Команди для всього беклогу займають усі
+ядра; фоновий пул кожного веб-воркера - лише AUDIO_ANALYSIS_WORKERS
+процесів, інакше N воркерів запустили б N x cpu_count процесів. Тривалість рахується точно з
+кількості кадрів; темп - оцінка, тому для бітів значення, що відрізняється
+вдвічі або в півтора раза (інший метричний рівень), вважається збігом.
+
+Результат звіряється з введеними вручну значеннями: порожні поля
+заповнюються, розбіжності позначаються в AudioAnalysis зі статусом
+'mismatch', а самі значення користувача не перезаписуються.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .audio import analyze_file
+from .models import AudioAnalysis, Beat, Track
+
+logger = logging.getLogger(__name__)
+
+MODELS = {'track': Track, 'beat': Beat}
+DURATION_TOLERANCE = timedelta(seconds=2)
+BPM_TOLERANCE = 0.03
+# Автокореляція плутає метричні рівні: удвічі та в 1.5 раза швидший/повільніший темп - не розбіжність
+METRICAL_RATIOS = (1, 2, 0.5, 1.5, 2 / 3)
+
+
+def background_workers():
+    return getattr(settings, 'AUDIO_ANALYSIS_WORKERS', None) or 1
+
+
+def make_pool(max_workers=None):
+    """Пул процесів (за замовчуванням - на всі ядра)"""
+    # spawn: воркери не успадковують потоки та з'єднання з БД веб-процесу
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+def local_path(field):
+    """Шлях до файлу для воркера або None, якщо сховище не локальне"""
+    try:
+        return field.path
+    except NotImplementedError:
+        return None
+
+
+def _clock(duration):
+    seconds = int(duration.total_seconds())
+    return f'{seconds // 60}:{seconds % 60:02d}'
+
+
+def _bpm_agrees(typed, detected):
+    return any(
+        abs(typed - candidate) <= candidate * BPM_TOLERANCE
+        for candidate in (detected * ratio for ratio in METRICAL_RATIOS)
+    )
+
+
+def apply(kind, object_id, source_name, result):
+    """Звіряє результат аналізу з об'єктом і зберігає AudioAnalysis"""
+    obj = MODELS[kind].objects.filter(pk=object_id).first()
+    if obj is None or obj.audio_file.name != source_name:
+        # Об'єкт видалено або файл замінено, поки йшов аналіз
+        return None
+
+    defaults = {'source_name': source_name, 'duration': None, 'bpm': None, 'message': ''}
+    if result is None:
+        defaults['status'] = 'unsupported'
+        return AudioAnalysis.objects.update_or_create(kind=kind, object_id=object_id, defaults=defaults)[0]
+
+    duration = timedelta(microseconds=round(result['frames'] * 1_000_000 / result['sample_rate']))
+    defaults.update(duration=duration, bpm=result['bpm'], status='ok')
+
+    if kind == 'track':
+        if not obj.duration:
+            obj.duration = duration
+            # save(), а не update(): сигнали перерахують тривалість плейлистів
+            obj.save(update_fields=['duration'])
+            defaults['status'] = 'filled'
+        elif abs(obj.duration - duration) > DURATION_TOLERANCE:
+            defaults['status'] = 'mismatch'
+            defaults['message'] = f'Введено {_clock(obj.duration)}, у файлі {_clock(duration)}'
+    elif result['bpm'] is not None:
+        detected = round(result['bpm'])
+        if not obj.bpm:
+            obj.bpm = detected
+            obj.save(update_fields=['bpm', 'updated_at'])
+            defaults['status'] = 'filled'
+        elif not _bpm_agrees(obj.bpm, result['bpm']):
+            defaults['status'] = 'mismatch'
+            defaults['message'] = f'Введено {obj.bpm} BPM, за аналізом ~{detected} BPM'
+
+    return AudioAnalysis.objects.update_or_create(kind=kind, object_id=object_id, defaults=defaults)[0]
+
+
+def pending(kind, force=False):
+    """(object_id, source_name, path) об'єктів з аудіо без актуального аналізу"""
+    model = MODELS[kind]
+    analyzed = {} if force else dict(
+        AudioAnalysis.objects.filter(kind=kind).values_list('object_id', 'source_name')
+    )
+    rows = model.objects.exclude(audio_file='').exclude(audio_file__isnull=True).only('pk', 'audio_file')
+    for obj in rows.iterator(chunk_size=2000):
+        if analyzed.get(obj.pk) == obj.audio_file.name:
+            continue
+        path = local_path(obj.audio_file)
+        if path is not None:
+            yield obj.pk, obj.audio_file.name, path
+
+
+def analyze_backlog(kinds=('track', 'beat'), force=False, max_workers=None, chunksize=4):
+    """Аналізує всі файли без актуального аналізу. Повертає {статус: кількість}"""
+    counts = {}
+    with make_pool(max_workers) as pool:
+        for kind in kinds:
+            jobs = list(pending(kind, force))
+            results = pool.map(analyze_file, [path for _, _, path in jobs], chunksize=chunksize)
+            for (object_id, source_name, _), result in zip(jobs, results):
+                analysis = apply(kind, object_id, source_name, result)
+                if analysis is not None:
+                    counts[analysis.status] = counts.get(analysis.status, 0) + 1
+    return counts
+
+
+# ==================== ФОНОВИЙ АНАЛІЗ ПІСЛЯ ЗАВАНТАЖЕННЯ ====================
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """Пул процесу для фонових задач аналізу (створюється при першому виклику)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_pool(background_workers())
+        return _pool
+
+
+def discard_pool(pool=None):
+    """Зламаний пул (воркер впав) - наступна задача створить новий"""
+    global _pool
+    with _pool_lock:
+        # Інший потік міг уже замінити зламаний пул новим - його не чіпаємо
+        if pool is None or _pool is pool:
+            _pool = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn, *args):
+    """
+    Ставить задачу в спільний пул. Повертає Future або None.
+
+    Викликається з on_commit: дані вже збережені, тож помилка пулу не має
+    ставати 500. Зламаний (BrokenProcessPool) або закритий (RuntimeError)
+    пул замінюється новим, і задача ставиться ще раз.
+    """
+    for attempt in range(2):
+        pool = shared_pool()
+        try:
+            return pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            discard_pool(pool)
+            logger.warning('Audio pool unusable (attempt %d)', attempt + 1, exc_info=True)
+    logger.error('Audio task %s dropped: pool unusable', fn.__name__)
+    return None
+
+
+def _done(kind, object_id, source_name, future):
+    try:
+        apply(kind, object_id, source_name, future.result())
+    except BrokenProcessPool:
+        discard_pool()
+        logger.exception('Audio analysis pool broke on %s:%s', kind, object_id)
+    except Exception:
+        logger.exception('Audio analysis failed for %s:%s', kind, object_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(kind, object_id):
+    """Ставить файл об'єкта в чергу пулу процесів; результат запишеться по завершенню"""
+    obj = MODELS[kind].objects.filter(pk=object_id).only('pk', 'audio_file').first()
+    if obj is None or not obj.audio_file:
+        return
+    path = local_path(obj.audio_file)
+    if path is None:
+        return
+    current = AudioAnalysis.objects.filter(kind=kind, object_id=object_id).values_list('source_name', flat=True).first()
+    if current == obj.audio_file.name:
+        return
+    future = submit(analyze_file, path)
+    if future is not None:
+        future.add_done_callback(lambda done: _done(kind, object_id, obj.audio_file.name, done))
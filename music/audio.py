@@ -0,0 +1,243 @@
+# music/audio.py
+
+"""
+Аналіз WAV без Django: тривалість, темп і відбиток.
+
+Модуль не імпортує моделей, тому його функції можна виконувати в окремих
+процесах (ProcessPoolExecutor, див. music/analysis.py) - воркеру потрібні
+лише шлях до файлу, wave та numpy. scipy імпортується лише для відбитків,
+тож веб-процесу, який тільки ставить задачі в пул, він не потрібен.
+
+Темп оцінюється автокореляцією огинаючої атак: енергія моно-сигналу у
+вікнах ~1/ENVELOPE_RATE секунди -> логарифм -> додатна похідна мінус локальне
+середнє. Пік автокореляції в діапазоні MIN_BPM..MAX_BPM, зважений
+лог-нормальним пріором навколо PRIOR_BPM (менше помилок на октаву),
+уточнюється параболічною інтерполяцією.
+
+Відбиток - пари спектральних піків (landmarks): сигнал зводиться до
+FINGERPRINT_RATE Гц, для кадрів FFT шукаються локальні максимуми
+спектрограми, і кожен пік-якір поєднується з кількома наступними піками.
+Хеш пари (частота якоря, частота цілі, відстань у кадрах) не залежить від
+гучності, шуму та позиції у файлі, тому той самий запис знаходиться за
+збігом хешів з однаковим зсувом у часі.
+"""
+
+import wave
+
+import numpy as np
+
+# Частота огинаючої, Гц: вікно енергії - найближчий степінь двійки кадрів
+ENVELOPE_RATE = 172
+BLOCK_FRAMES = 65536
+MIN_BPM = 40
+MAX_BPM = 200
+PRIOR_BPM = 120
+# Ширина пріора в октавах
+PRIOR_WIDTH = 1.0
+# Вікно локального середнього огинаючої, секунд
+SMOOTHING_SECONDS = 0.5
+
+FINGERPRINT_RATE = 11025
+FFT_SIZE = 1024
+FFT_HOP = 512
+# Околиця локального максимуму: (частотних бінів, кадрів)
+PEAK_NEIGHBOURHOOD = (21, 11)
+PEAKS_PER_SECOND = 12
+FAN_OUT = 4
+MAX_DELTA_FRAMES = 63
+
+# Не WAV, обрізаний файл (неповний кадр ламає reshape) або файлу вже немає
+UNREADABLE = (wave.Error, EOFError, ValueError, OSError)
+
+
+def _mono(raw, width, channels):
+    """Байти PCM -> моно float32 у діапазоні [-1, 1]"""
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif width == 3:
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+        samples = np.where(values & 0x800000, values - 0x1000000, values).astype(np.float32) / 8388608
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise wave.Error(f'unsupported sample width {width}')
+    return samples.reshape(-1, channels).mean(axis=1)
+
+
+def hop_for(sample_rate):
+    """Кадрів у вікні енергії (степінь двійки, кратний BLOCK_FRAMES)"""
+    return int(min(BLOCK_FRAMES, max(32, 2 ** round(np.log2(sample_rate / ENVELOPE_RATE)))))
+
+
+def _energy(path):
+    """(sample_rate, frames, hop, енергія кожного вікна) - файл читається блоками"""
+    with wave.open(path, 'rb') as audio:
+        channels = audio.getnchannels()
+        width = audio.getsampwidth()
+        sample_rate = audio.getframerate()
+        frames = audio.getnframes()
+        hop = hop_for(sample_rate) if sample_rate else BLOCK_FRAMES
+        energy = []
+        while True:
+            raw = audio.readframes(BLOCK_FRAMES)
+            if not raw:
+                break
+            mono = _mono(raw, width, channels)
+            usable = len(mono) // hop * hop
+            if usable:
+                energy.append(np.square(mono[:usable]).reshape(-1, hop).sum(axis=1))
+    energy = np.concatenate(energy) if energy else np.zeros(0, dtype=np.float32)
+    return sample_rate, frames, hop, energy
+
+
+def onset_envelope(energy, envelope_rate):
+    log_energy = np.log1p(100 * energy)
+    flux = np.maximum(np.diff(log_energy, prepend=log_energy[:1]), 0)
+    window = max(1, int(envelope_rate * SMOOTHING_SECONDS))
+    local_mean = np.convolve(flux, np.ones(window) / window, mode='same')
+    # Легке згладжування: вузькі піки атак не губляться між цілими лагами
+    return np.convolve(np.maximum(flux - local_mean, 0), np.hanning(5)[1:-1] / 2, mode='same')
+
+
+def estimate_tempo(envelope, envelope_rate):
+    """BPM за автокореляцією огинаючої або None, якщо сигнал закороткий чи без атак"""
+    min_lag = int(np.floor(60 * envelope_rate / MAX_BPM))
+    max_lag = int(np.ceil(60 * envelope_rate / MIN_BPM))
+    if len(envelope) < max_lag * 4 or not envelope.any():
+        return None
+
+    centered = envelope - envelope.mean()
+    size = 1 << int(np.ceil(np.log2(2 * len(centered))))
+    spectrum = np.fft.rfft(centered, size)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:max_lag + 2]
+    if autocorrelation[0] <= 0:
+        return None
+
+    lags = np.arange(max(min_lag, 1), max_lag + 1)
+    bpms = 60 * envelope_rate / lags
+    prior = np.exp(-0.5 * (np.log2(bpms / PRIOR_BPM) / PRIOR_WIDTH) ** 2)
+    scores = autocorrelation[lags] * prior
+    best = int(np.argmax(scores))
+    if scores[best] <= 0:
+        return None
+
+    lag = float(lags[best])
+    if 0 < best < len(lags) - 1:
+        # Параболічне уточнення дробового лага за сусідніми значеннями
+        left, middle, right = autocorrelation[lags[best] - 1:lags[best] + 2]
+        denominator = left - 2 * middle + right
+        if denominator:
+            lag += 0.5 * (left - right) / denominator
+    return 60 * envelope_rate / lag
+
+
+def analyze_file(path):
+    """{'frames', 'sample_rate', 'duration', 'bpm'} для WAV або None для інших форматів"""
+    try:
+        sample_rate, frames, hop, energy = _energy(path)
+    except UNREADABLE:
+        return None
+    if not sample_rate:
+        return None
+    envelope_rate = sample_rate / hop
+    tempo = estimate_tempo(onset_envelope(energy, envelope_rate), envelope_rate) if len(energy) else None
+    return {
+        'frames': frames,
+        'sample_rate': sample_rate,
+        'duration': frames / sample_rate,
+        'bpm': tempo,
+    }
+
+
+def _resampled(path):
+    """Моно-сигнал, зведений до FINGERPRINT_RATE лінійною інтерполяцією (блоками)"""
+    with wave.open(path, 'rb') as audio:
+        channels = audio.getnchannels()
+        width = audio.getsampwidth()
+        sample_rate = audio.getframerate()
+        step = sample_rate / FINGERPRINT_RATE
+        parts = []
+        position = 0.0
+        consumed = 0
+        tail = np.zeros(0, dtype=np.float32)
+        while True:
+            raw = audio.readframes(BLOCK_FRAMES)
+            if not raw:
+                break
+            # Останній відлік попереднього блоку потрібен для інтерполяції на стику
+            mono = np.concatenate([tail, _mono(raw, width, channels)])
+            start = consumed - len(tail)
+            end = start + len(mono) - 1
+            count = int(np.floor((end - position) / step)) + 1 if end >= position else 0
+            if count > 0:
+                points = position + step * np.arange(count)
+                parts.append(np.interp(points - start, np.arange(len(mono)), mono).astype(np.float32))
+                position = points[-1] + step
+            consumed += len(mono) - len(tail)
+            tail = mono[-1:]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def _spectrogram(signal):
+    frames = 1 + (len(signal) - FFT_SIZE) // FFT_HOP
+    if frames <= 0:
+        return np.zeros((0, FFT_SIZE // 2 + 1), dtype=np.float32)
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    magnitudes = []
+    # Кадри пакетами, щоб не тримати всі вікна одночасно
+    for first in range(0, frames, 1024):
+        indices = (np.arange(first, min(first + 1024, frames)) * FFT_HOP)[:, None] + np.arange(FFT_SIZE)
+        spectrum = np.abs(np.fft.rfft(signal[indices] * window, axis=1))
+        magnitudes.append(np.log1p(spectrum * 100).astype(np.float32))
+    return np.concatenate(magnitudes)
+
+
+def _peaks(spectrogram):
+    """(кадр, бін) найсильніших локальних максимумів, PEAKS_PER_SECOND на секунду"""
+    from scipy.ndimage import maximum_filter
+
+    local_max = maximum_filter(spectrogram, size=PEAK_NEIGHBOURHOOD[::-1], mode='constant')
+    candidates = (spectrogram == local_max) & (spectrogram > np.median(spectrogram) + 1e-6)
+    frames, bins = np.nonzero(candidates)
+    strength = spectrogram[frames, bins]
+
+    frames_per_second = FINGERPRINT_RATE / FFT_HOP
+    second = (frames / frames_per_second).astype(np.int64)
+    # Сортування за (секунда, -сила) і перші PEAKS_PER_SECOND у кожній секунді
+    order = np.lexsort((-strength, second))
+    second, frames, bins = second[order], frames[order], bins[order]
+    starts = np.searchsorted(second, second, side='left')
+    keep = np.arange(len(second)) - starts < PEAKS_PER_SECOND
+    frames, bins = frames[keep], bins[keep]
+    order = np.lexsort((bins, frames))
+    return frames[order], bins[order]
+
+
+def landmarks(frames, bins):
+    """Масиви (hash, кадр якоря): кожен пік з FAN_OUT наступними в межах MAX_DELTA_FRAMES"""
+    hashes, offsets = [], []
+    for distance in range(1, FAN_OUT + 1):
+        anchor_frames, target_frames = frames[:-distance], frames[distance:]
+        delta = target_frames - anchor_frames
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+        # 9 біт частоти якоря, 9 біт частоти цілі, 6 біт відстані
+        anchor_bins = np.minimum(bins[:-distance][valid], 511)
+        target_bins = np.minimum(bins[distance:][valid], 511)
+        hashes.append((anchor_bins << 15) | (target_bins << 6) | delta[valid])
+        offsets.append(anchor_frames[valid])
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.int64), np.concatenate(offsets).astype(np.int64)
+
+
+def fingerprint_file(path):
+    """(hashes, offsets) для WAV або None для інших форматів"""
+    try:
+        signal = _resampled(path)
+    except UNREADABLE:
+        return None
+    frames, bins = _peaks(_spectrogram(signal))
+    return landmarks(frames, bins)
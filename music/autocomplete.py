@@ -0,0 +1,213 @@
+# music/autocomplete.py
+
+"""
+Автодоповнення пошуку з пам'яті процесу.
+
+Індекс - відсортований список ключів (нормалізований початок кожного слова
+назви) з пошуком через bisect. Будується у фоновому потоці: warm() під час
+старту процесу (wsgi.py/asgi.py), а запит ніколи не чекає на побудову -
+поки індекс не готовий, підказок просто немає. Далі індекс латається
+сигналами моделей, тому запити до БД не потрібні. Зміни, зроблені іншими
+воркерами, підтягуються фоновою перебудовою раз на
+AUTOCOMPLETE_REFRESH_SECONDS.
+
+Латки, що надходять, поки йде перебудова, записуються і повторюються на
+новому знімку: інакше знімок, прочитаний з БД до коміту зміни, затер би її.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Album, Track, User
+from .search import normalize
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('artists', 'albums', 'tracks')
+MIN_PREFIX_LENGTH = 2
+
+
+def _keys(label):
+    """Ключі для назви: повна назва та кожен суфікс, що починається зі слова"""
+    words = normalize(label).split()
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+class PrefixIndex:
+    """Відсортовані масиви (ключ, id) для кожного типу + метадані для відповіді"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = {kind: [] for kind in KINDS}
+        self._items = {}
+        self._names = {}
+        # Латки під час перебудови: [(метод, аргументи)] або None, якщо перебудова не йде
+        self._pending = None
+        self.ready = False
+        self.built_at = 0.0
+
+    def start_build(self):
+        """Починає записувати латки; викликається до читання знімка з БД"""
+        with self._lock:
+            self._pending = []
+
+    def cancel_build(self):
+        with self._lock:
+            self._pending = None
+
+    def _record(self, method, *args):
+        """Запам'ятовує латку для повтору; False - індексу немає і він не будується"""
+        if self._pending is not None:
+            self._pending.append((method, args))
+            return True
+        return self.ready
+
+    def build(self, artists, albums, tracks, names):
+        """artists: [(id, label)], albums/tracks: [(id, label, artist_id)], names: {user_id: name}"""
+        items = {}
+        for user_id, label in artists:
+            items[('artists', user_id)] = (label, None)
+        for album_id, label, artist_id in albums:
+            items[('albums', album_id)] = (label, artist_id)
+        for track_id, label, artist_id in tracks:
+            items[('tracks', track_id)] = (label, artist_id)
+
+        keys = {kind: [] for kind in KINDS}
+        for (kind, object_id), (label, _) in items.items():
+            keys[kind].extend((key, object_id) for key in _keys(label))
+        for entries in keys.values():
+            entries.sort()
+
+        with self._lock:
+            self._items = items
+            self._keys = keys
+            self._names = dict(names)
+            pending, self._pending = self._pending or [], None
+            self.ready = True
+            self.built_at = time.monotonic()
+            # Повтор ідемпотентний: латка, яку знімок уже містить, нічого не змінить
+            for method, args in pending:
+                method(*args)
+
+    def _remove_keys(self, kind, object_id):
+        old = self._items.pop((kind, object_id), None)
+        if old is None:
+            return
+        entries = self._keys[kind]
+        for key in _keys(old[0]):
+            position = bisect_left(entries, (key, object_id))
+            if position < len(entries) and entries[position] == (key, object_id):
+                del entries[position]
+
+    def put(self, kind, object_id, label, artist_id=None):
+        with self._lock:
+            if not self._record(self.put, kind, object_id, label, artist_id):
+                return
+            self._remove_keys(kind, object_id)
+            self._items[(kind, object_id)] = (label, artist_id)
+            for key in _keys(label):
+                insort(self._keys[kind], (key, object_id))
+
+    def remove(self, kind, object_id):
+        with self._lock:
+            if self._record(self.remove, kind, object_id):
+                self._remove_keys(kind, object_id)
+
+    def set_name(self, user_id, name):
+        with self._lock:
+            if self._record(self.set_name, user_id, name):
+                self._names[user_id] = name
+
+    def lookup(self, query, limit=5):
+        """Підказки за префіксом: {'artists': [...], 'albums': [...], 'tracks': [...]}"""
+        prefix = normalize(query)
+        results = {kind: [] for kind in KINDS}
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return results
+
+        with self._lock:
+            for kind in KINDS:
+                entries = self._keys[kind]
+                bucket = results[kind]
+                seen = set()
+                position = bisect_left(entries, (prefix,))
+                while len(bucket) < limit and position < len(entries):
+                    key, object_id = entries[position]
+                    position += 1
+                    if not key.startswith(prefix):
+                        break
+                    if object_id in seen:
+                        continue
+                    seen.add(object_id)
+                    label, artist_id = self._items[(kind, object_id)]
+                    item = {'id': object_id, 'label': label}
+                    if artist_id is not None:
+                        item['artist'] = self._names.get(artist_id, '')
+                    bucket.append(item)
+        return results
+
+
+index = PrefixIndex()
+_build_lock = threading.Lock()
+_start_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def display_name(user):
+    return user.stage_name or user.username
+
+
+def build():
+    """Завантажує індекс з БД (синхронно; запити використовують warm())"""
+    with _build_lock:
+        index.start_build()
+        try:
+            artists = [
+                (pk, stage_name or username)
+                for pk, username, stage_name
+                in User.objects.filter(role='artist').values_list('pk', 'username', 'stage_name')
+            ]
+            albums = list(Album.objects.values_list('pk', 'title', 'artist_id'))
+            tracks = list(Track.objects.order_by().values_list('pk', 'title', 'album__artist_id'))
+            owner_ids = {artist_id for _, _, artist_id in albums}
+            names = {
+                pk: stage_name or username
+                for pk, username, stage_name
+                in User.objects.filter(pk__in=owner_ids).values_list('pk', 'username', 'stage_name')
+            }
+        except BaseException:
+            index.cancel_build()
+            raise
+        index.build(artists, albums, tracks, names)
+
+
+def _refresh():
+    try:
+        build()
+    except Exception:
+        logger.exception('Autocomplete index build failed')
+    finally:
+        connection.close()
+        _refreshing.clear()
+
+
+def warm():
+    """Запускає побудову індексу у фоновому потоці, якщо вона ще не йде"""
+    with _start_lock:
+        if _refreshing.is_set():
+            return
+        _refreshing.set()
+    threading.Thread(target=_refresh, name='autocomplete-build', daemon=True).start()
+
+
+def get_index():
+    """Індекс процесу; побудова та оновлення - у фоні, запит на них не чекає"""
+    max_age = getattr(settings, 'AUTOCOMPLETE_REFRESH_SECONDS', 300)
+    if not index.ready or time.monotonic() - index.built_at > max_age:
+        warm()
+    return index
@@ -0,0 +1,238 @@
+# music/benchmark.py
+
+"""
+Заміри всіх сторінок music/urls.py тестовим клієнтом.
+
+Для кожного маршруту береться "найважчий" власник потрібної ролі
+(слухач з найбільшою кількістю улюблених, артист з найбільшою
+кількістю альбомів тощо) і його об'єкти, тож сторінки рендеряться
+з реальним обсягом даних, а не порожніми. Кожен URL запитується GET:
+перший раз - прогрів (кеші, індекс автодоповнення), далі repeat разів
+для p50/p95. Кількість запитів і N+1 рахує той самий QueryProfile, що й
+middleware з music/instrumentation.py.
+
+Результат - JSON, який можна зберегти як базову лінію і порівнювати між
+релізами (compare()). Дані краще генерувати командою
+generate_synthetic_data з фіксованим seed, щоб обсяги збігалися.
+"""
+
+import math
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls
+from .instrumentation import QueryProfile
+from .models import Album, Beat, BeatUpload, Collaboration, Contract, Favorite, Playlist, Track, User
+
+ANONYMOUS = {'landing', 'about', 'register', 'login'}
+# Маршрути, які не можна смикати в циклі
+SKIP = {
+    'logout': 'завершує сесію клієнта',
+    'playlist_add_track': 'змінює дані на GET',
+    'playlist_remove_track': 'змінює дані на GET',
+    'toggle_favorite': 'змінює дані на GET',
+}
+ROLES = {
+    'artist': {
+        'artist_dashboard', 'album_list', 'album_create', 'album_detail', 'album_update', 'album_delete',
+        'track_create', 'track_update', 'track_delete', 'beat_marketplace',
+    },
+    'label_manager': {
+        'manager_dashboard', 'manager_export', 'contract_list', 'contract_create', 'contract_detail',
+        'contract_update', 'contract_delete', 'artist_search',
+    },
+    'producer': {
+        'producer_dashboard', 'beat_list', 'beat_create', 'beat_detail', 'beat_update', 'beat_delete',
+        'beat_upload_start', 'beat_upload_status', 'beat_upload_chunk', 'beat_upload_complete',
+        'stream_beat', 'beat_waveform', 'collaboration_list', 'collaboration_create',
+        'collaboration_detail', 'collaboration_update', 'collaboration_delete',
+    },
+}
+# Решта маршрутів - від імені слухача
+DEFAULT_ROLE = 'listener'
+# Який об'єкт підставляти в <pk>: перше слово з імені маршруту, що є тут
+PK_OBJECTS = ('album', 'track', 'playlist', 'contract', 'beat', 'collaboration')
+PARAMS = {'album_pk': 'album', 'track_pk': 'track', 'playlist_pk': 'playlist', 'upload_pk': 'upload'}
+CONSTANTS = {'index': 0, 'kind': 'contracts'}
+# Різниця p95 менше за це (мс) - шум, а не регресія
+NOISE_MS = 5
+COUNTED = (User, Album, Track, Playlist, Favorite, Contract, Beat, Collaboration)
+
+
+def _role(name):
+    if name in ANONYMOUS:
+        return None
+    for role, names in ROLES.items():
+        if name in names:
+            return role
+    return DEFAULT_ROLE
+
+
+def _heaviest(role, relation):
+    return (
+        User.objects.filter(role=role)
+        .annotate(weight=Count(relation))
+        .order_by('-weight', 'pk')
+        .first()
+    )
+
+
+def samples():
+    """Користувачі кожної ролі з найбільшим обсягом даних і їхні об'єкти для URL"""
+    users = {
+        'listener': _heaviest('listener', 'favorite'),
+        'artist': _heaviest('artist', 'album'),
+        'label_manager': _heaviest('label_manager', 'managed_contracts'),
+        'producer': _heaviest('producer', 'beats'),
+    }
+    objects = {
+        'album': Album.objects.filter(artist=users['artist']).annotate(size=Count('tracks')).order_by('-size', 'pk').first(),
+        'playlist': Playlist.objects.filter(user=users['listener']).order_by('-track_count', 'pk').first(),
+        'contract': Contract.objects.filter(manager=users['label_manager']).first(),
+        'beat': Beat.objects.filter(producer=users['producer']).first(),
+        'collaboration': Collaboration.objects.filter(producer=users['producer']).first(),
+        'upload': BeatUpload.objects.filter(user=users['producer']).first(),
+    }
+    objects['track'] = objects['album'].tracks.first() if objects['album'] else None
+    return users, objects
+
+
+def _queries(objects):
+    """GET-параметри для сторінок пошуку: слово з назви реального треку"""
+    word = objects['track'].title.split()[0].lower() if objects['track'] else 'a'
+    return {'music_search': {'q': word}, 'artist_search': {'q': word[:3]}, 'search_autocomplete': {'q': word[:3]}}
+
+
+def _kwargs(pattern, objects):
+    """kwargs для reverse() або None, якщо потрібного об'єкта в БД немає"""
+    kwargs = {}
+    for param in pattern.pattern.converters:
+        if param in CONSTANTS:
+            kwargs[param] = CONSTANTS[param]
+            continue
+        if param == 'pk':
+            key = next((word for word in pattern.name.split('_') if word in PK_OBJECTS), None)
+        else:
+            key = PARAMS.get(param)
+        obj = objects.get(key)
+        if obj is None:
+            return None
+        kwargs[param] = obj.pk
+    return kwargs
+
+
+def percentile(values, percent):
+    """Перцентиль за найближчим рангом"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+
+def fetch(client, url, params):
+    """GET з повним читанням потокової відповіді (генератор теж виконує запити)"""
+    response = client.get(url, params)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _request(client, url, params):
+    """(відповідь, секунди, QueryProfile) одного GET"""
+    profile = QueryProfile()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        started = time.perf_counter()
+        response = fetch(client, url, params)
+        elapsed = time.perf_counter() - started
+    return response, elapsed, profile
+
+
+def routes(names=None):
+    """
+    Маршрути music/urls.py для обходу тестовим клієнтом.
+
+    Генерує (ім'я, роль, клієнт, url, GET-параметри, причина пропуску); для
+    пропущених маршрутів клієнт і url - None. Клієнт кожної ролі один на
+    весь обхід і вже залогінений.
+    """
+    users, objects = samples()
+    queries = _queries(objects)
+    clients = {}
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        if names and name not in names:
+            continue
+        if name in SKIP:
+            yield name, None, None, None, None, SKIP[name]
+            continue
+        role = _role(name)
+        kwargs = _kwargs(pattern, objects)
+        if kwargs is None or (role and users[role] is None):
+            yield name, role, None, None, None, 'немає даних для URL'
+            continue
+
+        if role not in clients:
+            clients[role] = Client(raise_request_exception=False)
+            if role:
+                clients[role].force_login(users[role])
+        url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs)
+        yield name, role, clients[role], url, queries.get(name, {}), None
+
+
+def run(repeat=20, names=None):
+    """Заміряє маршрути (усі або names). Повертає словник для JSON"""
+    views = {}
+    # Вимірюємо в'ю без накладних витрат middleware обліку запитів
+    with override_settings(QUERY_INSTRUMENTATION=False):
+        for name, role, client, url, params, skipped in routes(names):
+            if skipped:
+                views[name] = {'skipped': skipped}
+                continue
+
+            cold = _request(client, url, params)[1]
+            timings = []
+            for _ in range(max(1, repeat)):
+                # Кількість запитів - з останнього (прогрітого) повтору
+                response, elapsed, profile = _request(client, url, params)
+                timings.append(elapsed)
+            views[name] = {
+                'url': url,
+                'role': role,
+                'status': response.status_code,
+                'queries': profile.count,
+                'repeated_queries': len(profile.repeated()),
+                'cold_ms': round(cold * 1000, 2),
+                'p50_ms': round(percentile(timings, 50) * 1000, 2),
+                'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            }
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connections['default'].vendor,
+        'repeat': repeat,
+        'rows': {model._meta.model_name: model.objects.count() for model in COUNTED},
+        'views': views,
+    }
+
+
+def compare(baseline, current, tolerance=0.2):
+    """Регресії відносно базової лінії: більше запитів або p95 гірший більш ніж на tolerance"""
+    problems = []
+    for name, result in current['views'].items():
+        before = baseline.get('views', {}).get(name)
+        if not before or 'skipped' in before or 'skipped' in result:
+            continue
+        if result['status'] != before['status']:
+            problems.append(f"{name}: статус {before['status']} -> {result['status']}")
+        if result['queries'] > before['queries']:
+            problems.append(f"{name}: запитів {before['queries']} -> {result['queries']}")
+        if result['p95_ms'] > max(before['p95_ms'] * (1 + tolerance), before['p95_ms'] + NOISE_MS):
+            problems.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} мс")
+    return problems
@@ -0,0 +1,111 @@
+# music/exports.py
+
+"""
+Потокові експорти для бухгалтерії менеджера лейблу.
+
+Кожен експорт - queryset з .values_list() та .iterator(chunk_size=...),
+тому рядки читаються з БД порціями і одразу кодуються в CSV або JSON.
+Пам'ять не залежить від кількості рядків, а перший байт відповіді
+відправляється ще до того, як прочитано весь результат.
+"""
+
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Contract, RoyaltyRun, RoyaltyStatement, Track
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'json')
+
+
+def contracts(manager):
+    """Контракти менеджера"""
+    return Contract.objects.filter(manager=manager).order_by('pk').values_list(
+        'pk', 'artist_id', 'artist__username', 'artist__stage_name', 'contract_type', 'status',
+        'artist_royalty_percent', 'label_royalty_percent', 'duration_months', 'start_date', 'end_date',
+    )
+
+
+def releases(manager):
+    """Треки альбомів артистів з діючими контрактами менеджера"""
+    roster = Contract.objects.filter(
+        manager=manager, status__in=['active', 'expiring'],
+    ).values('artist_id')
+    return Track.objects.filter(album__artist_id__in=roster).order_by('album_id', 'track_number', 'pk').values_list(
+        'album_id', 'album__title', 'album__artist__username', 'album__release_date', 'album__genre__name',
+        'pk', 'track_number', 'title', 'duration', 'plays_count',
+    )
+
+
+def statements(manager, run=None):
+    """Нарахування за контрактами менеджера (за замовчуванням - остання версія кожного періоду)"""
+    queryset = RoyaltyStatement.objects.filter(Q(contract__manager=manager) | Q(party=manager))
+    if run is not None:
+        queryset = queryset.filter(run=run)
+    else:
+        newer = RoyaltyRun.objects.filter(
+            period_start=OuterRef('run__period_start'),
+            period_end=OuterRef('run__period_end'),
+            version__gt=OuterRef('run__version'),
+        )
+        queryset = queryset.filter(~Exists(newer))
+    return queryset.order_by('run__period_start', 'run_id', 'pk').values_list(
+        'run__period_start', 'run__period_end', 'run__version', 'contract_id', 'collaboration_id',
+        'party_id', 'party__username', 'role', 'plays', 'gross', 'share_percent', 'amount',
+    )
+
+
+# Назва -> (функція queryset, заголовки колонок у порядку values_list)
+EXPORTS = {
+    'contracts': (contracts, [
+        'contract_id', 'artist_id', 'artist_username', 'artist_stage_name', 'contract_type', 'status',
+        'artist_royalty_percent', 'label_royalty_percent', 'duration_months', 'start_date', 'end_date',
+    ]),
+    'releases': (releases, [
+        'album_id', 'album_title', 'artist_username', 'release_date', 'genre',
+        'track_id', 'track_number', 'track_title', 'duration', 'plays',
+    ]),
+    'statements': (statements, [
+        'period_start', 'period_end', 'version', 'contract_id', 'collaboration_id',
+        'party_id', 'party_username', 'role', 'plays', 'gross', 'share_percent', 'amount',
+    ]),
+}
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: write() повертає рядок замість запису"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_json(columns, rows):
+    """JSON-масив об'єктів, що віддається по рядку"""
+    encoder = DjangoJSONEncoder()
+    separator = '[\n'
+    for row in rows:
+        yield separator + encoder.encode(dict(zip(columns, row)))
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def stream(kind, manager, fmt='csv', **kwargs):
+    """Генератор частин експорту kind у форматі fmt"""
+    queryset_for, columns = EXPORTS[kind]
+    rows = queryset_for(manager, **kwargs).iterator(chunk_size=CHUNK_SIZE)
+    if fmt == 'json':
+        return stream_json(columns, rows)
+    return stream_csv(columns, rows)
+
+
+def content_type(fmt):
+    return 'application/json' if fmt == 'json' else 'text/csv; charset=utf-8'
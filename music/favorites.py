@@ -0,0 +1,150 @@
+# music/favorites.py
+
+"""
+Кеш улюблених треків користувача.
+
+Для кожного слухача в кеші лежить відсортований масив id треків
+(array 'q', 8 байт на трек): 10 000 улюблених - це 80 КБ без pickle
+об'єктів. Перевірка {% if track.id in favorite_track_ids %} - бінарний
+пошук у цьому масиві, без запиту до БД і без побудови множини на кожен
+запит.
+
+Інкрементне оновлення масиву при toggle_favorite (як було задумано спершу)
+свідомо замінено скиданням: get -> змінити -> set не атомарне, і два
+паралельні оновлення губили б одне одного. Натомість ключ масиву містить
+покоління користувача: після коміту зміни (toggle() сам, інші зміни
+Favorite - сигнали) forget() збільшує його через cache.incr, і наступне
+читання завантажує масив з БД одним запитом під новим ключем. Читання,
+що встигло взяти старий стан з БД до коміту, покладе його під старе
+покоління, яке вже ніхто не читає, тож застарілий масив не повернеться.
+
+Нове покоління видно лише в кеші свого процесу, тож з локальним кешем
+(LocMemCache - за замовчуванням, коли CACHES не налаштовано) інші воркери
+бачили б старий масив аж до FAVORITES_CACHE_TIMEOUT. Тому для такого кешу
+масив живе лише FAVORITES_LOCAL_CACHE_TIMEOUT секунд; довгий
+FAVORITES_CACHE_TIMEOUT діє зі спільним кешем (Redis, memcached).
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Favorite
+
+KEY = 'favorites:v2:{}:{}'
+GENERATION_KEY = 'favorites:generation:{}'
+
+
+def _timeout():
+    if isinstance(caches['default'], LocMemCache):
+        return getattr(settings, 'FAVORITES_LOCAL_CACHE_TIMEOUT', 10)
+    return getattr(settings, 'FAVORITES_CACHE_TIMEOUT', 3600)
+
+
+class FavoriteSet:
+    """Незмінний відсортований набір id треків з перевіркою входження за O(log n)"""
+
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids):
+        self._ids = ids
+
+    @classmethod
+    def from_bytes(cls, data):
+        ids = array('q')
+        ids.frombytes(data)
+        return cls(ids)
+
+    def __contains__(self, track_id):
+        try:
+            track_id = int(track_id)
+        except (TypeError, ValueError):
+            return False
+        index = bisect_left(self._ids, track_id)
+        return index < len(self._ids) and self._ids[index] == track_id
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def to_bytes(self):
+        return self._ids.tobytes()
+
+
+def _generation(user_id):
+    """Поточне покоління масиву користувача"""
+    key = GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Початок - час у нс: після витіснення лічильника старі покоління не повторяться
+        initial = time.time_ns()
+        generation = initial if cache.add(key, initial, None) else cache.get(key, initial)
+    return generation
+
+
+def _load(user_id, generation):
+    # Лише з default: застарілий масив з репліки лежав би в кеші FAVORITES_CACHE_TIMEOUT
+    ids = array('q', Favorite.objects.using('default').filter(user_id=user_id).order_by('track_id').values_list('track_id', flat=True))
+    cache.set(KEY.format(user_id, generation), ids.tobytes(), _timeout())
+    return FavoriteSet(ids)
+
+
+def track_ids(user):
+    """FavoriteSet улюблених треків користувача (з кешу або одним запитом)"""
+    user_id = getattr(user, 'pk', user)
+    generation = _generation(user_id)
+    data = cache.get(KEY.format(user_id, generation))
+    if data is None:
+        return _load(user_id, generation)
+    return FavoriteSet.from_bytes(data)
+
+
+def forget(user_id):
+    """Нове покоління масиву; наступне читання завантажить його з БД"""
+    try:
+        cache.incr(GENERATION_KEY.format(user_id))
+    except ValueError:
+        # Лічильника немає (витіснений) - нове покоління візьме наступне читання
+        pass
+
+
+def toggle(user_id, track_id, state=None):
+    """
+    Ставить або знімає позначку одним запитом. Повертає новий стан або None, якщо трека немає.
+
+    state=None перемикає: DELETE ... RETURNING, і лише якщо видаляти не було
+    чого - INSERT ... ON CONFLICT DO NOTHING. З явним state виконується тільки
+    потрібна половина, тож повтор того самого запиту нічого не змінює.
+    """
+    table = connection.ops.quote_name(Favorite._meta.db_table)
+    tracks = connection.ops.quote_name(Favorite._meta.get_field('track').related_model._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if state is not True:
+            cursor.execute(f'DELETE FROM {table} WHERE user_id = %s AND track_id = %s RETURNING id', [user_id, track_id])
+            if cursor.fetchone() is not None:
+                # SQL в обхід ORM - сигналів не буде, кеш скидаємо тут
+                transaction.on_commit(lambda: forget(user_id))
+                return False
+            if state is False:
+                return False
+        created_at = Favorite._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, track_id, created_at) '
+            f'SELECT %s, id, %s FROM {tracks} WHERE id = %s '
+            f'ON CONFLICT (user_id, track_id) DO NOTHING RETURNING id',
+            [user_id, created_at, track_id],
+        )
+        if cursor.fetchone() is not None:
+            transaction.on_commit(lambda: forget(user_id))
+            return True
+        # Нічого не вставлено: трек уже в улюблених (паралельний запит) або його не існує
+        cursor.execute(f'SELECT 1 FROM {tracks} WHERE id = %s', [track_id])
+        return True if cursor.fetchone() is not None else None
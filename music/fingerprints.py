@@ -0,0 +1,178 @@
+# music/fingerprints.py
+
+"""
+Пошук повторних завантажень і схожих бітів за відбитками аудіо.
+
+Відбиток (music/audio.py) рахується в пулі процесів аналізу, а хеші
+зберігаються в інвертованому індексі FingerprintHash (індекс по hash).
+Новий біт шукається одним проходом по індексу: беруться всі рядки з
+його хешами, і для кожного кандидата рахується, скільки хешів мають
+однаковий зсув у часі. Справжній збіг дає гострий пік на одному зсуві,
+випадкові збіги хешів розкидані - тому порівнювати біти попарно не треба.
+"""
+
+import logging
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.db import close_old_connections, transaction
+
+from . import analysis
+from .audio import FFT_HOP, FINGERPRINT_RATE, fingerprint_file
+from .models import Beat, BeatFingerprint, BeatMatch, FingerprintHash
+
+logger = logging.getLogger(__name__)
+
+# Скільки хешів в одному запиті hash IN (...)
+LOOKUP_BATCH = 900
+MIN_ALIGNED = 20
+DUPLICATE_RATIO = 0.15
+SIMILAR_RATIO = 0.05
+
+
+def store(beat_id, source_name, hashes, offsets):
+    """Замінює хеші біту в індексі"""
+    with transaction.atomic():
+        FingerprintHash.objects.filter(beat_id=beat_id).delete()
+        FingerprintHash.objects.bulk_create(
+            (FingerprintHash(beat_id=beat_id, hash=int(value), offset=int(offset))
+             for value, offset in zip(hashes.tolist(), offsets.tolist())),
+            batch_size=2000,
+        )
+        BeatFingerprint.objects.update_or_create(
+            beat_id=beat_id, defaults={'source_name': source_name, 'hash_count': len(hashes)},
+        )
+
+
+def candidates(beat_id, hashes, offsets):
+    """[(matched_beat_id, aligned, offset у кадрах)] - найкращий зсув для кожного біта з індексу"""
+    unique_hashes = np.unique(hashes).tolist()
+    rows = []
+    for start in range(0, len(unique_hashes), LOOKUP_BATCH):
+        rows.extend(
+            FingerprintHash.objects.filter(hash__in=unique_hashes[start:start + LOOKUP_BATCH])
+            .exclude(beat_id=beat_id)
+            .values_list('beat_id', 'hash', 'offset')
+        )
+    if not rows:
+        return []
+
+    found = np.asarray(rows, dtype=np.int64)
+    order = np.argsort(hashes, kind='stable')
+    query_hashes, query_offsets = hashes[order], offsets[order]
+    # Кожен рядок індексу з'єднується з усіма входженнями свого хешу в запиті
+    left = np.searchsorted(query_hashes, found[:, 1], side='left')
+    right = np.searchsorted(query_hashes, found[:, 1], side='right')
+    repeats = right - left
+    row_index = np.repeat(np.arange(len(found)), repeats)
+    query_index = np.repeat(left - np.cumsum(repeats) + repeats, repeats) + np.arange(repeats.sum())
+    deltas = found[row_index, 2] - query_offsets[query_index]
+    beats = found[row_index, 0]
+
+    # Гістограма (біт, зсув) і найбільший стовпчик для кожного біта
+    pairs, counts = np.unique(np.stack([beats, deltas], axis=1), axis=0, return_counts=True)
+    order = np.lexsort((-counts, pairs[:, 0]))
+    pairs, counts = pairs[order], counts[order]
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+    return [
+        (int(matched), int(aligned), int(delta))
+        for (matched, delta), aligned in zip(pairs[first], counts[first])
+    ]
+
+
+def match(beat_id, hashes, offsets):
+    """Шукає збіги біту з каталогом і зберігає BeatMatch в обидва боки. Повертає кількість"""
+    if not len(hashes):
+        BeatMatch.objects.filter(beat_id=beat_id).delete()
+        return 0
+    found = [row for row in candidates(beat_id, hashes, offsets) if row[1] >= MIN_ALIGNED]
+    sizes = dict(BeatFingerprint.objects.filter(
+        beat_id__in=[matched for matched, _, _ in found],
+    ).values_list('beat_id', 'hash_count'))
+
+    rows = []
+    for matched, aligned, delta in found:
+        ratio = aligned / max(1, min(len(hashes), sizes.get(matched, len(hashes))))
+        if ratio < SIMILAR_RATIO:
+            continue
+        kind = 'duplicate' if ratio >= DUPLICATE_RATIO else 'similar'
+        seconds = delta * FFT_HOP / FINGERPRINT_RATE
+        rows.append(BeatMatch(beat_id=beat_id, matched_beat_id=matched, kind=kind,
+                              aligned=aligned, ratio=ratio, offset_seconds=seconds))
+        rows.append(BeatMatch(beat_id=matched, matched_beat_id=beat_id, kind=kind,
+                              aligned=aligned, ratio=ratio, offset_seconds=-seconds))
+
+    with transaction.atomic():
+        BeatMatch.objects.filter(beat_id=beat_id).delete()
+        BeatMatch.objects.filter(matched_beat_id=beat_id).delete()
+        BeatMatch.objects.bulk_create(rows)
+    return len(rows) // 2
+
+
+def process(beat_id, source_name, result):
+    """Зберігає відбиток з пулу процесів і перевіряє його за індексом"""
+    beat = Beat.objects.filter(pk=beat_id).only('pk', 'audio_file').first()
+    if beat is None or beat.audio_file.name != source_name:
+        return None
+    if result is None:
+        # Не WAV - відбитка немає, старі хеші та збіги більше не актуальні
+        FingerprintHash.objects.filter(beat_id=beat_id).delete()
+        BeatFingerprint.objects.filter(beat_id=beat_id).delete()
+        BeatMatch.objects.filter(beat_id=beat_id).delete()
+        return None
+    hashes, offsets = result
+    store(beat_id, source_name, hashes, offsets)
+    return match(beat_id, hashes, offsets)
+
+
+def pending(force=False):
+    """(beat_id, source_name, path) бітів без актуального відбитка"""
+    done = {} if force else dict(BeatFingerprint.objects.values_list('beat_id', 'source_name'))
+    beats = Beat.objects.exclude(audio_file='').exclude(audio_file__isnull=True).only('pk', 'audio_file')
+    for beat in beats.iterator(chunk_size=2000):
+        if done.get(beat.pk) == beat.audio_file.name:
+            continue
+        path = analysis.local_path(beat.audio_file)
+        if path is not None:
+            yield beat.pk, beat.audio_file.name, path
+
+
+def fingerprint_backlog(force=False, max_workers=None, chunksize=4):
+    """Відбитки всіх бітів без актуального індексу. Повертає (бітів, знайдених збігів)"""
+    jobs = list(pending(force))
+    found = 0
+    with analysis.make_pool(max_workers) as pool:
+        results = pool.map(fingerprint_file, [path for _, _, path in jobs], chunksize=chunksize)
+        for (beat_id, source_name, _), result in zip(jobs, results):
+            found += process(beat_id, source_name, result) or 0
+    return len(jobs), found
+
+
+def _done(beat_id, source_name, future):
+    try:
+        process(beat_id, source_name, future.result())
+    except BrokenProcessPool:
+        analysis.discard_pool()
+        logger.exception('Fingerprint pool broke on beat %s', beat_id)
+    except Exception:
+        logger.exception('Fingerprint failed for beat %s', beat_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(beat_id):
+    """Ставить відбиток біту в спільний пул процесів аналізу"""
+    beat = Beat.objects.filter(pk=beat_id).only('pk', 'audio_file').first()
+    if beat is None or not beat.audio_file:
+        return
+    path = analysis.local_path(beat.audio_file)
+    if path is None:
+        return
+    current = BeatFingerprint.objects.filter(beat_id=beat_id).values_list('source_name', flat=True).first()
+    if current == beat.audio_file.name:
+        return
+    source_name = beat.audio_file.name
+    future = analysis.submit(fingerprint_file, path)
+    if future is not None:
+        future.add_done_callback(lambda done: _done(beat_id, source_name, done))
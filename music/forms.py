@@ -110,10 +110,11 @@ class TrackForm(forms.ModelForm):
     
     class Meta:
         model = Track
-        fields = ['title', 'track_number']
+        fields = ['title', 'track_number', 'audio_file']
         labels = {
             'title': 'Назва треку',
             'track_number': 'Номер треку',
+            'audio_file': 'Аудіофайл',
         }
         widgets = {
             'title': forms.TextInput(attrs={
@@ -124,6 +125,10 @@ class TrackForm(forms.ModelForm):
                 'class': 'form-control',
                 'min': '1'
             }),
+            'audio_file': forms.ClearableFileInput(attrs={
+                'class': 'form-control',
+                'accept': 'audio/*'
+            }),
         }
     
     def __init__(self, *args, **kwargs):
@@ -266,13 +271,14 @@ class BeatForm(forms.ModelForm):
     
     class Meta:
         model = Beat
-        fields = ['title', 'genre', 'bpm', 'price', 'description', 'is_available', 'is_exclusive']
+        fields = ['title', 'genre', 'bpm', 'price', 'description', 'audio_file', 'is_available', 'is_exclusive']
         labels = {
             'title': 'Назва біту',
             'genre': 'Жанр',
             'bpm': 'BPM',
             'price': 'Ціна ($)',
             'description': 'Опис',
+            'audio_file': 'Аудіофайл',
             'is_available': 'Доступний для покупки',
             'is_exclusive': 'Ексклюзивний',
         }
@@ -299,6 +305,10 @@ class BeatForm(forms.ModelForm):
                 'rows': 4,
                 'placeholder': 'Опишіть ваш біт...'
             }),
+            'audio_file': forms.ClearableFileInput(attrs={
+                'class': 'form-control',
+                'accept': 'audio/*'
+            }),
             'is_available': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'is_exclusive': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
@@ -384,4 +394,48 @@ class CollaborationForm(forms.ModelForm):
                 'Сума часток продюсера та артиста повинна дорівнювати 100%'
             )
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+class BeatMarketplaceFilterForm(forms.Form):
+    """Фільтри каталогу бітів (GET); порожнє поле - без обмеження"""
+    FLAG_CHOICES = (
+        ('', 'Усі'),
+        ('1', 'Так'),
+        ('0', 'Ні'),
+    )
+
+    genre = forms.ChoiceField(
+        label='Жанр', required=False, choices=(('', 'Усі жанри'),) + Beat.GENRE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    bpm_min = forms.IntegerField(
+        label='BPM від', required=False, min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '60'}),
+    )
+    bpm_max = forms.IntegerField(
+        label='BPM до', required=False, min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '180'}),
+    )
+    price_min = forms.DecimalField(
+        label='Ціна від ($)', required=False, min_value=0, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0'}),
+    )
+    price_max = forms.DecimalField(
+        label='Ціна до ($)', required=False, min_value=0, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '100'}),
+    )
+    available = forms.ChoiceField(
+        label='Доступний для покупки', required=False, choices=FLAG_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    exclusive = forms.ChoiceField(
+        label='Ексклюзивний', required=False, choices=FLAG_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, data=None, *args, **kwargs):
+        # Без явного вибору каталог показує лише біти, які можна купити
+        if data is not None and 'available' not in data:
+            data = data.copy()
+            data['available'] = '1'
+        super().__init__(data, *args, **kwargs)
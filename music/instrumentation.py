@@ -0,0 +1,185 @@
+# music/instrumentation.py
+
+"""
+Облік запитів до БД на кожен HTTP-запит і пошук N+1.
+
+QueryInstrumentationMiddleware обгортає в'ю через
+connection.execute_wrapper: кожен SQL рахується, його час додається до
+часу БД, а "форма" запиту (SQL з плейсхолдерами, списки IN (...) згорнуті)
+групується. Django передає SQL окремо від параметрів, тож однакова форма
+означає той самий запит з іншими значеннями - типовий N+1 з циклу в
+шаблоні. Для форми, що повторилася, один раз знімається стек: найглибший
+вузол шаблону дає файл і рядок ({% for %}, {{ obj.method }}), а якщо
+запит прийшов не з шаблону - рядок нашого коду.
+
+Результат: заголовок Server-Timing (db, render, total - видно в DevTools),
+попередження в логері music.queries для N+1 і перевищених бюджетів
+QUERY_BUDGETS, а з QUERY_BUDGET_STRICT=True - виняток QueryBudgetExceeded,
+який валить тест, що пройшовся по в'ю тестовим клієнтом.
+
+Вмикається QUERY_INSTRUMENTATION (за замовчуванням - DEBUG).
+"""
+
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import base as template_base
+
+logger = logging.getLogger('music.queries')
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+# Скільки однакових запитів за один HTTP-запит вважати N+1
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_current = ContextVar('music_query_profile', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Перевищено бюджет запитів в'ю або знайдено N+1 (лише з QUERY_BUDGET_STRICT)"""
+
+
+def shape(sql):
+    """SQL без конкретних значень: IN зі списком будь-якої довжини згортається"""
+    return IN_LIST_RE.sub('IN (...)', WHITESPACE_RE.sub(' ', sql).strip())
+
+
+def _location():
+    """Рядок шаблону або нашого коду, звідки прийшов поточний запит"""
+    frame = sys._getframe(2)
+    code_line = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, template_base.Node) and getattr(node, 'token', None) is not None:
+            origin = getattr(node, 'origin', None)
+            name = getattr(origin, 'template_name', None) or getattr(origin, 'name', '?')
+            return f'{name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if code_line is None and filename.startswith(APP_ROOT) and filename != __file__:
+            code_line = f'{os.path.relpath(filename, os.path.dirname(APP_ROOT))}:{frame.f_lineno}'
+        frame = frame.f_back
+    return code_line or '?'
+
+
+class QueryProfile:
+    """Запити, час БД і час рендерингу одного HTTP-запиту"""
+
+    def __init__(self, repeat_threshold=DEFAULT_REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.shapes = {}
+        self.locations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.count += 1
+            key = shape(sql)
+            repeats = self.shapes.get(key, 0) + 1
+            self.shapes[key] = repeats
+            if repeats == 2:
+                # Стек знімається лише для форми, що повторилася, і лише раз
+                self.locations[key] = _location()
+
+    def repeated(self):
+        """[(форма, кількість, звідки)] для запитів, що повторилися repeat_threshold+ разів"""
+        return sorted(
+            ((key, repeats, self.locations.get(key, '?'))
+             for key, repeats in self.shapes.items() if repeats >= self.repeat_threshold),
+            key=lambda item: -item[1],
+        )
+
+
+def _instrumented_render(original):
+    def render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context)
+        profile.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            profile.render_depth -= 1
+            # Вкладені шаблони ({% include %}) вже входять у час зовнішнього
+            if not profile.render_depth:
+                profile.render_time += time.perf_counter() - started
+    render.music_instrumented = True
+    return render
+
+
+def _install_render_timer():
+    if not getattr(template_base.Template._render, 'music_instrumented', False):
+        template_base.Template._render = _instrumented_render(template_base.Template._render)
+
+
+def _enabled():
+    return getattr(settings, 'QUERY_INSTRUMENTATION', settings.DEBUG)
+
+
+class QueryInstrumentationMiddleware:
+    """Кількість запитів, час БД/рендерингу, N+1 і бюджети запитів для кожного в'ю"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _enabled():
+            return self.get_response(request)
+
+        _install_render_timer()
+        profile = QueryProfile(getattr(settings, 'QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD))
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Профіль на всіх з'єднаннях (у т.ч. репліках)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        request.query_profile = profile
+        response['Server-Timing'] = (
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.count} queries", '
+            f'render;dur={profile.render_time * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+        self._check(request, profile)
+        return response
+
+    def _check(self, request, profile):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+        problems = []
+
+        for key, repeats, location in profile.repeated():
+            problems.append(f'N+1: {repeats} x [{key[:200]}] з {location}')
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and profile.count > budget:
+            problems.append(f'{profile.count} запитів при бюджеті {budget}')
+
+        for problem in problems:
+            logger.warning('%s: %s', view_name, problem)
+        logger.debug(
+            '%s: %d queries, db %.1f ms, render %.1f ms',
+            view_name, profile.count, profile.db_time * 1000, profile.render_time * 1000,
+        )
+        if problems and getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(f'{view_name}: ' + '; '.join(problems))
+
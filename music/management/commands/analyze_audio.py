@@ -0,0 +1,20 @@
+# music/management/commands/analyze_audio.py
+
+from django.core.management.base import BaseCommand
+
+from music import analysis
+
+
+class Command(BaseCommand):
+    help = 'Визначає тривалість і BPM аудіофайлів у пулі процесів та звіряє з введеними значеннями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(analysis.MODELS), help='Лише треки або лише біти')
+        parser.add_argument('--workers', type=int, help='Кількість процесів (за замовчуванням - усі ядра)')
+        parser.add_argument('--force', action='store_true', help='Перерахувати навіть актуальні')
+
+    def handle(self, *args, **options):
+        kinds = [options['kind']] if options['kind'] else list(analysis.MODELS)
+        counts = analysis.analyze_backlog(kinds, force=options['force'], max_workers=options['workers'])
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items())) or 'нічого нового'
+        self.stdout.write(self.style.SUCCESS(f'Проаналізовано - {summary}'))
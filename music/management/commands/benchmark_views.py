@@ -0,0 +1,36 @@
+# music/management/commands/benchmark_views.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Заміряє p50/p95 і кількість запитів кожної сторінки music/urls.py та зберігає JSON базову лінію'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--view', action='append', dest='views', help="Лише ці маршрути (ім'я з urls.py)")
+        parser.add_argument('--output', help='Файл для JSON (за замовчуванням - stdout)')
+        parser.add_argument('--compare', help='Попередня базова лінія; регресії завершують команду з помилкою')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Допустиме погіршення p95 (частка)')
+
+    def handle(self, *args, **options):
+        result = benchmark.run(repeat=options['repeat'], names=options['views'])
+        data = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(data + '\n')
+        else:
+            self.stdout.write(data)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                problems = benchmark.compare(json.load(source), result, options['tolerance'])
+            if problems:
+                raise CommandError('Регресії:\n' + '\n'.join(problems))
+            self.stdout.write(self.style.SUCCESS('Регресій відносно базової лінії немає'))
+        elif options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Заміряно маршрутів: {len(result['views'])} -> {options['output']}"))
@@ -0,0 +1,22 @@
+# music/management/commands/check_query_plans.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music import query_plans
+
+
+class Command(BaseCommand):
+    help = 'Проганяє EXPLAIN для запитів кожної сторінки music/urls.py і завершується помилкою, якщо є повне сканування таблиці'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', action='append', dest='views', help="Лише ці маршрути (ім'я з urls.py)")
+        parser.add_argument('--allow', action='append', default=[], help='Таблиця, яку можна сканувати повністю')
+
+    def handle(self, *args, **options):
+        allowed = query_plans.ALLOWED_TABLES | set(options['allow'])
+        checked, problems = query_plans.check(names=options['views'], allowed=allowed)
+        for problem in problems:
+            self.stdout.write(f"{problem['view']} ({problem['url']}): {problem['plan']}\n    {problem['sql'][:300]}")
+        if problems:
+            raise CommandError(f'Повних сканувань: {len(problems)} (перевірено запитів: {checked})')
+        self.stdout.write(self.style.SUCCESS(f'Перевірено запитів: {checked}, повних сканувань немає'))
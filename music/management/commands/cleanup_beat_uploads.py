@@ -0,0 +1,18 @@
+# music/management/commands/cleanup_beat_uploads.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from music import uploads
+
+
+class Command(BaseCommand):
+    help = 'Видаляє незавершені завантаження бітів разом із файлами-заготовками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Скільки годин без активності вважати покинутим')
+
+    def handle(self, *args, **options):
+        removed = uploads.cleanup(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'Видалено незавершених завантажень: {removed}'))
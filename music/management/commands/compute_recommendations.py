@@ -0,0 +1,30 @@
+# music/management/commands/compute_recommendations.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Офлайн-перерахунок item-to-item рекомендацій для слухачів (numpy + scipy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbours', type=int, default=50, help='Кількість сусідів для кожного треку')
+        parser.add_argument('--per-user', type=int, default=50, help='Кількість рекомендованих треків на користувача')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            from music import recommendations
+        except ImportError as exc:
+            raise CommandError(f'Для рекомендацій потрібні numpy та scipy: {exc}')
+
+        started = time.monotonic()
+        saved = recommendations.compute(
+            k=options['neighbours'],
+            per_user=options['per_user'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Збережено рекомендацій: {saved} за {time.monotonic() - started:.1f} с'
+        ))
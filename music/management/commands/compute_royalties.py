@@ -0,0 +1,42 @@
+# music/management/commands/compute_royalties.py
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music import royalties
+
+
+class Command(BaseCommand):
+    help = 'Рахує роялті за місяць (за замовчуванням - попередній) і зберігає нову версію виписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Місяць у форматі YYYY-MM')
+        parser.add_argument('--rate', help='Дохід з одного прослуховування, $ (за замовчуванням ROYALTY_RATE_PER_PLAY)')
+
+    def handle(self, *args, **options):
+        if options['period']:
+            try:
+                period_start = datetime.strptime(options['period'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Період має бути у форматі YYYY-MM')
+        else:
+            period_start = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+        period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+        rate = options['rate']
+        if rate is not None:
+            try:
+                rate = Decimal(rate)
+                valid = rate.is_finite() and rate >= 0
+            except InvalidOperation:
+                valid = False
+            if not valid:
+                raise CommandError('Ставка має бути невід\'ємним числом, наприклад 0.004')
+
+        run = royalties.compute(period_start, period_end, rate=rate)
+        self.stdout.write(self.style.SUCCESS(
+            f'Період {run}: прослуховувань {run.plays}, дохід ${run.gross}, '
+            f'виписок {run.statements.count()}'
+        ))
@@ -0,0 +1,22 @@
+# music/management/commands/compute_waveforms.py
+
+from django.core.management.base import BaseCommand
+
+from music import waveforms
+from music.models import Beat, Track
+
+
+class Command(BaseCommand):
+    help = 'Рахує піки хвилі для треків і бітів з аудіо (пропускає вже пораховані)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Перерахувати навіть актуальні')
+
+    def handle(self, *args, **options):
+        computed = 0
+        for kind, model in (('track', Track), ('beat', Beat)):
+            object_ids = model.objects.exclude(audio_file='').exclude(audio_file__isnull=True).values_list('pk', flat=True)
+            for object_id in object_ids.iterator():
+                if waveforms.compute(kind, object_id, force=options['force']) is not None:
+                    computed += 1
+        self.stdout.write(self.style.SUCCESS(f'Хвиль актуально: {computed}'))
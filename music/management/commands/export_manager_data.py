@@ -0,0 +1,40 @@
+# music/management/commands/export_manager_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music import exports
+from music.models import RoyaltyRun, User
+
+
+class Command(BaseCommand):
+    help = 'Потоково експортує контракти, релізи або роялті менеджера у CSV/JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--manager', required=True, help='Username менеджера лейблу')
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--run', type=int, help='ID розрахунку роялті (лише для statements)')
+        parser.add_argument('--output', help='Файл для запису (за замовчуванням stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            manager = User.objects.get(username=options['manager'], role='label_manager')
+        except User.DoesNotExist:
+            raise CommandError(f"Менеджера {options['manager']} не знайдено")
+
+        extra = {}
+        if options['run']:
+            if options['kind'] != 'statements':
+                raise CommandError('--run можна вказати лише для statements')
+            extra['run'] = RoyaltyRun.objects.filter(pk=options['run']).first()
+            if extra['run'] is None:
+                raise CommandError(f"Розрахунок {options['run']} не знайдено")
+
+        chunks = exports.stream(options['kind'], manager, options['format'], **extra)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Експорт збережено у {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
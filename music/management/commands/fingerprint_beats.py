@@ -0,0 +1,17 @@
+# music/management/commands/fingerprint_beats.py
+
+from django.core.management.base import BaseCommand
+
+from music import fingerprints
+
+
+class Command(BaseCommand):
+    help = 'Рахує відбитки аудіо бітів у пулі процесів і шукає повторні завантаження та схожі фрагменти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Кількість процесів (за замовчуванням - усі ядра)')
+        parser.add_argument('--force', action='store_true', help='Перерахувати навіть актуальні')
+
+    def handle(self, *args, **options):
+        beats, found = fingerprints.fingerprint_backlog(force=options['force'], max_workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'Відбитків: {beats}, нових збігів: {found}'))
@@ -0,0 +1,29 @@
+# music/management/commands/generate_synthetic_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Заповнює БД синтетичними користувачами, каталогом, плейлистами, контрактами та бітами (детерміновано за --seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tracks', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='synth_', help='Префікс імен створених користувачів')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-index', action='store_true', help='Не перебудовувати пошуковий індекс')
+
+    def handle(self, *args, **options):
+        try:
+            counts = synthetic.generate(
+                users=options['users'], tracks=options['tracks'], seed=options['seed'],
+                prefix=options['prefix'], batch_size=options['batch_size'], index=not options['no_index'],
+            )
+        except ValueError as error:
+            raise CommandError(f'{error}; оберіть інший --prefix')
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Готово; пароль усіх користувачів: {synthetic.PASSWORD}'))
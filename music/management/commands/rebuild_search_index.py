@@ -0,0 +1,16 @@
+# music/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from music import search
+
+
+class Command(BaseCommand):
+    help = 'Повністю перебудовує повнотекстовий та триграмний пошукові індекси (альбоми, треки, артисти)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Проіндексовано документів: {total}'))
@@ -0,0 +1,27 @@
+# music/management/commands/recompute_playlist_aggregates.py
+
+from django.core.management.base import BaseCommand
+
+from music.models import Playlist
+
+
+class Command(BaseCommand):
+    help = 'Перераховує track_count та total_duration усіх плейлистів пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = 0
+        last_pk = 0
+        while True:
+            # Пакети за діапазоном первинного ключа, кожен - один UPDATE
+            pks = list(
+                Playlist.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            updated += Playlist.refresh_aggregates(Playlist.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]))
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f'Оновлено плейлистів: {updated}'))
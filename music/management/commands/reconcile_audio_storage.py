@@ -0,0 +1,20 @@
+# music/management/commands/reconcile_audio_storage.py
+
+from django.core.management.base import BaseCommand
+
+from music import storage
+
+
+class Command(BaseCommand):
+    help = 'Звіряє лічильники посилань сховища аудіо з треками та бітами і видаляє файли без посилань'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--migrate-legacy', action='store_true',
+                            help='Спершу перенести файли з beats/ і tracks/ у сховище за вмістом')
+
+    def handle(self, *args, **options):
+        if options['migrate_legacy']:
+            moved = storage.migrate_legacy()
+            self.stdout.write(self.style.SUCCESS(f'Перенесено файлів: {moved}'))
+        fixed, removed = storage.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Виправлено лічильників: {fixed}, видалено файлів: {removed}'))
@@ -0,0 +1,16 @@
+# music/management/commands/rollup_plays.py
+
+from django.core.management.base import BaseCommand
+
+from music import rollups
+
+
+class Command(BaseCommand):
+    help = 'Додає нові події прослуховувань до погодинних/денних агрегатів (безпечно запускати повторно)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        events, rows = rollups.run(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Оброблено подій: {events}, оновлено агрегатів: {rows}'))
@@ -0,0 +1,13 @@
+# music/management/commands/sweep_contract_statuses.py
+
+from django.core.management.base import BaseCommand
+
+from music.models import Contract
+
+
+class Command(BaseCommand):
+    help = 'Оновлює статуси контрактів за датою завершення (запускати щодня за розкладом)'
+
+    def handle(self, *args, **options):
+        expired, expiring = Contract.sweep_statuses()
+        self.stdout.write(self.style.SUCCESS(f'Завершено контрактів: {expired}, закінчуються: {expiring}'))
@@ -0,0 +1,23 @@
+# music/management/commands/sync_replicas.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from music import replicas
+
+
+class Command(BaseCommand):
+    help = 'Оновлює SQLite-репліки з основної БД через online backup API (з --interval - у циклі)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Повторювати кожні N секунд')
+        parser.add_argument('--database', action='append', dest='aliases', help='Лише ці репліки')
+
+    def handle(self, *args, **options):
+        while True:
+            for alias, seconds in replicas.sync(options['aliases']):
+                self.stdout.write(self.style.SUCCESS(f'{alias}: синхронізовано за {seconds:.2f} с'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,169 @@
+# music/marketplace.py
+
+"""
+Каталог бітів для артистів: фільтри, фасети і посторінковий перегляд.
+
+Сторінки йдуть за ключем (created_at, id), а не OFFSET: наступна сторінка -
+це WHERE (created_at, id) < (останній показаний) по індексу
+(is_available[, genre], created_at, id), тож сотенна сторінка коштує
+стільки ж, скільки перша.
+
+Фасети рахуються одним GROUP BY (жанр, доступність, ексклюзивність, кошик
+BPM, кошик ціни) по бітах з уже застосованими діапазонами. Кількість груп
+обмежена (жанри x 2 x 2 x кошики), а лічильники кожного фасету збираються
+з тих самих рядків у Python без фільтра самого фасету: поруч з вибраним
+жанром видно, скільки бітів дасть інший жанр.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .models import Beat
+
+PAGE_SIZE = 24
+# (від, до включно, підпис); None - без межі
+BPM_BUCKETS = (
+    (None, 79, 'до 80'),
+    (80, 99, '80-99'),
+    (100, 119, '100-119'),
+    (120, 139, '120-139'),
+    (140, 159, '140-159'),
+    (160, None, '160+'),
+)
+PRICE_BUCKETS = (
+    (None, Decimal('24.99'), 'до $25'),
+    (Decimal('25'), Decimal('49.99'), '$25-50'),
+    (Decimal('50'), Decimal('99.99'), '$50-100'),
+    (Decimal('100'), Decimal('249.99'), '$100-250'),
+    (Decimal('250'), None, '$250+'),
+)
+FLAGS = {'available': 'is_available', 'exclusive': 'is_exclusive'}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _bucket(field, buckets):
+    """Номер кошика для значення поля; -1 - значення не вказане"""
+    whens = []
+    for index, (low, high, _) in enumerate(buckets):
+        condition = Q()
+        if low is not None:
+            condition &= Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lte': high})
+        whens.append(When(condition, then=Value(index)))
+    return Case(*whens, default=Value(-1), output_field=IntegerField())
+
+
+def _flag(value):
+    return {'1': True, '0': False}.get(value)
+
+
+def with_ranges(queryset, filters):
+    """Діапазони BPM і ціни (застосовуються в SQL і до фасетів)"""
+    if filters.get('bpm_min') is not None:
+        queryset = queryset.filter(bpm__gte=filters['bpm_min'])
+    if filters.get('bpm_max') is not None:
+        queryset = queryset.filter(bpm__lte=filters['bpm_max'])
+    if filters.get('price_min') is not None:
+        queryset = queryset.filter(price__gte=filters['price_min'])
+    if filters.get('price_max') is not None:
+        queryset = queryset.filter(price__lte=filters['price_max'])
+    return queryset
+
+
+def with_choices(queryset, filters):
+    """Жанр, доступність та ексклюзивність"""
+    if filters.get('genre'):
+        queryset = queryset.filter(genre=filters['genre'])
+    for name, field in FLAGS.items():
+        flag = _flag(filters.get(name))
+        if flag is not None:
+            queryset = queryset.filter(**{field: flag})
+    return queryset
+
+
+def _matches(row, filters, skip):
+    if skip != 'genre' and filters.get('genre') and row['genre'] != filters['genre']:
+        return False
+    for name, field in FLAGS.items():
+        flag = _flag(filters.get(name))
+        if name != skip and flag is not None and row[field] != flag:
+            return False
+    return True
+
+
+def facets(filters):
+    """Лічильники для всіх фасетів одним згрупованим запитом"""
+    rows = list(
+        with_ranges(Beat.objects.all(), filters)
+        .annotate(bpm_bucket=_bucket('bpm', BPM_BUCKETS), price_bucket=_bucket('price', PRICE_BUCKETS))
+        .values('genre', 'is_available', 'is_exclusive', 'bpm_bucket', 'price_bucket')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+    def totals(key, skip=None):
+        counts = {}
+        for row in rows:
+            if _matches(row, filters, skip):
+                counts[row[key]] = counts.get(row[key], 0) + row['count']
+        return counts
+
+    genres = totals('genre', skip='genre')
+    bpms = totals('bpm_bucket')
+    prices = totals('price_bucket')
+    flags = {name: totals(field, skip=name) for name, field in FLAGS.items()}
+    return {
+        'total': sum(row['count'] for row in rows if _matches(row, filters, None)),
+        'genre': [
+            {'value': value, 'label': label, 'count': genres.get(value, 0), 'selected': filters.get('genre') == value}
+            for value, label in Beat.GENRE_CHOICES
+        ],
+        'bpm': [
+            {'low': low, 'high': high, 'label': label, 'count': bpms.get(index, 0)}
+            for index, (low, high, label) in enumerate(BPM_BUCKETS)
+        ],
+        'price': [
+            {'low': low, 'high': high, 'label': label, 'count': prices.get(index, 0)}
+            for index, (low, high, label) in enumerate(PRICE_BUCKETS)
+        ],
+        'available': {'yes': flags['available'].get(True, 0), 'no': flags['available'].get(False, 0)},
+        'exclusive': {'yes': flags['exclusive'].get(True, 0), 'no': flags['exclusive'].get(False, 0)},
+    }
+
+
+def encode_cursor(beat):
+    delta = beat.created_at - EPOCH
+    return f'{(delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds}-{beat.pk}'
+
+
+def decode_cursor(token):
+    """(created_at, id) з ключа сторінки або None для некоректного значення"""
+    try:
+        micros, pk = (int(part) for part in token.split('-', 1))
+        return EPOCH + timedelta(microseconds=micros), pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def page(queryset, cursor=None, size=PAGE_SIZE):
+    """(біти сторінки, ключ наступної сторінки або None)"""
+    queryset = queryset.order_by('-created_at', '-pk')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        # created_at <= X окремою умовою: по ній індекс стає на позицію ключа, а не сканує з початку
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(pk__lt=pk), created_at__lte=created_at)
+    beats = list(queryset[:size + 1])
+    if len(beats) > size:
+        return beats[:size], encode_cursor(beats[size - 1])
+    return beats, None
+
+
+def browse(filters, cursor=None, size=PAGE_SIZE):
+    """(біти сторінки, ключ наступної сторінки, фасети)"""
+    queryset = with_choices(with_ranges(Beat.objects.select_related('producer'), filters), filters)
+    beats, next_cursor = page(queryset, cursor, size)
+    return beats, next_cursor, facets(filters)
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# AddField на SQLite перебудовує таблицю music_searchentry, і разом зі старою
+# таблицею зникають тригери синхронізації FTS5 з міграції 0005.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS music_searchentry_ai AFTER INSERT ON music_searchentry BEGIN
+        INSERT INTO music_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS music_searchentry_ad AFTER DELETE ON music_searchentry BEGIN
+        INSERT INTO music_searchentry_fts(music_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS music_searchentry_au AFTER UPDATE ON music_searchentry BEGIN
+        INSERT INTO music_searchentry_fts(music_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO music_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+
+def restore_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0005_searchentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name='searchentry',
+            name='fuzzy_key',
+            field=models.CharField(blank=True, max_length=600),
+        ),
+        migrations.AddField(
+            model_name='searchentry',
+            name='gram_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='music.searchentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gram', 'entry'], name='music_trigram_gram_idx')],
+            },
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+    ]
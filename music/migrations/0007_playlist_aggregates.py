@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:15
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_aggregates(apps, schema_editor):
+    Playlist = apps.get_model('music', 'Playlist')
+    entries = Playlist.tracks.through.objects.filter(playlist_id=OuterRef('pk')).values('playlist_id')
+    Playlist.objects.update(
+        track_count=Coalesce(Subquery(entries.annotate(total=Count('pk')).values('total')), 0),
+        total_duration=Coalesce(
+            Subquery(entries.annotate(total=Sum('track__duration')).values('total')),
+            Value(datetime.timedelta(), output_field=models.DurationField()),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0006_search_trigrams'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='total_duration',
+            field=models.DurationField(default=datetime.timedelta),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+POSITION_STEP = 1024
+
+
+def fill_positions(apps, schema_editor):
+    # Існуючий порядок невизначений - беремо порядок додавання (id)
+    PlaylistEntry = apps.get_model('music', 'PlaylistEntry')
+    batch = []
+    current_playlist, position = None, 0
+    for entry in PlaylistEntry.objects.order_by('playlist_id', 'id').iterator(chunk_size=2000):
+        if entry.playlist_id != current_playlist:
+            current_playlist, position = entry.playlist_id, 0
+        position += POSITION_STEP
+        entry.position = position
+        batch.append(entry)
+        if len(batch) >= 2000:
+            PlaylistEntry.objects.bulk_update(batch, ['position'])
+            batch = []
+    PlaylistEntry.objects.bulk_update(batch, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0007_playlist_aggregates'),
+    ]
+
+    operations = [
+        # Автоматична таблиця music_playlist_tracks стає явною моделлю без зміни схеми
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PlaylistEntry',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='music.playlist')),
+                        ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlist_entries', to='music.track')),
+                    ],
+                    options={
+                        'db_table': 'music_playlist_tracks',
+                        'unique_together': {('playlist', 'track')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='playlist',
+                    name='tracks',
+                    field=models.ManyToManyField(blank=True, related_name='playlists', through='music.PlaylistEntry', to='music.track'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='playlistentry',
+            name='position',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playlistentry',
+            name='added_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterModelOptions(
+            name='playlistentry',
+            options={'ordering': ['position']},
+        ),
+        migrations.AddIndex(
+            model_name='playlistentry',
+            index=models.Index(fields=['playlist', 'position'], name='music_playlist_entry_pos_idx'),
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0010_play_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_event_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Година'), ('day', 'День')], max_length=4)),
+                ('scope', models.CharField(choices=[('track', 'Трек'), ('album', 'Альбом'), ('artist', 'Артист'), ('beat', 'Біт')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('bucket', models.DateTimeField(help_text='Початок години/дня (UTC)')),
+                ('plays', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'object_id', 'granularity', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0012_contract_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoyaltyRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField(help_text='Останній день періоду (включно)')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('rate_per_play', models.DecimalField(decimal_places=6, help_text='Дохід з одного прослуховування, $', max_digits=10)),
+                ('plays', models.PositiveBigIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-period_start', '-version'],
+                'unique_together': {('period_start', 'period_end', 'version')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoyaltyStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('artist', 'Артист'), ('label', 'Лейбл'), ('producer', 'Продюсер')], max_length=10)),
+                ('plays', models.PositiveBigIntegerField()),
+                ('gross', models.DecimalField(decimal_places=2, help_text='Дохід за контрактом/співпрацею', max_digits=14)),
+                ('share_percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('collaboration', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='royalty_statements', to='music.collaboration')),
+                ('contract', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='royalty_statements', to='music.contract')),
+                ('party', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='royalty_statements', to=settings.AUTH_USER_MODEL)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='music.royaltyrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['party', 'run'], name='music_royalty_party_run_idx')],
+            },
+        ),
+    ]
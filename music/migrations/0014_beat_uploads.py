@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0013_royalties'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Розмір файлу в байтах')),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, help_text="Контрольна сума всього файлу (необов'язково)", max_length=64)),
+                ('status', models.CharField(choices=[('uploading', 'Завантажується'), ('complete', 'Завершено')], default='uploading', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('beat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='music.beat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='beat_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BeatUploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='music.beatupload')),
+            ],
+            options={
+                'unique_together': {('upload', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0014_beat_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='audio_file',
+            field=models.FileField(blank=True, null=True, upload_to='tracks/'),
+        ),
+    ]
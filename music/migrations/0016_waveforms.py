@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0015_track_audio_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Waveform',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('track', 'Трек'), ('beat', 'Біт')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('source_name', models.CharField(help_text='Файл, з якого пораховано піки', max_length=255)),
+                ('duration', models.FloatField(help_text='Тривалість у секундах')),
+                ('data', models.BinaryField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
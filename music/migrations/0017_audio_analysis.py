@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0016_waveforms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('track', 'Трек'), ('beat', 'Біт')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('source_name', models.CharField(max_length=255)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('bpm', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('ok', 'Збігається'), ('filled', 'Заповнено автоматично'), ('mismatch', 'Розбіжність'), ('unsupported', 'Формат не підтримується')], max_length=12)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('analyzed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status'], name='music_analysis_status_idx')],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0017_audio_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=255)),
+                ('hash_count', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('beat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='music.beat')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BeatMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('duplicate', 'Повторне завантаження'), ('similar', 'Схожий фрагмент')], max_length=10)),
+                ('aligned', models.PositiveIntegerField(help_text='Хешів зі спільним зсувом у часі')),
+                ('ratio', models.FloatField(help_text='Частка від меншого з відбитків')),
+                ('offset_seconds', models.FloatField(help_text='Де фрагмент beat починається в matched_beat')),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('beat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint_matches', to='music.beat')),
+                ('matched_beat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='music.beat')),
+            ],
+            options={
+                'ordering': ['-ratio'],
+                'unique_together': {('beat', 'matched_beat')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FingerprintHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.IntegerField()),
+                ('offset', models.IntegerField(help_text='Кадр якоря від початку файлу')),
+                ('beat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint_hashes', to='music.beat')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hash'], name='music_fphash_hash_idx')],
+            },
+        ),
+    ]
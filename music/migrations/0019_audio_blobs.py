@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:37
+
+import music.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0018_beat_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='beat',
+            name='audio_file',
+            field=models.FileField(blank=True, null=True, storage=music.storage.get_audio_storage, upload_to='beats/'),
+        ),
+        migrations.AlterField(
+            model_name='track',
+            name='audio_file',
+            field=models.FileField(blank=True, null=True, storage=music.storage.get_audio_storage, upload_to='tracks/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0019_audio_blobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-created_at', '-id'], name='music_beat_market_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['genre', '-created_at', '-id'], name='music_beat_market_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['bpm'], name='music_beat_market_bpm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['price'], name='music_beat_market_price_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0020_beat_marketplace_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('admin', 'Administrator'), ('artist', 'Artist'), ('producer', 'Producer'), ('listener', 'Listener'), ('label_manager', 'Label Manager')], db_index=True, default='listener', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['artist', '-created_at'], name='music_album_artist_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['-created_at'], name='music_album_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(fields=['genre', 'is_available', 'is_exclusive', 'bpm', 'price'], name='music_beat_facet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beat',
+            index=models.Index(fields=['producer', '-created_at'], name='music_beat_prod_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['producer', 'status', 'deadline'], name='music_collab_prod_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['manager', 'status', '-created_at'], name='music_contract_mgr_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-created_at'], name='music_fav_user_created_idx'),
+        ),
+    ]
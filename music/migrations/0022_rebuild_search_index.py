@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:10
+
+from django.db import migrations
+
+
+def rebuild_search_index(apps, schema_editor):
+    # Індекс з 0005/0006 наповнюють лише сигнали, тож на наявній базі він порожній.
+    # Документи будує той самий код, що й сигнали (music.search), а не історичні
+    # моделі, тому міграція йде після всіх змін схеми, від яких цей код залежить.
+    if schema_editor.connection.alias != 'default':
+        return
+    from music import search
+
+    search.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0021_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:29
+
+import music.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0022_rebuild_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='beat',
+            name='audio_file',
+            field=music.storage.AudioFileField(blank=True, null=True, storage=music.storage.get_audio_storage, upload_to='beats/'),
+        ),
+        migrations.AlterField(
+            model_name='track',
+            name='audio_file',
+            field=music.storage.AudioFileField(blank=True, null=True, storage=music.storage.get_audio_storage, upload_to='tracks/'),
+        ),
+    ]
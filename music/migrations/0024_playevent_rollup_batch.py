@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+def mark_counted_events(apps, schema_editor):
+    # Події до старого водяного знака вже враховані в PlayRollup - пакет з номером знака
+    RollupWatermark = apps.get_model('music', 'RollupWatermark')
+    PlayEvent = apps.get_model('music', 'PlayEvent')
+    for last_event_id in RollupWatermark.objects.filter(name='plays').values_list('last_event_id', flat=True):
+        PlayEvent.objects.filter(pk__lte=last_event_id).update(rollup_batch=last_event_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0023_audio_file_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playevent',
+            name='rollup_batch',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_counted_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='playevent',
+            index=models.Index(condition=models.Q(('rollup_batch__isnull', True)), fields=['id'], name='music_playevent_pending_idx'),
+        ),
+    ]
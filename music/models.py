@@ -1,7 +1,14 @@
 # music/models.py
 
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .storage import AudioFileField, get_audio_storage
 
 class User(AbstractUser):
     """Розширена модель користувача для музичної індустрії"""
@@ -13,7 +20,7 @@ class User(AbstractUser):
         ('label_manager', 'Label Manager'),
     )
     
-    role = models.CharField(max_length=20, choices=USER_ROLES, default='listener')
+    role = models.CharField(max_length=20, choices=USER_ROLES, default='listener', db_index=True)
     bio = models.TextField(blank=True, null=True)
     stage_name = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -39,6 +46,13 @@ class Album(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Альбоми артиста від нових (дашборд, album_list) і останні альбоми для нових слухачів
+            models.Index(fields=['artist', '-created_at'], name='music_album_artist_created_idx'),
+            models.Index(fields=['-created_at'], name='music_album_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} - {self.artist.stage_name or self.artist.username}"
 
@@ -48,6 +62,8 @@ class Track(models.Model):
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='tracks')
     duration = models.DurationField(null=True, blank=True)
     track_number = models.PositiveIntegerField()
+    audio_file = AudioFileField(upload_to='tracks/', storage=get_audio_storage, null=True, blank=True)
+    plays_count = models.PositiveBigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -71,7 +87,12 @@ class Playlist(models.Model):
     name = models.CharField(max_length=200)
     user = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'listener'})
     description = models.TextField(blank=True)
-    tracks = models.ManyToManyField(Track, related_name='playlists', blank=True)
+    tracks = models.ManyToManyField(Track, through='PlaylistEntry', related_name='playlists', blank=True)
+    
+    # Денормалізовані агрегати (оновлюються сигналами, див. music/signals.py)
+    track_count = models.PositiveIntegerField(default=0)
+    total_duration = models.DurationField(default=timedelta)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -81,14 +102,145 @@ class Playlist(models.Model):
     def __str__(self):
         return f"{self.name} - {self.user.username}"
     
+    @classmethod
+    def refresh_aggregates(cls, playlists=None):
+        """Перераховує track_count/total_duration одним UPDATE для набору плейлистів"""
+        if playlists is None:
+            playlists = cls.objects.all()
+        elif not isinstance(playlists, models.QuerySet):
+            playlists = cls.objects.filter(pk__in=playlists)
+        
+        entries = cls.tracks.through.objects.filter(playlist_id=OuterRef('pk')).values('playlist_id')
+        return playlists.order_by().update(
+            track_count=Coalesce(
+                Subquery(entries.annotate(total=Count('pk')).values('total')),
+                0,
+            ),
+            total_duration=Coalesce(
+                Subquery(entries.annotate(total=Sum('track__duration')).values('total')),
+                Value(timedelta(), output_field=models.DurationField()),
+            ),
+        )
+    
+    def append_tracks(self, track_ids):
+        """Додає треки в кінець плейлиста однією транзакцією. Повертає кількість доданих"""
+        track_ids = list(dict.fromkeys(track_ids))
+        with transaction.atomic():
+            # Лише існуючі треки, яких ще немає в плейлисті
+            new_ids = set(
+                Track.objects.filter(pk__in=track_ids)
+                .exclude(playlist_entries__playlist=self)
+                .values_list('pk', flat=True)
+            )
+            last = self.entries.aggregate(last=Max('position'))['last'] or 0
+            entries = [
+                PlaylistEntry(playlist=self, track_id=track_id, position=last + PlaylistEntry.POSITION_STEP * i)
+                for i, track_id in enumerate((pk for pk in track_ids if pk in new_ids), start=1)
+            ]
+            PlaylistEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=500)
+            Playlist.refresh_aggregates([self.pk])
+        return len(entries)
+    
+    def place_at_end(self, track_ids):
+        """Переносить записи треків у кінець (tracks.add() створює їх з position=0, тобто на початку)"""
+        track_ids = list(track_ids)
+        entries = list(self.entries.filter(track_id__in=track_ids).order_by('pk'))
+        last = self.entries.exclude(track_id__in=track_ids).aggregate(last=Max('position'))['last'] or 0
+        for i, entry in enumerate(entries, start=1):
+            entry.position = last + PlaylistEntry.POSITION_STEP * i
+        PlaylistEntry.objects.bulk_update(entries, ['position'], batch_size=500)
+    
+    def remove_tracks(self, track_ids):
+        """Видаляє треки з плейлиста одним DELETE. Повертає кількість видалених"""
+        with transaction.atomic():
+            deleted, _ = self.entries.filter(track_id__in=list(track_ids)).delete()
+            Playlist.refresh_aggregates([self.pk])
+        return deleted
+    
+    def add_track(self, track_id):
+        """Додає один трек у кінець одним INSERT ... ON CONFLICT DO NOTHING. True, якщо додано"""
+        table = connection.ops.quote_name(PlaylistEntry._meta.db_table)
+        tracks = connection.ops.quote_name(Track._meta.db_table)
+        added_at = PlaylistEntry._meta.get_field('added_at').get_db_prep_value(timezone.now(), connection)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # WHERE перед ON CONFLICT обов'язковий: інакше SQLite читає ON як умову з'єднання
+                cursor.execute(
+                    f'INSERT INTO {table} (playlist_id, track_id, position, added_at) '
+                    f'SELECT %s, id, COALESCE((SELECT MAX(position) FROM {table} WHERE playlist_id = %s), 0) + %s, %s '
+                    f'FROM {tracks} WHERE id = %s '
+                    f'ON CONFLICT (playlist_id, track_id) DO NOTHING RETURNING id',
+                    [self.pk, self.pk, PlaylistEntry.POSITION_STEP, added_at, track_id],
+                )
+                added = cursor.fetchone() is not None
+            if added:
+                self._shift_aggregates(track_id, 1)
+        return added
+    
+    def remove_track(self, track_id):
+        """Прибирає один трек одним DELETE ... RETURNING. True, якщо він був у плейлисті"""
+        table = connection.ops.quote_name(PlaylistEntry._meta.db_table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE playlist_id = %s AND track_id = %s RETURNING id',
+                    [self.pk, track_id],
+                )
+                removed = cursor.fetchone() is not None
+            if removed:
+                self._shift_aggregates(track_id, -1)
+        return removed
+    
+    def _shift_aggregates(self, track_id, sign):
+        """Змінює track_count/total_duration на один трек без перерахунку всього плейлиста"""
+        duration = Coalesce(
+            Subquery(Track.objects.filter(pk=track_id).values('duration')),
+            Value(timedelta(), output_field=models.DurationField()),
+        )
+        Playlist.objects.filter(pk=self.pk).update(
+            track_count=F('track_count') + sign,
+            total_duration=F('total_duration') + duration if sign > 0 else F('total_duration') - duration,
+        )
+    
+    def move_track(self, track_id, after_track_id=None):
+        """Переставляє трек після after_track_id (None - на початок), змінюючи один рядок"""
+        with transaction.atomic():
+            entry = self.entries.select_for_update().get(track_id=track_id)
+            entries = self.entries.exclude(pk=entry.pk).order_by('position')
+            if after_track_id is None:
+                lower = None
+                upper = entries.values_list('position', flat=True).first()
+            else:
+                lower = entries.get(track_id=after_track_id).position
+                upper = entries.filter(position__gt=lower).values_list('position', flat=True).first()
+            
+            if lower is None and upper is None:
+                return entry
+            if lower is None:
+                position = upper - PlaylistEntry.POSITION_STEP
+            elif upper is None:
+                position = lower + PlaylistEntry.POSITION_STEP
+            elif upper - lower > 1:
+                position = (lower + upper) // 2
+            else:
+                # Проміжок вичерпано - рідкісна перенумерація і повтор
+                self.renumber_entries()
+                return self.move_track(track_id, after_track_id)
+            
+            entry.position = position
+            entry.save(update_fields=['position'])
+        return entry
+    
+    def renumber_entries(self):
+        """Рівномірно розподіляє позиції з кроком POSITION_STEP"""
+        entries = list(self.entries.order_by('position', 'pk'))
+        for i, entry in enumerate(entries, start=1):
+            entry.position = i * PlaylistEntry.POSITION_STEP
+        PlaylistEntry.objects.bulk_update(entries, ['position'], batch_size=500)
+    
     def get_total_duration(self):
         """Загальна тривалість плейлиста"""
-        from datetime import timedelta
-        total = timedelta()
-        for track in self.tracks.all():
-            if track.duration:
-                total += track.duration
-        return total
+        return self.total_duration
     
     def get_duration_display(self):
         """Форматована тривалість"""
@@ -98,6 +250,38 @@ class Playlist(models.Model):
         return f"{hours} год {minutes} хв"
 
 
+class PlaylistEntry(models.Model):
+    """Трек у плейлисті з розрідженою позицією (перестановка змінює один рядок)"""
+    POSITION_STEP = 1024
+    
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name='entries')
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='playlist_entries')
+    position = models.BigIntegerField(default=0)
+    added_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'music_playlist_tracks'
+        unique_together = ['playlist', 'track']
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['playlist', 'position'], name='music_playlist_entry_pos_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.playlist_id}:{self.position} {self.track_id}"
+
+
+class Recommendation(models.Model):
+    """Передобчислені рекомендації слухача (див. manage.py compute_recommendations)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation')
+    track_ids = models.JSONField(default=list)
+    album_ids = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username}: {len(self.track_ids)} треків"
+
+
 class Favorite(models.Model):
     """Улюблені треки"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -107,6 +291,9 @@ class Favorite(models.Model):
     class Meta:
         unique_together = ['user', 'track']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='music_fav_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.track.title}"
@@ -147,12 +334,66 @@ class Contract(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Статус стає 'expired', коли до кінця менше місяця, і 'expiring' - менше 4 місяців
+    EXPIRED_WITHIN_MONTHS = 1
+    EXPIRING_WITHIN_MONTHS = 4
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'end_date'], name='music_contract_status_end_idx'),
+            models.Index(fields=['manager', 'status', '-created_at'], name='music_contract_mgr_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.artist.stage_name or self.artist.username} - {self.get_contract_type_display()}"
     
+    @classmethod
+    def sweep_statuses(cls, today=None):
+        """Оновлює статуси всіх контрактів двома UPDATE по індексу (status, end_date)"""
+        from datetime import date
+        from dateutil.relativedelta import relativedelta
+        from django.utils import timezone
+        
+        today = today or date.today()
+        now = timezone.now()
+        expired = cls.objects.filter(
+            status__in=['active', 'expiring', 'pending'],
+            end_date__lt=today + relativedelta(months=cls.EXPIRED_WITHIN_MONTHS),
+        ).update(status='expired', updated_at=now)
+        expiring = cls.objects.filter(
+            status='active',
+            end_date__lt=today + relativedelta(months=cls.EXPIRING_WITHIN_MONTHS),
+        ).update(status='expiring', updated_at=now)
+        return expired, expiring
+    
+    @staticmethod
+    def months_remaining_expression(today=None):
+        """SQL-вираз, еквівалентний months_remaining(), для annotate() на списках"""
+        import calendar
+        from datetime import date
+        
+        today = today or date.today()
+        months = (
+            (ExtractYear('end_date') - today.year) * 12
+            + ExtractMonth('end_date') - today.month
+        )
+        # relativedelta обрізає день до кінця місяця: 31.03 -> 30.04 це рівно місяць
+        leap_years = [year for year in range(today.year, today.year + 100) if calendar.isleap(year)]
+        month_end = (
+            Q(end_date__month__in=[1, 3, 5, 7, 8, 10, 12], end_date__day=31)
+            | Q(end_date__month__in=[4, 6, 9, 11], end_date__day=30)
+            | Q(end_date__month=2, end_date__day=29)
+            | (Q(end_date__month=2, end_date__day=28) & ~Q(end_date__year__in=leap_years))
+        )
+        return Case(
+            When(end_date__lt=today, then=Value(0)),
+            # Неповний останній місяць не рахується (як у relativedelta)
+            When(Q(end_date__day__lt=today.day) & ~month_end, then=months - 1),
+            default=months,
+            output_field=models.IntegerField(),
+        )
+    
     def months_remaining(self):
         """Скільки місяців залишилось до закінчення"""
         from datetime import date
@@ -166,10 +407,11 @@ class Contract(models.Model):
         return delta.years * 12 + delta.months
     
     def save(self, *args, **kwargs):
-        # Автоматично оновлюємо статус
-        if self.months_remaining() == 0:
+        # Автоматично оновлюємо статус (ті самі пороги, що й у sweep_statuses)
+        months = self.months_remaining()
+        if months < self.EXPIRED_WITHIN_MONTHS:
             self.status = 'expired'
-        elif self.months_remaining() <= 3 and self.status == 'active':
+        elif months < self.EXPIRING_WITHIN_MONTHS and self.status == 'active':
             self.status = 'expiring'
         
         super().save(*args, **kwargs)
@@ -195,7 +437,7 @@ class Beat(models.Model):
     description = models.TextField(blank=True)
     
     # Файл біту (опціонально)
-    audio_file = models.FileField(upload_to='beats/', null=True, blank=True)
+    audio_file = AudioFileField(upload_to='beats/', storage=get_audio_storage, null=True, blank=True)
     
     # Статистика
     plays_count = models.PositiveIntegerField(default=0)
@@ -210,6 +452,17 @@ class Beat(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Каталог: сторінки за ключем (created_at, id) серед доступних бітів. Частковий індекс,
+            # бо фільтр is_available=True рендериться як голий стовпець і звичайний індекс його не бере
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_available=True), name='music_beat_market_idx'),
+            models.Index(fields=['genre', '-created_at', '-id'], condition=Q(is_available=True), name='music_beat_market_genre_idx'),
+            models.Index(fields=['bpm'], condition=Q(is_available=True), name='music_beat_market_bpm_idx'),
+            models.Index(fields=['price'], condition=Q(is_available=True), name='music_beat_market_price_idx'),
+            # Фасети каталогу читають лише ці стовпці: GROUP BY проходить індекс, а не таблицю
+            models.Index(fields=['genre', 'is_available', 'is_exclusive', 'bpm', 'price'], name='music_beat_facet_idx'),
+            models.Index(fields=['producer', '-created_at'], name='music_beat_prod_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.producer.stage_name or self.producer.username}"
@@ -248,6 +501,10 @@ class Collaboration(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Активні проєкти продюсера за дедлайном (producer_dashboard)
+            models.Index(fields=['producer', 'status', 'deadline'], name='music_collab_prod_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.project_name} - {self.producer.stage_name or self.producer.username} x {self.artist.stage_name or self.artist.username}"
@@ -257,4 +514,304 @@ class Collaboration(models.Model):
         from datetime import date
         if self.deadline and self.status in ['pending', 'active', 'recording', 'mixing']:
             return date.today() > self.deadline
-        return False
\ No newline at end of file
+        return False
+
+
+class SearchEntry(models.Model):
+    """Документ повнотекстового пошукового індексу (альбом, трек або артист)"""
+    KIND_CHOICES = (
+        ('album', 'Альбом'),
+        ('track', 'Трек'),
+        ('artist', 'Артист'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=300)
+    body = models.TextField(blank=True)
+
+    # Нормалізований транслітерований заголовок для нечіткого пошуку
+    fuzzy_key = models.CharField(max_length=600, blank=True)
+    gram_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+class SearchTrigram(models.Model):
+    """Інвертований триграмний індекс над SearchEntry.fuzzy_key"""
+    entry = models.ForeignKey(SearchEntry, on_delete=models.CASCADE, related_name='trigrams')
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['gram', 'entry'], name='music_trigram_gram_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.gram!r} -> {self.entry_id}"
+
+
+class PlayEvent(models.Model):
+    """Сирі події прослуховування (пишуться пакетами, див. music/plays.py)"""
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, null=True, blank=True, related_name='play_events')
+    beat = models.ForeignKey(Beat, on_delete=models.CASCADE, null=True, blank=True, related_name='play_events')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='play_events')
+    played_at = models.DateTimeField(db_index=True)
+    # Пакет агрегації, що врахував подію (див. music/rollups.py); NULL - ще не врахована
+    rollup_batch = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(rollup_batch__isnull=True), name='music_playevent_pending_idx'),
+        ]
+
+    def __str__(self):
+        target = f"track:{self.track_id}" if self.track_id else f"beat:{self.beat_id}"
+        return f"{target} @ {self.played_at:%Y-%m-%d %H:%M}"
+
+
+class PlayRollup(models.Model):
+    """Агреговані прослуховування за годину/день для треку, альбому, артиста або біту"""
+    GRANULARITY_CHOICES = (
+        ('hour', 'Година'),
+        ('day', 'День'),
+    )
+    SCOPE_CHOICES = (
+        ('track', 'Трек'),
+        ('album', 'Альбом'),
+        ('artist', 'Артист'),
+        ('beat', 'Біт'),
+    )
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    bucket = models.DateTimeField(help_text="Початок години/дня (UTC)")
+    plays = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['scope', 'object_id', 'granularity', 'bucket']
+
+    def __str__(self):
+        return f"{self.scope}:{self.object_id} {self.granularity} {self.bucket:%Y-%m-%d %H:00} = {self.plays}"
+
+
+class RollupWatermark(models.Model):
+    """Блокування запусків агрегації; last_event_id - номер останнього пакета PlayEvent.rollup_batch"""
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_event_id}"
+
+
+class RoyaltyRun(models.Model):
+    """Розрахунок роялті за період. Повторний запуск створює нову версію, старі не змінюються"""
+    period_start = models.DateField()
+    period_end = models.DateField(help_text="Останній день періоду (включно)")
+    version = models.PositiveIntegerField(default=1)
+    rate_per_play = models.DecimalField(max_digits=10, decimal_places=6, help_text="Дохід з одного прослуховування, $")
+    plays = models.PositiveBigIntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['period_start', 'period_end', 'version']
+        ordering = ['-period_start', '-version']
+
+    def __str__(self):
+        return f"{self.period_start} - {self.period_end} v{self.version}"
+
+    @classmethod
+    def latest(cls, period_start, period_end):
+        """Актуальна (остання) версія розрахунку за період"""
+        return cls.objects.filter(period_start=period_start, period_end=period_end).order_by('-version').first()
+
+
+class RoyaltyStatement(models.Model):
+    """Нарахування одній стороні за контрактом або співпрацею (незмінний рядок)"""
+    ROLE_CHOICES = (
+        ('artist', 'Артист'),
+        ('label', 'Лейбл'),
+        ('producer', 'Продюсер'),
+    )
+
+    run = models.ForeignKey(RoyaltyRun, on_delete=models.CASCADE, related_name='statements')
+    party = models.ForeignKey(User, on_delete=models.CASCADE, related_name='royalty_statements')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    contract = models.ForeignKey(Contract, on_delete=models.SET_NULL, null=True, blank=True, related_name='royalty_statements')
+    collaboration = models.ForeignKey(Collaboration, on_delete=models.SET_NULL, null=True, blank=True, related_name='royalty_statements')
+    plays = models.PositiveBigIntegerField()
+    gross = models.DecimalField(max_digits=14, decimal_places=2, help_text="Дохід за контрактом/співпрацею")
+    share_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['party', 'run'], name='music_royalty_party_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.party} ({self.get_role_display()}): ${self.amount}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Нарахування роялті не можна змінювати - перерахуйте період')
+        super().save(*args, **kwargs)
+
+
+class BeatUpload(models.Model):
+    """Сесія докачуваного завантаження аудіофайлу біту частинами (див. music/uploads.py)"""
+    STATUS_CHOICES = (
+        ('uploading', 'Завантажується'),
+        ('complete', 'Завершено'),
+    )
+
+    beat = models.ForeignKey(Beat, on_delete=models.CASCADE, related_name='uploads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='beat_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Розмір файлу в байтах")
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Контрольна сума всього файлу (необов'язково)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} -> {self.beat} ({self.get_status_display()})"
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Очікувана довжина частини index (остання може бути коротшою)"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+
+class BeatUploadChunk(models.Model):
+    """Отримана та перевірена частина завантаження"""
+    upload = models.ForeignKey(BeatUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ['upload', 'index']
+
+
+class AudioBlob(models.Model):
+    """Файл у сховищі з адресацією за вмістом і кількість посилань на нього (див. music/storage.py)"""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} (x{self.refcount})"
+
+
+class Waveform(models.Model):
+    """Попередньо пораховані піки хвилі аудіо (формат blob - див. music/waveforms.py)"""
+    KIND_CHOICES = (
+        ('track', 'Трек'),
+        ('beat', 'Біт'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    source_name = models.CharField(max_length=255, help_text="Файл, з якого пораховано піки")
+    duration = models.FloatField(help_text="Тривалість у секундах")
+    data = models.BinaryField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} ({self.source_name})"
+
+
+class AudioAnalysis(models.Model):
+    """Результат автоматичного аналізу аудіо (тривалість, темп) і звірка з введеними значеннями"""
+    KIND_CHOICES = (
+        ('track', 'Трек'),
+        ('beat', 'Біт'),
+    )
+    STATUS_CHOICES = (
+        ('ok', 'Збігається'),
+        ('filled', 'Заповнено автоматично'),
+        ('mismatch', 'Розбіжність'),
+        ('unsupported', 'Формат не підтримується'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    source_name = models.CharField(max_length=255)
+    duration = models.DurationField(null=True, blank=True)
+    bpm = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    message = models.CharField(max_length=255, blank=True)
+    analyzed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['status'], name='music_analysis_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} - {self.get_status_display()}"
+
+
+class BeatFingerprint(models.Model):
+    """Відбиток аудіо біту: з якого файлу пораховано і скільки хешів в індексі"""
+    beat = models.OneToOneField(Beat, on_delete=models.CASCADE, related_name='fingerprint')
+    source_name = models.CharField(max_length=255)
+    hash_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.beat} ({self.hash_count} хешів)"
+
+
+class FingerprintHash(models.Model):
+    """Інвертований індекс відбитків: хеш пари піків -> біт і кадр якоря"""
+    beat = models.ForeignKey(Beat, on_delete=models.CASCADE, related_name='fingerprint_hashes')
+    hash = models.IntegerField()
+    offset = models.IntegerField(help_text="Кадр якоря від початку файлу")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['hash'], name='music_fphash_hash_idx'),
+        ]
+
+
+class BeatMatch(models.Model):
+    """Знайдений збіг аудіо двох бітів (зберігається в обидва боки)"""
+    KIND_CHOICES = (
+        ('duplicate', 'Повторне завантаження'),
+        ('similar', 'Схожий фрагмент'),
+    )
+
+    beat = models.ForeignKey(Beat, on_delete=models.CASCADE, related_name='fingerprint_matches')
+    matched_beat = models.ForeignKey(Beat, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    aligned = models.PositiveIntegerField(help_text="Хешів зі спільним зсувом у часі")
+    ratio = models.FloatField(help_text="Частка від меншого з відбитків")
+    offset_seconds = models.FloatField(help_text="Де фрагмент beat починається в matched_beat")
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['beat', 'matched_beat']
+        ordering = ['-ratio']
+
+    def __str__(self):
+        return f"{self.beat} ~ {self.matched_beat} ({self.get_kind_display()})"
@@ -0,0 +1,155 @@
+# music/plays.py
+
+"""
+Буферизований прийом подій прослуховування.
+
+Події складаються в буфер процесу і записуються пакетом: один bulk_create
+для PlayEvent та кілька UPDATE з F()-інкрементами лічильників (треки/біти
+з однаковим приростом оновлюються одним запитом). Так тисячі подій за
+секунду дають кілька записів до БД замість save() на кожне прослуховування.
+
+Буфер скидає фоновий потік раз на PLAY_BUFFER_SECONDS (або одразу, щойно
+в ньому PLAY_BUFFER_SIZE подій) та процес при завершенні; шлях запиту до
+БД не звертається і ніколи не падає через запис. Пакет, що не записався,
+повторюється до FLUSH_ATTEMPTS разів, а потім відкидається з записом у лог,
+тож одна погана подія не блокує всі наступні. Події, що не встигли
+записатися при аварійному падінні процесу, втрачаються - для лічильників
+прослуховувань це прийнятно.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Beat, PlayEvent, Track, User
+
+logger = logging.getLogger(__name__)
+
+# Найбільший id (BigAutoField): більші значення ламають pk__in ще до запиту
+MAX_ID = 2 ** 63 - 1
+FLUSH_ATTEMPTS = 3
+
+
+class PlayBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = []
+        self._retry = []
+        self._attempts = 0
+        self._wake = threading.Event()
+        self._flusher = None
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'PLAY_BUFFER_SIZE', 500)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'PLAY_BUFFER_SECONDS', 2.0)
+
+    def add(self, events):
+        """events: [(kind, object_id, user_id)], kind - 'track' або 'beat'"""
+        now = timezone.now()
+        with self._lock:
+            self._events.extend((kind, object_id, user_id, now) for kind, object_id, user_id in events)
+            full = len(self._events) >= self.max_size
+        self._ensure_flusher()
+        if full:
+            # Записує фоновий потік, а не запит: помилка БД не стане 500 для клієнта
+            self._wake.set()
+
+    def _take(self):
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def flush(self):
+        """Записує все накопичене. Повертає кількість збережених подій (не піднімає винятків)"""
+        with self._flush_lock:
+            events = self._retry + self._take()
+            self._retry = []
+            if not events:
+                return 0
+            try:
+                written = write_events(events)
+            except Exception:
+                self._attempts += 1
+                if self._attempts < FLUSH_ATTEMPTS:
+                    logger.warning('Не вдалося записати %d подій прослуховування, спроба %d', len(events), self._attempts, exc_info=True)
+                    self._retry = events
+                else:
+                    logger.exception('Відкинуто %d подій прослуховування після %d спроб', len(events), self._attempts)
+                    self._attempts = 0
+                return 0
+            self._attempts = 0
+            return written
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._run, name='play-buffer', daemon=True)
+                    self._flusher.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def _increment(model, counts):
+    """F()-інкременти: один UPDATE на кожне різне значення приросту"""
+    by_amount = defaultdict(list)
+    for object_id, amount in counts.items():
+        by_amount[amount].append(object_id)
+    for amount, object_ids in by_amount.items():
+        model.objects.filter(pk__in=object_ids).update(plays_count=F('plays_count') + amount)
+
+
+def write_events(events):
+    """Пакетний запис подій та лічильників в одній транзакції"""
+    track_ids = {object_id for kind, object_id, _, _ in events if kind == 'track'}
+    beat_ids = {object_id for kind, object_id, _, _ in events if kind == 'beat'}
+    # Події для неіснуючих об'єктів відкидаються, щоб не зламати весь пакет
+    track_ids = set(Track.objects.filter(pk__in=track_ids).order_by().values_list('pk', flat=True))
+    beat_ids = set(Beat.objects.filter(pk__in=beat_ids).order_by().values_list('pk', flat=True))
+    # Видалений користувач дав би помилку FK лише на коміті й зламав би весь пакет
+    user_ids = {user_id for _, _, user_id, _ in events if user_id is not None}
+    user_ids = set(User.objects.filter(pk__in=user_ids).order_by().values_list('pk', flat=True))
+    events = [event for event in events if event[2] is None or event[2] in user_ids]
+
+    rows = []
+    track_counts, beat_counts = Counter(), Counter()
+    for kind, object_id, user_id, played_at in events:
+        if kind == 'track' and object_id in track_ids:
+            rows.append(PlayEvent(track_id=object_id, user_id=user_id, played_at=played_at))
+            track_counts[object_id] += 1
+        elif kind == 'beat' and object_id in beat_ids:
+            rows.append(PlayEvent(beat_id=object_id, user_id=user_id, played_at=played_at))
+            beat_counts[object_id] += 1
+
+    with transaction.atomic():
+        PlayEvent.objects.bulk_create(rows, batch_size=1000)
+        _increment(Track, track_counts)
+        _increment(Beat, beat_counts)
+    return len(rows)
+
+
+buffer = PlayBuffer()
+atexit.register(buffer.flush)
+
+
+def record(events):
+    """Додає події в буфер (без звернення до БД на шляху запиту)"""
+    buffer.add(events)
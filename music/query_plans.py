@@ -0,0 +1,118 @@
+# music/query_plans.py
+
+"""
+Перевірка планів запитів кожної сторінки.
+
+check() обходить маршрути music/urls.py так само, як benchmark (тими самими
+клієнтами від імені "найважчих" користувачів), записує кожен SELECT разом з
+параметрами і проганяє для нього EXPLAIN. Повне сканування таблиці
+(SQLite: "SCAN таблиця" без USING INDEX; PostgreSQL: Seq Scan) - порушення:
+на мільйоні рядків саме такий запит стає найповільнішим на сторінці.
+
+План залежить від обсягу даних (PostgreSQL на порожній таблиці завжди
+обере Seq Scan), тож перевіряти варто на базі з generate_synthetic_data.
+Маленькі довідники дешевше прочитати повністю, вони в ALLOWED_TABLES.
+"""
+
+import json
+import re
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import override_settings
+
+from . import benchmark
+from .instrumentation import shape
+
+# Довідники, які читаються повністю (список для <select> у формах)
+ALLOWED_TABLES = {'music_genre'}
+# "music_user" T3 - псевдонім, під яким таблиця з'явиться в плані SQLite
+ALIAS_RE = re.compile(r'"(\w+)" ([A-Z]\d+)\b')
+SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)(.*)$')
+# SCAN subquery / CONSTANT ROW - обхід уже обчисленого результату, а не таблиці
+NOT_TABLES = {'subquery', 'CONSTANT'}
+
+
+class _Recorder:
+    """execute_wrapper, що запам'ятовує SELECT-и з'єднання"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def _sqlite_scans(cursor, sql, params):
+    aliases = {alias: table for table, alias in ALIAS_RE.findall(sql)}
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    for _, _, _, detail in cursor.fetchall():
+        match = SQLITE_SCAN_RE.match(detail)
+        # SCAN ... USING [COVERING] INDEX / VIRTUAL TABLE INDEX - обхід по індексу
+        if (match and match.group(1) not in NOT_TABLES
+                and 'USING' not in match.group(2) and 'VIRTUAL TABLE' not in match.group(2)):
+            yield aliases.get(match.group(1), match.group(1)), detail
+
+
+def _postgres_scans(cursor, sql, params):
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    plan = cursor.fetchone()[0]
+    nodes = [(plan if isinstance(plan, list) else json.loads(plan))[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            yield node['Relation Name'], f"Seq Scan on {node['Relation Name']}"
+        nodes.extend(node.get('Plans', []))
+
+
+EXPLAINERS = {'sqlite': _sqlite_scans, 'postgresql': _postgres_scans}
+
+
+def full_scans(connection, sql, params, allowed=ALLOWED_TABLES):
+    """[(таблиця, рядок плану)] для таблиць, які запит читає повністю"""
+    explain = EXPLAINERS.get(connection.vendor)
+    if explain is None:
+        raise NotImplementedError(f'EXPLAIN для {connection.vendor} не підтримується')
+    with connection.cursor() as cursor:
+        return [(table, detail) for table, detail in explain(cursor, sql, params) if table not in allowed]
+
+
+def _check_route(name, client, url, params, allowed):
+    """(кількість перевірених запитів, [порушення]) однієї сторінки"""
+    # Перший запит прогріває кеші процесу (індекс автодоповнення, улюблені): їх разова
+    # побудова свідомо читає таблиці повністю, а перевіряється сталий стан сторінки
+    benchmark.fetch(client, url, params)
+    recorders = [_Recorder(connection.alias) for connection in connections.all()]
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        benchmark.fetch(client, url, params)
+
+    seen = set()
+    problems = []
+    for recorder in recorders:
+        for sql, query_params in recorder.queries:
+            key = shape(sql)
+            if key in seen:
+                continue
+            seen.add(key)
+            for table, detail in full_scans(connections[recorder.alias], sql, query_params, allowed):
+                problems.append({'view': name, 'url': url, 'table': table, 'plan': detail, 'sql': key})
+    return len(seen), problems
+
+
+def check(names=None, allowed=ALLOWED_TABLES):
+    """(кількість перевірених запитів, [порушення]) для маршрутів (усіх або names)"""
+    checked = 0
+    problems = []
+    with override_settings(QUERY_INSTRUMENTATION=False):
+        for name, _, client, url, params, skipped in benchmark.routes(names):
+            if skipped:
+                continue
+            count, found = _check_route(name, client, url, params, allowed)
+            checked += count
+            problems += found
+    return checked, problems
@@ -0,0 +1,141 @@
+# music/recommendations.py
+
+"""
+Офлайн item-to-item рекомендації.
+
+Улюблені треки та треки з плейлистів утворюють розріджену бінарну матрицю
+користувач x трек. Для кожного треку шукаються top-K сусідів за косинусною
+схожістю стовпців, а оцінка треку для користувача - сума схожостей з
+треками, які він уже слухає. Все рахується пакетами рядків через
+scipy.sparse; результат зберігається в Recommendation, тож сторінка
+слухача лише читає готовий рядок.
+"""
+
+import numpy as np
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Favorite, PlaylistEntry, Recommendation, Track
+
+
+def load_interactions():
+    """Повертає (X, user_ids, track_ids): CSR-матрицю взаємодій та відповідні ID"""
+    pairs = [
+        np.fromiter(
+            (value for pair in queryset.iterator(chunk_size=10000) for value in pair),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        for queryset in (
+            Favorite.objects.order_by().values_list('user_id', 'track_id'),
+            PlaylistEntry.objects.order_by().values_list('playlist__user_id', 'track_id'),
+        )
+    ]
+    pairs = np.concatenate(pairs)
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    track_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+
+    X = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(track_ids)),
+    )
+    # Трек у кількох плейлистах одного користувача - все одно одна взаємодія
+    X.data[:] = 1.0
+    return X, user_ids, track_ids
+
+
+def _top_k_per_row(matrix, k):
+    """Залишає в кожному рядку CSR-матриці лише k найбільших значень"""
+    matrix = matrix.tocsr()
+    rows, cols, data = [], [], []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            continue
+        values = matrix.data[start:end]
+        indices = matrix.indices[start:end]
+        if len(values) > k:
+            keep = np.argpartition(-values, k - 1)[:k]
+            values, indices = values[keep], indices[keep]
+        order = np.argsort(-values, kind='stable')
+        rows.append(np.full(len(order), row, dtype=np.int64))
+        cols.append(indices[order])
+        data.append(values[order])
+    if not rows:
+        return sparse.csr_matrix(matrix.shape, dtype=np.float32)
+    return sparse.csr_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+        shape=matrix.shape,
+    )
+
+
+def item_neighbours(X, k=50, batch_size=1000):
+    """Розріджена матриця трек x трек з top-K косинусними сусідами кожного треку"""
+    norms = np.sqrt(np.asarray(X.sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    inverse = sparse.diags(1.0 / norms).astype(np.float32)
+    normalized = (X @ inverse).tocsc()
+    normalized_t = normalized.T.tocsr()
+
+    blocks = []
+    for start in range(0, X.shape[1], batch_size):
+        end = min(start + batch_size, X.shape[1])
+        # Спільні слухачі для пакета треків з усіма треками, вже нормовані
+        similarity = (normalized_t[start:end] @ normalized).tocsr()
+        # Трек не є сусідом сам собі: обнуляємо елементи (i, start + i)
+        row_of = np.repeat(np.arange(end - start), np.diff(similarity.indptr))
+        similarity.data[similarity.indices == row_of + start] = 0
+        similarity.eliminate_zeros()
+        blocks.append(_top_k_per_row(similarity, k))
+    return sparse.vstack(blocks).tocsr()
+
+
+def recommend(X, neighbours, per_user=50, batch_size=1000):
+    """Генерує (індекс користувача, індекси треків за спаданням оцінки)"""
+    for start in range(0, X.shape[0], batch_size):
+        end = min(start + batch_size, X.shape[0])
+        seen = X[start:end]
+        # Сума схожостей сусідів усіх треків користувача
+        scores = (seen @ neighbours).tocsr()
+        # Прибираємо вже відомі користувачу треки
+        scores = (scores - scores.multiply(seen)).tocsr()
+        scores.eliminate_zeros()
+        top = _top_k_per_row(scores, per_user)
+        for offset in range(end - start):
+            indices = top.indices[top.indptr[offset]:top.indptr[offset + 1]]
+            yield start + offset, indices
+
+
+def compute(k=50, per_user=50, albums_per_user=12, batch_size=1000):
+    """Повний перерахунок рекомендацій. Повертає кількість збережених рядків"""
+    started_at = timezone.now()
+    X, user_ids, track_ids = load_interactions()
+    if X.nnz == 0:
+        Recommendation.objects.all().delete()
+        return 0
+    neighbours = item_neighbours(X, k=k, batch_size=batch_size)
+    album_of = dict(Track.objects.order_by().values_list('pk', 'album_id').iterator(chunk_size=10000))
+
+    saved = 0
+    rows = []
+    for user_index, indices in recommend(X, neighbours, per_user=per_user, batch_size=batch_size):
+        tracks = [int(track_ids[index]) for index in indices]
+        albums = list(dict.fromkeys(album_of[pk] for pk in tracks if pk in album_of))[:albums_per_user]
+        rows.append(Recommendation(user_id=int(user_ids[user_index]), track_ids=tracks, album_ids=albums))
+        if len(rows) >= batch_size:
+            saved += _save(rows)
+            rows = []
+    saved += _save(rows)
+
+    # Користувачі без взаємодій більше не мають рекомендацій
+    Recommendation.objects.filter(computed_at__lt=started_at).delete()
+    return saved
+
+
+def _save(rows):
+    Recommendation.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['track_ids', 'album_ids', 'computed_at'],
+    )
+    return len(rows)
@@ -0,0 +1,162 @@
+# music/replicas.py
+
+"""
+Читання з реплік для сторінок, що лише читають.
+
+ReplicaMiddleware для GET-запитів до REPLICA_VIEWS (пошук, домашня
+сторінка слухача, дашборди) вибирає одну з DATABASE_REPLICAS, а
+ReplicaRouter відправляє туди читання моделей застосунку music. Записи
+завжди йдуть у default, сесії теж читаються з default.
+
+Read-your-writes: після будь-якого не-GET запиту (POST форми, AJAX) та
+після в'ю з REPLICA_WRITE_VIEWS, що змінюють дані на GET (посилання ❤️,
+додавання в плейлист), сесія REPLICA_STICKY_SECONDS читає лише з default,
+тож користувач одразу бачить свою зміну, навіть якщо репліка ще не
+наздогнала. Запити до REPLICA_STICKY_EXEMPT_VIEWS (фоновий маячок
+прослуховувань) сесію не прив'язують: інакше кожен активний слухач завжди
+читав би з default.
+
+Локально репліка - окремий файл SQLite, який sync() оновлює через
+online backup API (команда sync_replicas --interval). Така репліка
+використовується, лише поки остання синхронізація свіжіша за
+REPLICA_MAX_LAG_SECONDS: якщо синхронізацію не запущено або вона
+зупинилась, усе читається з default.
+"""
+
+import os
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_SESSION_KEY = '_replica_sticky_until'
+# Моделі, читання яких можна віддати репліці (сесії, адмінка тощо - з default)
+APP_LABELS = {'music'}
+# Сторінок за один крок backup (між кроками джерело доступне для записів)
+BACKUP_PAGES = 1024
+
+_read_alias = ContextVar('music_read_alias', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def _max_lag():
+    return getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+
+
+def is_fresh(alias):
+    """Чи можна читати з репліки: для SQLite-файлу - чи недавно він синхронізований"""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        # Справжня реплікація: відставання контролює сама СУБД
+        return True
+    max_lag = _max_lag()
+    path = connection.settings_dict['NAME']
+    if connection.creation.is_in_memory_db(path) or max_lag is None:
+        return True
+    try:
+        return time.time() - os.path.getmtime(path) <= max_lag
+    except OSError:
+        return False
+
+
+def writes(request):
+    """Чи міг запит змінити дані, які користувач має одразу побачити"""
+    view_name = getattr(request.resolver_match, 'view_name', None)
+    if view_name in getattr(settings, 'REPLICA_STICKY_EXEMPT_VIEWS', ()):
+        return False
+    return request.method not in SAFE_METHODS or view_name in getattr(settings, 'REPLICA_WRITE_VIEWS', ())
+
+
+def choose():
+    """Випадкова свіжа репліка або None (читати з default)"""
+    fresh = [alias for alias in replica_aliases() if is_fresh(alias)]
+    return random.choice(fresh) if fresh else None
+
+
+class ReplicaRouter:
+    """Читання моделей music - з репліки, вибраної ReplicaMiddleware для цього запиту"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in APP_LABELS:
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Репліки - копії default, об'єкти з них можна зв'язувати між собою
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема потрапляє на репліки разом з даними
+        return False if db in replica_aliases() else None
+
+
+class ReplicaMiddleware:
+    """Вибір репліки для читання на REPLICA_VIEWS і read-your-writes після записів"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.read_database = 'default'
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_replica_token', None)
+            if token is not None:
+                _read_alias.reset(token)
+
+        if hasattr(request, 'session') and writes(request):
+            sticky = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            request.session[STICKY_SESSION_KEY] = time.time() + sticky
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or not replica_aliases():
+            return None
+        if request.resolver_match.view_name not in getattr(settings, 'REPLICA_VIEWS', ()):
+            return None
+        session = getattr(request, 'session', None)
+        if session is not None and session.get(STICKY_SESSION_KEY, 0) > time.time():
+            return None
+        alias = choose()
+        if alias is not None:
+            request.read_database = alias
+            request._replica_token = _read_alias.set(alias)
+        return None
+
+
+def backup(source_path, target_path, pages=BACKUP_PAGES):
+    """Копіює SQLite-базу source у target через online backup API"""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path, timeout=getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 20000) / 1000)
+    try:
+        with target:
+            source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+    # Час синхронізації - mtime файлу (у WAL-режимі записи можуть лишитися в -wal)
+    os.utime(target_path)
+
+
+def sync(aliases=None):
+    """Оновлює SQLite-репліки з default. Повертає [(alias, секунди)]"""
+    source_path = connections['default'].settings_dict['NAME']
+    results = []
+    for alias in aliases or replica_aliases():
+        if connections[alias].vendor != 'sqlite':
+            continue
+        started = time.perf_counter()
+        backup(source_path, connections[alias].settings_dict['NAME'])
+        results.append((alias, time.perf_counter() - started))
+    return results
@@ -0,0 +1,203 @@
+# music/royalties.py
+
+"""
+Розрахунок роялті за період.
+
+Вхідні дані - денні агрегати PlayRollup (артист і біт), тому навіть мільйони
+прослуховувань за місяць - це лише кілька тисяч рядків. Кожен день
+прослуховувань прив'язується до угоди, що діяла того дня: для треків це
+контракт артиста (з тих, що діяли, - останній за датою початку),
+для бітів - співпраця продюсера з артистом. Зіставлення робиться пакетно
+через numpy.searchsorted, далі на кожну угоду рахується дохід і ділиться
+між сторонами в Decimal.
+
+Гроші округлюються до центів методом найбільшого залишку: сума часток
+сторін завжди дорівнює округленому доходу, помноженому на їхній сумарний
+відсоток, без зайвого чи втраченого центу. Результат - незмінні рядки
+RoyaltyStatement у новій версії RoyaltyRun, тож період можна перерахувати
+будь-коли, а попередні виписки залишаються як є.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import rollups
+from .models import Collaboration, Contract, PlayRollup, RoyaltyRun, RoyaltyStatement
+
+CENT = Decimal('0.01')
+# Ключ зіставлення: id власника * DAY_SPAN + порядковий номер дня
+DAY_SPAN = 1_000_000
+OPEN_END = DAY_SPAN - 1
+
+
+def rate_per_play():
+    return Decimal(str(getattr(settings, 'ROYALTY_RATE_PER_PLAY', '0.004')))
+
+
+def _bounds(period_start, period_end):
+    """Межі періоду як aware datetime для фільтра по bucket"""
+    start = timezone.make_aware(datetime.combine(period_start, time.min))
+    end = timezone.make_aware(datetime.combine(period_end + timedelta(days=1), time.min))
+    return start, end
+
+
+def daily_plays(scope, period_start, period_end):
+    """(owner_ids, day_ordinals, plays) - денні прослуховування області за період"""
+    start, end = _bounds(period_start, period_end)
+    rows = PlayRollup.objects.filter(
+        scope=scope, granularity='day', bucket__gte=start, bucket__lt=end,
+    ).order_by().values_list('object_id', 'bucket', 'plays')
+
+    owners, days, plays = [], [], []
+    for object_id, bucket, count in rows.iterator(chunk_size=10000):
+        owners.append(object_id)
+        days.append(timezone.localtime(bucket).date().toordinal())
+        plays.append(count)
+    return (
+        np.asarray(owners, dtype=np.int64),
+        np.asarray(days, dtype=np.int64),
+        np.asarray(plays, dtype=np.int64),
+    )
+
+
+def assign(owners, days, agreement_owners, agreement_starts, agreement_ends):
+    """
+    Індекс угоди, що діяла для кожного (власник, день), або -1.
+
+    Угоди сортуються за (власник, початок); для кожного дня береться остання
+    угода того ж власника, що почалась не пізніше, і перевіряється її кінець.
+    Якщо вона вже скінчилась (коротка угода всередині довгої), перевіряється
+    попередня - ітерацій не більше, ніж угод в одного власника.
+    """
+    assigned = np.full(len(owners), -1, dtype=np.int64)
+    if not len(agreement_owners) or not len(owners):
+        return assigned
+
+    agreement_keys = agreement_owners * DAY_SPAN + agreement_starts
+    order = np.argsort(agreement_keys, kind='stable')
+    sorted_keys = agreement_keys[order]
+
+    position = np.searchsorted(sorted_keys, owners * DAY_SPAN + days, side='right') - 1
+    pending = np.arange(len(owners))
+    while len(pending):
+        candidate = order[np.maximum(position[pending], 0)]
+        same_owner = (position[pending] >= 0) & (agreement_owners[candidate] == owners[pending])
+        active = same_owner & (agreement_ends[candidate] >= days[pending])
+        assigned[pending[active]] = candidate[active]
+        pending = pending[same_owner & ~active]
+        position[pending] -= 1
+    return assigned
+
+
+def plays_per_agreement(owners, days, plays, agreement_owners, agreement_starts, agreement_ends):
+    """Сумарні прослуховування кожної угоди за період (масив довжини кількості угод)"""
+    index = assign(owners, days, agreement_owners, agreement_starts, agreement_ends)
+    covered = index >= 0
+    return np.bincount(index[covered], weights=plays[covered], minlength=len(agreement_owners)).astype(np.int64)
+
+
+def split(gross, shares):
+    """
+    Ділить gross між сторонами за відсотками shares з точністю до цента.
+
+    Кожна частка спершу округлюється вниз, а залишок центів віддається
+    сторонам з найбільшими відкинутими дробовими частинами.
+    """
+    total = (gross * sum(shares) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    exact = [gross * share / 100 for share in shares]
+    amounts = [value.quantize(CENT, rounding=ROUND_DOWN) for value in exact]
+    leftover = int((total - sum(amounts)) / CENT)
+    by_remainder = sorted(range(len(shares)), key=lambda i: (exact[i] - amounts[i], -i), reverse=True)
+    for i in by_remainder[:leftover]:
+        amounts[i] += CENT
+    return amounts
+
+
+def _agreements(period_start, period_end):
+    """Контракти та співпраці, що діяли хоча б один день періоду"""
+    contracts = list(
+        Contract.objects.exclude(status='pending')
+        .filter(start_date__lte=period_end, end_date__gte=period_start)
+        .order_by('pk')
+    )
+    collaborations = list(
+        Collaboration.objects.exclude(status__in=['pending', 'cancelled'])
+        .filter(beat__isnull=False, created_at__lt=_bounds(period_start, period_end)[1])
+        .order_by('pk')
+    )
+    return contracts, collaborations
+
+
+def _statements(agreements, plays, rate, parties):
+    """Рядки RoyaltyStatement для угод; parties(agreement) -> [(user_id, role, percent)]"""
+    rows = []
+    for agreement, count in zip(agreements, plays.tolist()):
+        if not count:
+            continue
+        gross = (rate * count).quantize(CENT, rounding=ROUND_HALF_UP)
+        members = parties(agreement)
+        amounts = split(gross, [percent for _, _, percent in members])
+        for (user_id, role, percent), amount in zip(members, amounts):
+            rows.append(RoyaltyStatement(
+                party_id=user_id, role=role, plays=count, gross=gross,
+                share_percent=percent, amount=amount,
+                **{agreement._meta.model_name: agreement},
+            ))
+    return rows
+
+
+def compute(period_start, period_end, rate=None):
+    """Рахує роялті за період і зберігає нову версію розрахунку. Повертає RoyaltyRun"""
+    rate = rate_per_play() if rate is None else Decimal(rate)
+    # Підтягуємо в агрегати події, що ще не встигли туди потрапити
+    rollups.run()
+
+    contracts, collaborations = _agreements(period_start, period_end)
+    track_plays = plays_per_agreement(
+        *daily_plays('artist', period_start, period_end),
+        np.array([contract.artist_id for contract in contracts], dtype=np.int64),
+        np.array([contract.start_date.toordinal() for contract in contracts], dtype=np.int64),
+        np.array([contract.end_date.toordinal() for contract in contracts], dtype=np.int64),
+    )
+    beat_plays = plays_per_agreement(
+        *daily_plays('beat', period_start, period_end),
+        np.array([collab.beat_id for collab in collaborations], dtype=np.int64),
+        np.array([timezone.localtime(collab.created_at).date().toordinal() for collab in collaborations], dtype=np.int64),
+        np.full(len(collaborations), OPEN_END, dtype=np.int64),
+    )
+
+    statements = _statements(contracts, track_plays, rate, lambda contract: [
+        (contract.artist_id, 'artist', contract.artist_royalty_percent),
+        (contract.manager_id, 'label', contract.label_royalty_percent),
+    ]) + _statements(collaborations, beat_plays, rate, lambda collab: [
+        (collab.producer_id, 'producer', collab.producer_share),
+        (collab.artist_id, 'artist', collab.artist_share),
+    ])
+
+    with transaction.atomic():
+        # Паралельний запуск того ж періоду впаде на unique_together версії
+        previous = RoyaltyRun.objects.filter(
+            period_start=period_start, period_end=period_end,
+        ).aggregate(version=Max('version'))['version'] or 0
+        run = RoyaltyRun.objects.create(
+            period_start=period_start,
+            period_end=period_end,
+            version=previous + 1,
+            rate_per_play=rate,
+            plays=int(track_plays.sum() + beat_plays.sum()),
+            gross=sum(
+                ((rate * count).quantize(CENT, rounding=ROUND_HALF_UP)
+                 for count in track_plays.tolist() + beat_plays.tolist()),
+                Decimal('0.00'),
+            ),
+        )
+        for statement in statements:
+            statement.run = run
+        RoyaltyStatement.objects.bulk_create(statements, batch_size=1000)
+    return run
@@ -0,0 +1,266 @@
+# music/search.py
+
+"""
+Повнотекстовий пошуковий індекс для альбомів, треків та артистів.
+
+Кожен об'єкт зберігається як SearchEntry (title + body). На SQLite таблиця
+дзеркалиться у віртуальну FTS5-таблицю тригерами, на PostgreSQL - у
+згенеровану колонку tsvector з GIN-індексом (див. міграцію 0005).
+
+Для запитів з помилками та в іншій абетці заголовок нормалізується
+(транслітерація кирилиці в латиницю) і розкладається на триграми, які
+зберігаються в інвертованому індексі SearchTrigram.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection, models
+
+from .models import Album, SearchEntry, SearchTrigram, Track, User
+
+FTS_TABLE = 'music_searchentry_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Поля, зміна яких впливає на пошукові документи
+ARTIST_FIELDS = {'username', 'stage_name', 'bio', 'role'}
+
+
+# Нечіткий пошук: мінімальна частка триграм запиту, знайдених у документі
+FUZZY_THRESHOLD = 0.5
+FUZZY_CANDIDATES = 5
+
+# Транслітерація за постановою КМУ №55 (2010) + російські літери
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e',
+    'є': 'ie', 'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i',
+    'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch',
+    'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu', 'я': 'ia',
+    'ё': 'e', 'ы': 'y', 'э': 'e', 'ъ': '',
+    "'": '', '’': '', 'ʼ': '', '`': '',
+})
+
+
+def tokenize(query):
+    """Розбиває запит на слова (без спецсимволів FTS)"""
+    return TOKEN_RE.findall(query.lower())
+
+
+def normalize(text):
+    """Нижній регістр, транслітерація кирилиці та видалення діакритики"""
+    text = (text or '').lower().translate(TRANSLIT)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(TOKEN_RE.findall(text))
+
+
+def trigrams(key):
+    """Множина триграм нормалізованого рядка (кожне слово доповнюється пробілами)"""
+    grams = set()
+    for word in key.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# ==================== ДОКУМЕНТИ ====================
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def album_document(album):
+    genre_name = album.genre.name if album.genre_id else ''
+    return album.title, _join(album.description, genre_name)
+
+
+def track_document(track):
+    album = track.album
+    artist = album.artist
+    return track.title, _join(album.title, artist.username, artist.stage_name)
+
+
+def artist_document(user):
+    return _join(user.username, user.stage_name), user.bio or ''
+
+
+def _entry(kind, obj, document):
+    title, body = document
+    fuzzy_key = normalize(title)[:600]
+    return SearchEntry(
+        kind=kind, object_id=obj.pk, title=title[:300], body=body,
+        fuzzy_key=fuzzy_key, gram_count=len(trigrams(fuzzy_key)),
+    )
+
+
+def _upsert(entries):
+    if not entries:
+        return
+    kind = entries[0].kind
+    object_ids = [entry.object_id for entry in entries]
+    old_keys = dict(
+        SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).values_list('object_id', 'fuzzy_key')
+    )
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body', 'fuzzy_key', 'gram_count', 'updated_at'],
+    )
+
+    # Триграми перераховуються лише для документів зі зміненим заголовком
+    changed = {entry.object_id: entry.fuzzy_key for entry in entries if old_keys.get(entry.object_id) != entry.fuzzy_key}
+    if changed:
+        entry_ids = dict(
+            SearchEntry.objects.filter(kind=kind, object_id__in=changed).values_list('object_id', 'id')
+        )
+        SearchTrigram.objects.filter(entry_id__in=entry_ids.values()).delete()
+        SearchTrigram.objects.bulk_create(
+            [
+                SearchTrigram(entry_id=entry_ids[object_id], gram=gram)
+                for object_id, key in changed.items()
+                for gram in trigrams(key)
+            ],
+            batch_size=1000,
+        )
+
+
+# ==================== ІНДЕКСАЦІЯ ====================
+def index_albums(albums):
+    """Індексує (або переіндексовує) набір альбомів"""
+    _upsert([_entry('album', album, album_document(album)) for album in albums])
+
+
+def index_tracks(tracks):
+    """Індексує (або переіндексовує) набір треків"""
+    _upsert([_entry('track', track, track_document(track)) for track in tracks])
+
+
+def index_artists(users):
+    """Індексує артистів; користувачі з іншими ролями видаляються з індексу"""
+    artists = [user for user in users if user.role == 'artist']
+    others = [user.pk for user in users if user.role != 'artist']
+    _upsert([_entry('artist', user, artist_document(user)) for user in artists])
+    if others:
+        remove('artist', others)
+
+
+def remove(kind, object_ids):
+    """Видаляє документи з індексу"""
+    SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def reindex_album_tracks(album_ids):
+    index_tracks(Track.objects.filter(album_id__in=album_ids).select_related('album__artist'))
+
+
+def reindex_artist_tracks(artist_id):
+    index_tracks(Track.objects.filter(album__artist_id=artist_id).select_related('album__artist'))
+
+
+def rebuild(batch_size=1000):
+    """Повністю перебудовує індекс. Повертає кількість документів"""
+    SearchEntry.objects.all().delete()
+    sources = (
+        (index_albums, Album.objects.select_related('genre').order_by('pk')),
+        (index_tracks, Track.objects.select_related('album__artist').order_by('pk')),
+        (index_artists, User.objects.filter(role='artist').order_by('pk')),
+    )
+    for index, queryset in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index(batch)
+                batch = []
+        index(batch)
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return SearchEntry.objects.count()
+
+
+# ==================== ПОШУК ====================
+def _sqlite_ids(tokens, kind, limit):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    sql = (
+        f"SELECT e.object_id FROM {FTS_TABLE} f "
+        f"JOIN music_searchentry e ON e.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s AND e.kind = %s "
+        f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, kind, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_ids(tokens, kind, limit):
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    sql = (
+        "SELECT object_id FROM music_searchentry "
+        "WHERE kind = %s AND search_vector @@ to_tsquery('simple', %s) "
+        "ORDER BY ts_rank(search_vector, to_tsquery('simple', %s)) DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [kind, tsquery, tsquery, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(tokens, kind, limit):
+    entries = SearchEntry.objects.filter(kind=kind)
+    for token in tokens:
+        entries = entries.filter(models.Q(title__icontains=token) | models.Q(body__icontains=token))
+    return list(entries.values_list('object_id', flat=True)[:limit])
+
+
+def fuzzy_search_ids(query, kind, limit, threshold=FUZZY_THRESHOLD):
+    """ID об'єктів, схожих на запит за триграмами (стійко до помилок і абетки)"""
+    query_grams = trigrams(normalize(query))
+    if not query_grams:
+        return []
+
+    # Кандидати - лише документи, що мають спільні триграми із запитом (індекс по gram)
+    candidates = (
+        SearchTrigram.objects.filter(gram__in=query_grams, entry__kind=kind)
+        .values('entry__object_id', 'entry__gram_count')
+        .annotate(shared=models.Count('id'))
+        .order_by('-shared')[:limit * FUZZY_CANDIDATES]
+    )
+    scored = []
+    for row in candidates:
+        shared = row['shared']
+        coverage = shared / len(query_grams)
+        if coverage >= threshold:
+            # При однаковому покритті вище ті, де менше зайвих триграм (Жаккар)
+            jaccard = shared / (len(query_grams) + row['entry__gram_count'] - shared)
+            scored.append((coverage, jaccard, row['entry__object_id']))
+    scored.sort(key=lambda item: (-item[0], -item[1]))
+    return [object_id for _, _, object_id in scored[:limit]]
+
+
+def search_ids(query, kind, limit):
+    """ID об'єктів заданого типу, відсортовані за релевантністю"""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if connection.vendor == 'sqlite':
+        return _sqlite_ids(tokens, kind, limit)
+    if connection.vendor == 'postgresql':
+        return _postgres_ids(tokens, kind, limit)
+    return _fallback_ids(tokens, kind, limit)
+
+
+def in_rank_order(queryset, ids):
+    """Завантажує об'єкти за списком ID, зберігаючи порядок релевантності"""
+    objects = {obj.pk: obj for obj in queryset.filter(pk__in=ids)}
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def search(queryset, query, kind, limit):
+    """Ранжований пошук: повнотекстові збіги, доповнені нечіткими"""
+    ids = search_ids(query, kind, limit)
+    if len(ids) < limit:
+        found = set(ids)
+        ids += [pk for pk in fuzzy_search_ids(query, kind, limit) if pk not in found][:limit - len(ids)]
+    return in_rank_order(queryset, ids)
@@ -0,0 +1,231 @@
+# music/signals.py
+
+"""Синхронізація пошукових індексів з моделями"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import analysis, autocomplete, favorites, fingerprints, search, waveforms
+from .models import Album, AudioAnalysis, Beat, Favorite, Genre, Playlist, Track, User, Waveform
+from .storage import referenced_flag
+
+
+# ==================== ПОШУКОВИЙ ІНДЕКС ====================
+@receiver(post_save, sender=Album)
+def index_album(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_albums([instance])
+    if not kwargs.get('created'):
+        search.reindex_album_tracks([instance.pk])
+
+
+@receiver(post_delete, sender=Album)
+def unindex_album(sender, instance, **kwargs):
+    search.remove('album', [instance.pk])
+
+
+@receiver(post_save, sender=Track)
+def index_track(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_tracks([instance])
+
+
+@receiver(post_delete, sender=Track)
+def unindex_track(sender, instance, **kwargs):
+    search.remove('track', [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def index_artist(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Вхід користувача зберігає лише last_login - індекс не змінюється
+    if raw or (update_fields and not search.ARTIST_FIELDS & set(update_fields)):
+        return
+    search.index_artists([instance])
+    if not kwargs.get('created'):
+        search.reindex_artist_tracks(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def unindex_artist(sender, instance, **kwargs):
+    search.remove('artist', [instance.pk])
+
+
+@receiver(post_save, sender=Genre)
+def reindex_genre_albums(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    search.index_albums(Album.objects.filter(genre=instance).select_related('genre'))
+
+
+# ==================== АВТОДОПОВНЕННЯ ====================
+# Індекс у пам'яті латається лише після коміту, щоб відкочені зміни не потрапили
+# в підказки; якщо індексу в процесі ще немає і він не будується, латка ігнорується
+def _patch(method, *args):
+    transaction.on_commit(lambda: method(*args))
+
+
+@receiver(post_save, sender=Album)
+def autocomplete_album(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _patch(autocomplete.index.put, 'albums', instance.pk, instance.title, instance.artist_id)
+
+
+@receiver(post_delete, sender=Album)
+def autocomplete_remove_album(sender, instance, **kwargs):
+    _patch(autocomplete.index.remove, 'albums', instance.pk)
+
+
+@receiver(post_save, sender=Track)
+def autocomplete_track(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _patch(autocomplete.index.put, 'tracks', instance.pk, instance.title, instance.album.artist_id)
+
+
+@receiver(post_delete, sender=Track)
+def autocomplete_remove_track(sender, instance, **kwargs):
+    _patch(autocomplete.index.remove, 'tracks', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def autocomplete_artist(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not search.ARTIST_FIELDS & set(update_fields)):
+        return
+    name = autocomplete.display_name(instance)
+    _patch(autocomplete.index.set_name, instance.pk, name)
+    if instance.role == 'artist':
+        _patch(autocomplete.index.put, 'artists', instance.pk, name)
+    else:
+        _patch(autocomplete.index.remove, 'artists', instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def autocomplete_remove_artist(sender, instance, **kwargs):
+    _patch(autocomplete.index.remove, 'artists', instance.pk)
+
+
+# ==================== АГРЕГАТИ ПЛЕЙЛИСТІВ ====================
+@receiver(m2m_changed, sender=Playlist.tracks.through)
+def refresh_playlist_aggregates(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # track.playlists.clear(): після очищення вже не знайти, які плейлисти зачеплено
+        instance._cleared_playlist_ids = list(instance.playlists.values_list('pk', flat=True))
+    elif action == 'post_add':
+        # pk_set - лише справді нові записи; ставимо їх у кінець, а не на position=0
+        if reverse:
+            for playlist in Playlist.objects.filter(pk__in=pk_set):
+                playlist.place_at_end([instance.pk])
+        else:
+            instance.place_at_end(pk_set)
+        Playlist.refresh_aggregates(pk_set if reverse else [instance.pk])
+    elif action == 'post_remove':
+        Playlist.refresh_aggregates(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        Playlist.refresh_aggregates(instance.__dict__.pop('_cleared_playlist_ids', []) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Track)
+def refresh_track_playlists(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or created or (update_fields and 'duration' not in update_fields):
+        return
+    Playlist.refresh_aggregates(Playlist.objects.filter(tracks=instance))
+
+
+@receiver(pre_delete, sender=Track)
+def remember_track_playlists(sender, instance, **kwargs):
+    instance._playlist_ids = list(instance.playlists.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Track)
+def refresh_deleted_track_playlists(sender, instance, **kwargs):
+    playlist_ids = getattr(instance, '_playlist_ids', None)
+    if playlist_ids:
+        Playlist.refresh_aggregates(playlist_ids)
+
+
+# ==================== КЕШ УЛЮБЛЕНИХ ====================
+# Закешований масив id латається на один елемент після коміту
+@receiver(post_save, sender=Favorite)
+def cache_favorite(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: favorites.forget(instance.user_id))
+
+
+@receiver(post_delete, sender=Favorite)
+def uncache_favorite(sender, instance, **kwargs):
+    transaction.on_commit(lambda: favorites.forget(instance.user_id))
+
+
+@receiver(pre_delete, sender=User)
+def forget_favorites(sender, instance, **kwargs):
+    favorites.forget(instance.pk)
+
+
+# ==================== ХВИЛІ ТА АНАЛІЗ АУДІО ====================
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Beat)
+def schedule_waveform(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and 'audio_file' not in update_fields):
+        return
+    kind = 'track' if sender is Track else 'beat'
+    # Розрахунок сам пропускає файл, для якого піки вже є
+    transaction.on_commit(lambda: waveforms.schedule(kind, instance.pk))
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Beat)
+def schedule_analysis(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and 'audio_file' not in update_fields) or not instance.audio_file:
+        return
+    kind = 'track' if sender is Track else 'beat'
+    transaction.on_commit(lambda: analysis.schedule(kind, instance.pk))
+
+
+@receiver(post_save, sender=Beat)
+def schedule_fingerprint(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and 'audio_file' not in update_fields) or not instance.audio_file:
+        return
+    transaction.on_commit(lambda: fingerprints.schedule(instance.pk))
+
+
+@receiver(post_delete, sender=Track)
+@receiver(post_delete, sender=Beat)
+def delete_audio_metadata(sender, instance, **kwargs):
+    kind = 'track' if sender is Track else 'beat'
+    Waveform.objects.filter(kind=kind, object_id=instance.pk).delete()
+    AudioAnalysis.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+# ==================== ПОСИЛАННЯ НА АУДІОФАЙЛИ ====================
+# Кожне збереження файлу в сховищі - це посилання; коли об'єкт отримує інший
+# файл або видаляється, старе посилання знімається після коміту
+def _release(field, name):
+    transaction.on_commit(lambda: field.storage.delete(name))
+
+
+@receiver(pre_save, sender=Track)
+@receiver(pre_save, sender=Beat)
+def remember_audio_file(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields and 'audio_file' not in update_fields):
+        return
+    instance._stored_audio_file = sender.objects.filter(pk=instance.pk).values_list('audio_file', flat=True).first()
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Beat)
+def release_replaced_audio_file(sender, instance, raw=False, **kwargs):
+    stored = instance.__dict__.pop('_stored_audio_file', None)
+    # Позначку ставить AudioFieldFile.save() (і з FileField.pre_save для нового завантаження),
+    # коли сховище взяло посилання - навіть на той самий вміст під тим самим ім'ям
+    referenced = instance.__dict__.pop(referenced_flag(instance.audio_file.field), False)
+    if stored and (referenced or stored != instance.audio_file.name):
+        _release(instance.audio_file, stored)
+
+
+@receiver(post_delete, sender=Track)
+@receiver(post_delete, sender=Beat)
+def release_deleted_audio_file(sender, instance, **kwargs):
+    if instance.audio_file:
+        _release(instance.audio_file, instance.audio_file.name)
@@ -0,0 +1,255 @@
+# music/storage.py
+
+"""
+Сховище аудіо з адресацією за вмістом.
+
+Файл зберігається один раз під своїм SHA-256: audio/ab/abcdef...wav
+(розширення лишається, щоб сервер і плеєр знали тип). Дайджест рахується
+потоково, поки файл читається: завантаження, що вже лежить на диску
+(TemporaryUploadedFile, заготовка докачування), лише хешується і
+переноситься перейменуванням, а однаковий вміст не пишеться зовсім.
+
+Кожне save() - це одне посилання (AudioBlob.refcount), кожне delete() -
+мінус одне; файл зникає разом з останнім посиланням. Старі файли з
+beats/ і tracks/ (до цього сховища) видаляються як звичайні. Лічильники
+та файли звіряються з полями моделей командою reconcile_audio_storage.
+
+Поле моделі (AudioFileField) позначає об'єкт, коли його save() узяв нове
+посилання: сигнали після коміту знімають попереднє, навіть якщо вміст
+той самий і ім'я не змінилось.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.fields.files import FieldFile
+
+BLOB_DIR = 'audio'
+INCOMING_DIR = f'{BLOB_DIR}/.incoming'
+HASH_BLOCK = 1024 * 1024
+# Файли та блоби без посилань, молодші за це (секунд), reconcile не чіпає
+GRACE_SECONDS = 3600
+
+
+def blob_name(digest, extension=''):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{extension.lower()}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/') and not name.startswith(f'{INCOMING_DIR}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, що зберігає кожен вміст один раз і рахує посилання на нього"""
+
+    def get_available_name(self, name, max_length=None):
+        # Ім'я визначається вмістом у _save, перебирати вільні імена не треба
+        return name
+
+    def _incoming(self):
+        directory = self.path(INCOMING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _digest_path(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(HASH_BLOCK), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _spool(self, content):
+        """Пише вміст у тимчасовий файл поруч зі сховищем, рахуючи дайджест. (digest, шлях)"""
+        digest = hashlib.sha256()
+        descriptor, path = tempfile.mkstemp(dir=self._incoming())
+        try:
+            with os.fdopen(descriptor, 'wb') as target:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    target.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return digest.hexdigest(), path
+
+    def _place(self, name, source, move):
+        """Кладе готовий файл на місце блоба (атомарно для читачів)"""
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if move:
+            file_move_safe(source, full_path, allow_overwrite=True)
+        else:
+            os.replace(source, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+    def _reference(self, name, digest, size):
+        """+1 посилання; True, якщо блоб уже був у сховищі"""
+        from .models import AudioBlob
+
+        if AudioBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+            return True
+        try:
+            with transaction.atomic():
+                AudioBlob.objects.create(name=name, sha256=digest, size=size, refcount=1)
+            return False
+        except IntegrityError:
+            # Той самий вміст одночасно зберіг інший запит
+            AudioBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+            return True
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1]
+        spooled = None
+        if hasattr(content, 'temporary_file_path'):
+            # Файл уже на диску: лише хешуємо, копіювати не потрібно
+            source = content.temporary_file_path()
+            digest = self._digest_path(source)
+        else:
+            digest, spooled = self._spool(content)
+            source = spooled
+
+        name = blob_name(digest, extension)
+        size = os.path.getsize(source)
+        try:
+            with transaction.atomic():
+                existed = self._reference(name, digest, size)
+                # Рядок блоба заблоковано до кінця транзакції: delete() не прибере файл посередині
+                if not existed or not self.exists(name):
+                    self._place(name, source, move=spooled is None)
+                    spooled = None
+        finally:
+            if spooled is not None:
+                os.remove(spooled)
+        return name
+
+    def delete(self, name):
+        """-1 посилання на блоб; файл видаляється разом з останнім"""
+        from .models import AudioBlob
+
+        if not is_blob(name):
+            return super().delete(name)
+        with transaction.atomic():
+            if AudioBlob.objects.filter(name=name, refcount__gt=1).update(refcount=F('refcount') - 1):
+                return
+            AudioBlob.objects.filter(name=name).delete()
+            super().delete(name)
+
+
+audio_storage = ContentAddressedStorage()
+
+
+def get_audio_storage():
+    return audio_storage
+
+
+def referenced_flag(field):
+    """Атрибут об'єкта: save() поля взяв нове посилання, яке ще не зберегла модель"""
+    return f'_{field.attname}_referenced'
+
+
+class AudioFieldFile(FieldFile):
+    """FieldFile, чиї save()/delete() узгоджені з лічильниками посилань сховища"""
+
+    def save(self, name, content, save=True):
+        super().save(name, content, save=False)
+        # Позначка ставиться до збереження моделі: її сигнали знімуть старе посилання
+        setattr(self.instance, referenced_flag(self.field), True)
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        # Лише від'єднує файл: посилання знімуть сигнали після коміту моделі,
+        # тож відкат або незбережена модель не лишать її без файлу
+        if not self:
+            return
+        if hasattr(self, '_file'):
+            self.close()
+            del self.file
+        self.name = None
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = False
+        if save:
+            self.instance.save()
+
+    delete.alters_data = True
+
+
+class AudioFileField(models.FileField):
+    attr_class = AudioFieldFile
+
+
+def _audio_models():
+    from .models import Beat, Track
+    return Track, Beat
+
+
+def migrate_legacy():
+    """Переносить файли, збережені до цього сховища, у блоби. Повертає кількість"""
+    moved = 0
+    for model in _audio_models():
+        rows = model.objects.exclude(audio_file='').exclude(audio_file__isnull=True).only('pk', 'audio_file')
+        for obj in rows.iterator(chunk_size=2000):
+            old_name = obj.audio_file.name
+            if is_blob(old_name) or not audio_storage.exists(old_name):
+                continue
+            with audio_storage.open(old_name, 'rb') as source:
+                name = audio_storage.save(old_name, source)
+            # update(), а не save(): вміст не змінився, сигнали перерахунку не потрібні
+            model.objects.filter(pk=obj.pk, audio_file=old_name).update(audio_file=name)
+            audio_storage.delete(old_name)
+            moved += 1
+    return moved
+
+
+def reconcile():
+    """Звіряє лічильники з полями моделей і прибирає файли без посилань. (виправлено, видалено)"""
+    from .models import AudioBlob
+
+    references = {}
+    for model in _audio_models():
+        for name in model.objects.exclude(audio_file='').values_list('audio_file', flat=True).iterator():
+            if is_blob(name):
+                references[name] = references.get(name, 0) + 1
+
+    # Щойно збережений файл може ще чекати на коміт об'єкта, що на нього посилається
+    stale_before = time.time() - GRACE_SECONDS
+    fixed = removed = 0
+    known = set()
+    for blob in AudioBlob.objects.iterator():
+        known.add(blob.name)
+        count = references.get(blob.name, 0)
+        if not count:
+            if blob.created_at.timestamp() < stale_before:
+                blob.delete()
+                FileSystemStorage.delete(audio_storage, blob.name)
+                removed += 1
+        elif blob.refcount != count:
+            AudioBlob.objects.filter(pk=blob.pk).update(refcount=count)
+            fixed += 1
+    for name, count in references.items():
+        if name not in known and audio_storage.exists(name):
+            digest = os.path.splitext(os.path.basename(name))[0]
+            AudioBlob.objects.create(name=name, sha256=digest, size=audio_storage.size(name), refcount=count)
+            fixed += 1
+
+    # Файли, що лишилися після відкочених транзакцій або перерваних записів
+    for directory, _, files in os.walk(audio_storage.path(BLOB_DIR)):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, audio_storage.location).replace('\\', '/')
+            if name in references or name in known or os.path.getmtime(path) >= stale_before:
+                continue
+            os.remove(path)
+            removed += 1
+    return fixed, removed
@@ -0,0 +1,147 @@
+# music/streaming.py
+
+"""
+Віддача аудіо з підтримкою Range.
+
+Відповідь 206 відкриває файл, переходить на потрібне зміщення і віддає
+рівно запитаний шматок, тож перемотування в плеєрі не перечитує файл з
+початку. Об'єкт файлу зберігає fileno(), тому WSGI-сервер з
+wsgi.file_wrapper (gunicorn) відправляє його через os.sendfile з поточного
+зміщення на Content-Length байт без копіювання в Python.
+
+Якщо задано AUDIO_ACCEL_REDIRECT, Django лише перевіряє доступ і рахує
+прослуховування, а сам файл (разом з Range) віддає nginx через
+X-Accel-Redirect - воркер не зайнятий на весь час прослуховування.
+"""
+
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import plays
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class _RangeFile:
+    """Файл, обмежений діапазоном: read() зупиняється на кінці діапазону, fileno() - для sendfile"""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self._file = file
+        self._remaining = length
+        self.name = file.name
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) включно для заголовка Range з одним діапазоном.
+
+    None - заголовка немає або він не підтримується (віддаємо весь файл),
+    ValueError - діапазон поза файлом (416).
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: останні N байт
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('unsatisfiable range')
+    return start, end
+
+
+def _validators(field):
+    """(ETag, Last-Modified timestamp або None) для файлу в сховищі"""
+    storage = field.storage
+    size = storage.size(field.name)
+    try:
+        modified = int(storage.get_modified_time(field.name).timestamp())
+    except NotImplementedError:
+        modified = None
+    return f'"{size:x}-{modified or 0:x}"', size, modified
+
+
+def _if_range_matches(request, etag, modified):
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return modified is not None and parse_http_date_safe(value) == modified
+
+
+def serve(request, field, kind, object_id):
+    """Відповідь 200/206/304/416 для FileField; нове прослуховування - лише GET з байта 0"""
+    etag, size, modified = _validators(field)
+    content_type = mimetypes.guess_type(field.name)[0] or 'application/octet-stream'
+
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is not None and not _if_range_matches(request, etag, modified):
+        byte_range = None
+
+    # Перемотування (Range не з початку) - це те саме прослуховування, а HEAD (перевірка
+    # посилань, prefetch) - зовсім не прослуховування: лічильники йдуть у роялті
+    if request.method == 'GET' and (byte_range is None or byte_range[0] == 0):
+        plays.record([(kind, object_id, request.user.pk)])
+
+    accel_prefix = getattr(settings, 'AUDIO_ACCEL_REDIRECT', None)
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + field.name
+    elif byte_range is None:
+        response = FileResponse(field.storage.open(field.name, 'rb'), content_type=content_type)
+        response.block_size = BLOCK_SIZE
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            _RangeFile(field.storage.open(field.name, 'rb'), start, length),
+            content_type=content_type,
+            status=206,
+        )
+        response.block_size = BLOCK_SIZE
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -0,0 +1,280 @@
+# music/synthetic.py
+
+"""
+Синтетичні дані для навантажувального тестування.
+
+generate() заповнює БД реалістичними обсягами: користувачі за ролями
+(переважно слухачі), альбоми й треки артистів, плейлисти, улюблені,
+контракти, біти і співпраці. Усе детерміновано зерном: той самий seed і ті
+самі розміри дають ту саму базу, тож заміри між релізами порівнювані.
+
+Популярність нерівномірна, як у житті: кілька артистів мають багато
+альбомів, а улюблені й плейлисти тяжіють до невеликої частини треків
+(індекс = n * random() ** SKEW). Дати розкидані на YEARS років назад.
+
+Рядки пишуться bulk_create пачками по batch_size, тож сигнали не
+спрацьовують (ні пошукового індексу, ні агрегатів плейлистів, ні фонового
+аналізу аудіо); після вставки це надолужується пакетно: search.rebuild(),
+Playlist.refresh_aggregates() і Contract.sweep_statuses().
+"""
+
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.db.models import DateTimeField
+from django.utils import timezone
+
+from . import search
+from .models import Album, Beat, Collaboration, Contract, Favorite, Genre, Playlist, PlaylistEntry, Track, User
+
+PASSWORD = 'synthetic'
+ROLE_SHARES = (('listener', 0.85), ('artist', 0.10), ('producer', 0.03), ('label_manager', 0.02))
+GENRES = ('Pop', 'Rock', 'Hip-Hop', 'Electronic', 'Jazz', 'Folk', 'R&B', 'Metal', 'Indie', 'Classical')
+WORDS = (
+    'ніч', 'місто', 'світло', 'дорога', 'море', 'вітер', 'серце', 'зима', 'літо', 'вогонь', 'небо',
+    'тиша', 'дощ', 'сон', 'зорі', 'ранок', 'tonight', 'golden', 'echo', 'neon', 'river', 'shadow',
+    'dream', 'electric', 'midnight', 'paper', 'silver', 'storm', 'wild', 'home', 'velvet', 'signal',
+)
+# Чим більше, тим сильніше улюблені й плейлисти тяжіють до перших (популярних) треків
+SKEW = 2.5
+YEARS = 3
+TRACKS_PER_ALBUM = (6, 14)
+PLAYLISTS_PER_LISTENER = (0, 3)
+PLAYLIST_SIZE = (5, 40)
+FAVORITES_MAX = 2000
+CONTRACTS_PER_MANAGER = 20
+BEATS_PER_PRODUCER = 15
+COLLABORATIONS_PER_PRODUCER = 5
+PRICES = (None,) + tuple(Decimal(price) for price in ('19.99', '29.99', '49.99', '99.99', '199.99', '499.99'))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _insert(model, objects, batch_size):
+    """bulk_create пачками з генератора; повертає масив id нових рядків"""
+    ids = array('q')
+    for batch in _chunks(objects, batch_size):
+        ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+    return ids
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Вимикає auto_now/auto_now_add, щоб bulk_create зберіг розкидані в минуле дати"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, DateTimeField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class _Generator:
+    def __init__(self, seed, prefix, batch_size):
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        self.span = timedelta(days=365 * YEARS).total_seconds()
+
+    def moment(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.span)
+
+    def day(self):
+        return self.moment().date()
+
+    def title(self, words=(1, 3)):
+        return ' '.join(self.rng.sample(WORDS, self.rng.randint(*words))).capitalize()
+
+    def popular(self, ids):
+        """Id з перекосом на початок списку"""
+        return ids[int(len(ids) * self.rng.random() ** SKEW)]
+
+    def users(self, total):
+        password = make_password(PASSWORD)
+        roles = []
+        for role, share in ROLE_SHARES:
+            roles += [role] * max(1, round(total * share))
+
+        def rows():
+            for number, role in enumerate(roles):
+                username = f'{self.prefix}{role}_{number}'
+                joined = self.moment()
+                yield User(
+                    username=username, email=f'{username}@example.com', password=password, role=role,
+                    stage_name=self.title((1, 2)) if role in ('artist', 'producer') else None,
+                    date_joined=joined, created_at=joined,
+                )
+
+        ids = _insert(User, rows(), self.batch_size)
+        by_role = {role: array('q') for role, _ in ROLE_SHARES}
+        for user_id, role in zip(ids, roles):
+            by_role[role].append(user_id)
+        return by_role
+
+    def catalog(self, artists, total_tracks):
+        """Альбоми й треки; повертає (id альбомів, id треків)"""
+        genres = [Genre.objects.get_or_create(name=name)[0].pk for name in GENRES]
+        sizes = []
+        while sum(sizes) < total_tracks:
+            sizes.append(self.rng.randint(*TRACKS_PER_ALBUM))
+        if sizes:
+            sizes[-1] -= sum(sizes) - total_tracks
+
+        def albums():
+            for _ in sizes:
+                created = self.moment()
+                yield Album(
+                    title=self.title(), artist_id=self.popular(artists), genre_id=self.rng.choice(genres),
+                    release_date=created.date(), created_at=created,
+                )
+
+        album_ids = _insert(Album, albums(), self.batch_size)
+
+        def tracks():
+            for album_id, size in zip(album_ids, sizes):
+                for number in range(1, size + 1):
+                    yield Track(
+                        album_id=album_id, title=self.title(), track_number=number,
+                        duration=timedelta(seconds=self.rng.randint(90, 360)),
+                        plays_count=int(self.rng.paretovariate(1.1) * 10), created_at=self.moment(),
+                    )
+
+        return album_ids, _insert(Track, tracks(), self.batch_size)
+
+    def playlists(self, listeners, track_ids):
+        owners = []
+        for listener in listeners:
+            owners += [listener] * self.rng.randint(*PLAYLISTS_PER_LISTENER)
+
+        def playlists():
+            for owner in owners:
+                created = self.moment()
+                yield Playlist(user_id=owner, name=self.title(), created_at=created, updated_at=created)
+
+        playlist_ids = _insert(Playlist, playlists(), self.batch_size)
+
+        def entries():
+            for playlist_id in playlist_ids:
+                chosen = {self.popular(track_ids) for _ in range(self.rng.randint(*PLAYLIST_SIZE))}
+                for index, track_id in enumerate(chosen, 1):
+                    yield PlaylistEntry(
+                        playlist_id=playlist_id, track_id=track_id,
+                        position=index * PlaylistEntry.POSITION_STEP, added_at=self.moment(),
+                    )
+
+        entry_count = len(_insert(PlaylistEntry, entries(), self.batch_size))
+        return playlist_ids, entry_count
+
+    def favorites(self, listeners, track_ids):
+        def rows():
+            for listener in listeners:
+                count = min(int(self.rng.paretovariate(1.2) * 3), FAVORITES_MAX, len(track_ids))
+                for track_id in {self.popular(track_ids) for _ in range(count)}:
+                    yield Favorite(user_id=listener, track_id=track_id, created_at=self.moment())
+
+        return len(_insert(Favorite, rows(), self.batch_size))
+
+    def contracts(self, managers, artists):
+        def rows():
+            for manager in managers:
+                for artist in self.rng.sample(artists, min(CONTRACTS_PER_MANAGER, len(artists))):
+                    start = self.day()
+                    months = self.rng.choice((6, 12, 24, 36))
+                    artist_percent = self.rng.choice((40, 50, 60, 70))
+                    created = self.moment()
+                    yield Contract(
+                        manager_id=manager, artist_id=artist,
+                        contract_type=self.rng.choice(Contract.CONTRACT_TYPES)[0],
+                        status=self.rng.choice(('active', 'active', 'active', 'pending')),
+                        artist_royalty_percent=artist_percent, label_royalty_percent=100 - artist_percent,
+                        duration_months=months, start_date=start, end_date=start + relativedelta(months=months),
+                        created_at=created, updated_at=created,
+                    )
+
+        count = len(_insert(Contract, rows(), self.batch_size))
+        # Статуси за датами - тим самим UPDATE, що й щоденний прохід
+        Contract.sweep_statuses()
+        return count
+
+    def beats(self, producers):
+        owners = [producer for producer in producers for _ in range(BEATS_PER_PRODUCER)]
+
+        def rows():
+            for producer in owners:
+                created = self.moment()
+                yield Beat(
+                    producer_id=producer, title=self.title(), genre=self.rng.choice(Beat.GENRE_CHOICES)[0],
+                    bpm=self.rng.randint(60, 180),
+                    price=self.rng.choice(PRICES),
+                    plays_count=int(self.rng.paretovariate(1.1) * 5),
+                    is_available=self.rng.random() < 0.85, is_exclusive=self.rng.random() < 0.1,
+                    created_at=created, updated_at=created,
+                )
+
+        by_producer = {}
+        for producer, beat_id in zip(owners, _insert(Beat, rows(), self.batch_size)):
+            by_producer.setdefault(producer, []).append(beat_id)
+        return by_producer
+
+    def collaborations(self, beats_by_producer, artists):
+        def rows():
+            for producer, beats in beats_by_producer.items():
+                for _ in range(COLLABORATIONS_PER_PRODUCER):
+                    producer_share = self.rng.choice((30, 40, 50))
+                    created = self.moment()
+                    yield Collaboration(
+                        producer_id=producer, artist_id=self.popular(artists),
+                        beat_id=self.rng.choice(beats), project_name=self.title(),
+                        status=self.rng.choice(Collaboration.STATUS_CHOICES)[0],
+                        producer_share=producer_share, artist_share=100 - producer_share,
+                        deadline=(created + timedelta(days=self.rng.randint(14, 120))).date(),
+                        created_at=created, updated_at=created,
+                    )
+
+        return len(_insert(Collaboration, rows(), self.batch_size))
+
+
+def generate(users=1000, tracks=10000, seed=0, prefix='synth_', batch_size=5000, index=True):
+    """Заповнює БД синтетичними даними. Повертає {назва: кількість створених рядків}"""
+    if User.objects.filter(username__startswith=prefix).exists():
+        raise ValueError(f'Користувачі з префіксом "{prefix}" вже існують')
+
+    generator = _Generator(seed, prefix, batch_size)
+    with _explicit_timestamps(User, Album, Track, Playlist, PlaylistEntry, Favorite, Contract, Beat, Collaboration):
+        by_role = generator.users(users)
+        album_ids, track_ids = generator.catalog(by_role['artist'], tracks)
+        playlist_ids, entries = generator.playlists(by_role['listener'], track_ids)
+        favorites = generator.favorites(by_role['listener'], track_ids)
+        contracts = generator.contracts(by_role['label_manager'], by_role['artist'])
+        beats = generator.beats(by_role['producer'])
+        collaborations = generator.collaborations(beats, by_role['artist'])
+
+    # bulk_create оминає сигнали: агрегати та пошуковий індекс - пакетно
+    for batch in _chunks(playlist_ids, batch_size):
+        Playlist.refresh_aggregates(batch)
+    if index:
+        search.rebuild(batch_size=batch_size)
+
+    counts = {role: len(ids) for role, ids in by_role.items()}
+    counts.update({
+        'albums': len(album_ids), 'tracks': len(track_ids), 'playlists': len(playlist_ids),
+        'playlist_entries': entries, 'favorites': favorites, 'contracts': contracts,
+        'beats': sum(len(ids) for ids in beats.values()), 'collaborations': collaborations,
+    })
+    return counts
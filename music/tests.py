@@ -1,3 +1,631 @@
-from django.test import TestCase
+# music/tests.py
 
-# Create your tests here.
+import hashlib
+import importlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import wave
+from collections import Counter
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    analysis, audio, autocomplete, benchmark, favorites, fingerprints, plays, replicas, rollups, royalties, search,
+    streaming, synthetic, uploads, waveforms,
+)
+from .models import Album, AudioBlob, Beat, Favorite, PlayEvent, Playlist, PlaylistEntry, SearchEntry, Track, User
+from .storage import audio_storage
+
+
+@override_settings(DATABASE_REPLICAS=[])
+class SearchTest(TransactionTestCase):
+    """music_search знаходить реальні рядки: повнотекстово, нечітко і після міграції 0022"""
+
+    def setUp(self):
+        artist = User.objects.create_user('search_artist', password='search', role='artist', stage_name='Drilla')
+        album = Album.objects.create(artist=artist, title='Dawn', release_date=date.today())
+        self.track = Track.objects.create(
+            album=album, title='Intro: Dawn of Drilla', track_number=1, duration=timedelta(seconds=180),
+        )
+        self.client.force_login(User.objects.create_user('search_listener', password='search', role='listener'))
+
+    def _found_tracks(self, query):
+        response = self.client.get(reverse('music:music_search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.context['results']['tracks']
+
+    def test_full_text(self):
+        self.assertEqual(self._found_tracks('dawn drilla'), [self.track])
+
+    def test_fuzzy(self):
+        self.assertEqual(self._found_tracks('drila intor'), [self.track])
+
+    def test_migration_fills_existing_rows(self):
+        # Рядки, що існували до індексу: сигнали їх ніколи не індексували
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self._found_tracks('dawn'), [])
+        migration = importlib.import_module('music.migrations.0022_rebuild_search_index')
+        migration.rebuild_search_index(None, SimpleNamespace(connection=connection))
+        self.assertEqual(self._found_tracks('dawn'), [self.track])
+        self.assertEqual(search.search(Track.objects.all(), 'Intro: Dawn of Drilla', 'track', 5), [self.track])
+
+
+@override_settings(QUERY_INSTRUMENTATION=True, QUERY_BUDGET_STRICT=True, DATABASE_REPLICAS=[])
+class QueryBudgetTest(TransactionTestCase):
+    """Сторінки з QUERY_BUDGETS вкладаються в бюджет і без N+1 на синтетичних даних"""
+
+    def test_budgeted_views(self):
+        synthetic.generate(users=200, tracks=2000, seed=1, batch_size=1000)
+        names = [view_name.split(':')[-1] for view_name in settings.QUERY_BUDGETS]
+        checked = []
+        for name, _, client, url, params, skipped in benchmark.routes(names):
+            self.assertIsNone(skipped, name)
+            # QueryBudgetExceeded має дійти до тесту, а не стати відповіддю 500
+            client.raise_request_exception = True
+            # Перший запит прогріває кеші процесу, бюджет - для сталого стану
+            benchmark.fetch(client, url, params)
+            with self.subTest(view=name):
+                self.assertEqual(benchmark.fetch(client, url, params).status_code, 200)
+            checked.append(name)
+        self.assertCountEqual(checked, names)
+
+
+class SQLiteProductionProfileTest(TransactionTestCase):
+    """PRAGMA з settings.DATABASES застосовуються до кожного нового з'єднання"""
+
+    def test_pragmas(self):
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertGreater(cursor.fetchone()[0], 0)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class SQLiteConcurrencySoakTest(TransactionTestCase):
+    """WRITERS потоків одночасно пишуть улюблені, плейлисти і прослуховування без "database is locked\""""
+
+    WRITERS = 8
+    ITERATIONS = 60
+    TRACKS = 20
+
+    def setUp(self):
+        artist = User.objects.create_user('soak_artist', password='soak', role='artist')
+        album = Album.objects.create(artist=artist, title='Soak', release_date=date.today())
+        # bulk_create: без сигналів, тож без фонових задач аналізу аудіо
+        self.tracks = Track.objects.bulk_create([
+            Track(album=album, title=f'Soak {number}', track_number=number, duration=timedelta(seconds=180))
+            for number in range(1, self.TRACKS + 1)
+        ])
+        self.listeners = User.objects.bulk_create([
+            User(username=f'soak_listener_{index}', role='listener') for index in range(self.WRITERS)
+        ])
+        self.playlists = Playlist.objects.bulk_create([
+            Playlist(user=listener, name='Soak') for listener in self.listeners
+        ])
+
+    def _track(self, index, iteration):
+        return self.tracks[(index + iteration) % self.TRACKS].pk
+
+    def _write(self, index, barrier, errors):
+        listener, playlist = self.listeners[index], self.playlists[index]
+        try:
+            barrier.wait()
+            for iteration in range(self.ITERATIONS):
+                track_id = self._track(index, iteration)
+                favorites.toggle(listener.pk, track_id)
+                # append_tracks спершу читає, потім пише: саме такі транзакції без
+                # BEGIN IMMEDIATE падають, щойно паралельно пише інший потік
+                playlist.append_tracks([track_id])
+                if iteration % 3 == 0:
+                    playlist.remove_track(track_id)
+                plays.write_events([('track', track_id, listener.pk, timezone.now())])
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_concurrent_writers(self):
+        barrier = threading.Barrier(self.WRITERS)
+        errors = []
+        threads = [
+            threading.Thread(target=self._write, args=(index, barrier, errors))
+            for index in range(self.WRITERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        writes = self.WRITERS * self.ITERATIONS
+        self.assertEqual(PlayEvent.objects.count(), writes)
+        self.assertEqual(sum(Track.objects.values_list('plays_count', flat=True)), writes)
+        for index, listener in enumerate(self.listeners):
+            # Непарна кількість перемикань - трек в улюблених
+            toggles = Counter(self._track(index, iteration) for iteration in range(self.ITERATIONS))
+            expected = {track_id for track_id, count in toggles.items() if count % 2}
+            self.assertEqual(set(Favorite.objects.filter(user=listener).values_list('track_id', flat=True)), expected)
+        for playlist in Playlist.objects.all():
+            self.assertEqual(playlist.track_count, playlist.entries.count())
+
+
+class PlayBufferTest(TransactionTestCase):
+    """Погана подія не блокує буфер і не доходить до клієнта як 500"""
+
+    def setUp(self):
+        artist = User.objects.create_user('play_artist', password='play', role='artist')
+        album = Album.objects.create(artist=artist, title='Plays', release_date=date.today())
+        self.track = Track.objects.bulk_create([
+            Track(album=album, title='Play', track_number=1, duration=timedelta(seconds=180)),
+        ])[0]
+        self.listener = User.objects.create_user('play_listener', password='play', role='listener')
+
+    def test_out_of_range_id_rejected(self):
+        self.client.force_login(self.listener)
+        response = self.client.post(
+            reverse('music:record_plays'), {'events': [{'track': 10 ** 30}]}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleted_user_event_dropped(self):
+        gone = User.objects.create_user('play_gone', password='play', role='listener')
+        gone_id = gone.pk
+        gone.delete()
+        now = timezone.now()
+        written = plays.write_events([
+            ('track', self.track.pk, gone_id, now),
+            ('track', self.track.pk, self.listener.pk, now),
+        ])
+        self.assertEqual(written, 1)
+
+    def test_failed_batch_is_dropped_after_retries(self):
+        buffer = plays.PlayBuffer()
+        buffer._events = [('track', 10 ** 30, self.listener.pk, timezone.now())]
+        with self.assertLogs('music.plays', 'WARNING'):
+            for _ in range(plays.FLUSH_ATTEMPTS):
+                self.assertEqual(buffer.flush(), 0)
+        buffer._events = [('track', self.track.pk, self.listener.pk, timezone.now())]
+        self.assertEqual(buffer.flush(), 1)
+
+
+class RollupTest(TransactionTestCase):
+    """Агрегати враховують кожну подію рівно один раз, навіть якщо вона закомічена пізно"""
+
+    def setUp(self):
+        artist = User.objects.create_user('rollup_artist', password='rollup', role='artist')
+        album = Album.objects.create(artist=artist, title='Rollups', release_date=date.today())
+        self.track = Track.objects.bulk_create([
+            Track(album=album, title='Rollup', track_number=1, duration=timedelta(seconds=180)),
+        ])[0]
+        self.played_at = timezone.now()
+
+    def _events(self, *pks):
+        PlayEvent.objects.bulk_create([PlayEvent(pk=pk, track=self.track, played_at=self.played_at) for pk in pks])
+
+    def _total(self):
+        return rollups.total_plays('track', [self.track.pk])
+
+    def test_late_commit_with_lower_id_is_counted(self):
+        self._events(100, 101)
+        # Трек, альбом і артист для кожної гранулярності
+        self.assertEqual(rollups.run(), (2, 3 * len(rollups.GRANULARITIES)))
+        # Транзакція з id 50 закомітилась уже після обробки 100 і 101
+        self._events(50)
+        self.assertEqual(rollups.run()[0], 1)
+        self.assertEqual(self._total(), 3)
+        self.assertEqual(rollups.run(), (0, 0))
+        self.assertEqual(self._total(), 3)
+
+    def test_batches_do_not_overlap(self):
+        self._events(*range(1, 8))
+        self.assertEqual(rollups.run_batch(batch_size=3)[0], 3)
+        self.assertEqual(rollups.run(batch_size=3)[0], 4)
+        self.assertEqual(self._total(), 7)
+        self.assertFalse(PlayEvent.objects.filter(rollup_batch__isnull=True).exists())
+
+
+class AudioReadErrorTest(SimpleTestCase):
+    """Обрізаний або зниклий файл - None, а не виняток, що зупинить весь analyze_audio"""
+
+    def test_truncated_and_missing_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'truncated.wav')
+            with wave.open(path, 'wb') as output:
+                output.setnchannels(2)
+                output.setsampwidth(2)
+                output.setframerate(8000)
+                output.writeframes(bytes(4 * 8000))
+            with open(path, 'r+b') as output:
+                # Неповний стерео-кадр у кінці
+                output.truncate(os.path.getsize(path) - 3)
+            self.assertIsNone(audio.analyze_file(path))
+            self.assertIsNone(audio.fingerprint_file(path))
+            self.assertIsNone(audio.analyze_file(os.path.join(directory, 'missing.wav')))
+
+
+class RoyaltyAssignTest(SimpleTestCase):
+    """День після кінця короткої угоди всередині довгої належить довгій"""
+
+    def test_overlapping_agreements(self):
+        assigned = royalties.assign(
+            np.array([1, 1, 1, 2]), np.array([100, 70, 400, 100]),
+            np.array([1, 1]), np.array([0, 59]), np.array([364, 89]),
+        )
+        self.assertEqual(assigned.tolist(), [0, 1, -1, -1])
+
+
+def isolate_audio(test):
+    """Тимчасовий MEDIA_ROOT і без фонових задач аналізу, хвиль та відбитків"""
+    media = tempfile.TemporaryDirectory()
+    test.addCleanup(media.cleanup)
+    settings_override = override_settings(MEDIA_ROOT=media.name)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    for module in (analysis, fingerprints, waveforms):
+        patcher = mock.patch.object(module, 'schedule')
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class AudioReferenceTest(TransactionTestCase):
+    """AudioBlob.refcount дорівнює кількості об'єктів, що посилаються на файл"""
+
+    def setUp(self):
+        isolate_audio(self)
+        self.producer = User.objects.create_user('blob_producer', password='blob', role='producer')
+
+    def _beat(self, content):
+        beat = Beat(producer=self.producer, title='Blob', genre='trap', bpm=120)
+        beat.audio_file.save('beat.wav', ContentFile(content))
+        return beat
+
+    def _refcount(self, name):
+        return AudioBlob.objects.filter(name=name).values_list('refcount', flat=True).first()
+
+    def test_same_content_reupload(self):
+        first, second = self._beat(b'same'), self._beat(b'same')
+        name = first.audio_file.name
+        self.assertEqual(second.audio_file.name, name)
+        self.assertEqual(self._refcount(name), 2)
+        first.audio_file.save('z.wav', ContentFile(b'same'))
+        self.assertEqual(self._refcount(name), 2)
+        first.delete()
+        second.delete()
+        self.assertIsNone(self._refcount(name))
+        self.assertFalse(audio_storage.exists(name))
+
+    def test_replacement(self):
+        beat = self._beat(b'old')
+        old_name = beat.audio_file.name
+        beat.audio_file.save('new.wav', ContentFile(b'new'))
+        self.assertIsNone(self._refcount(old_name))
+        self.assertFalse(audio_storage.exists(old_name))
+        self.assertEqual(self._refcount(beat.audio_file.name), 1)
+
+    def test_field_file_delete(self):
+        beat = self._beat(b'gone')
+        name = beat.audio_file.name
+        beat.audio_file.delete()
+        self.assertIsNone(self._refcount(name))
+        self.assertFalse(audio_storage.exists(name))
+        self.assertFalse(Beat.objects.get(pk=beat.pk).audio_file)
+
+    def test_rollback(self):
+        beat = self._beat(b'kept')
+        name = beat.audio_file.name
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            beat.audio_file.save('other.wav', ContentFile(b'other'))
+            raise RuntimeError
+        self.assertEqual(self._refcount(name), 1)
+        self.assertTrue(audio_storage.exists(name))
+        self.assertEqual(AudioBlob.objects.count(), 1)
+
+
+class AnalysisPoolTest(SimpleTestCase):
+    """Закритий спільний пул замінюється новим, а не валить on_commit запиту"""
+
+    def test_submit_replaces_closed_pool(self):
+        closed = analysis.make_pool(1)
+        closed.shutdown()
+        analysis._pool = closed
+        self.addCleanup(lambda: analysis.discard_pool(analysis._pool))
+        with self.assertLogs('music.analysis', 'WARNING'):
+            future = analysis.submit(max, 1, 2)
+        self.assertEqual(future.result(timeout=60), 2)
+        self.assertIsNot(analysis._pool, closed)
+
+
+class AutocompleteIndexTest(SimpleTestCase):
+    """Індекс будується у фоні, а латки під час перебудови не губляться"""
+
+    def test_patch_during_build_is_replayed(self):
+        index = autocomplete.PrefixIndex()
+        index.start_build()
+        # Трек закомічено після того, як знімок уже прочитано з БД
+        index.put('tracks', 1, 'Late Track', 7)
+        index.set_name(7, 'Late Artist')
+        index.build([], [], [], {})
+        self.assertEqual(index.lookup('late')['tracks'], [{'id': 1, 'label': 'Late Track', 'artist': 'Late Artist'}])
+
+    def test_removal_during_build_wins_over_snapshot(self):
+        index = autocomplete.PrefixIndex()
+        index.start_build()
+        index.remove('tracks', 1)
+        index.build([], [], [(1, 'Gone Track', None)], {})
+        self.assertEqual(index.lookup('gone')['tracks'], [])
+
+    def test_patch_without_index_is_ignored(self):
+        index = autocomplete.PrefixIndex()
+        index.put('tracks', 1, 'Early Track')
+        index.build([], [], [], {})
+        self.assertEqual(index.lookup('early')['tracks'], [])
+
+    def test_get_index_does_not_wait_for_build(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_build():
+            started.set()
+            release.wait(60)
+
+        with mock.patch.object(autocomplete, 'index', autocomplete.PrefixIndex()), \
+                mock.patch.object(autocomplete, '_refreshing', threading.Event()), \
+                mock.patch.object(autocomplete, 'build', slow_build):
+            try:
+                self.assertFalse(autocomplete.get_index().ready)
+                self.assertTrue(started.wait(60))
+                self.assertEqual(autocomplete.get_index().lookup('any')['tracks'], [])
+            finally:
+                release.set()
+
+
+class ParseRangeTest(SimpleTestCase):
+    """Range: звичайні, відкриті та суфіксні діапазони, 416 для неможливих"""
+
+    def test_ranges(self):
+        self.assertIsNone(streaming.parse_range(None, 100))
+        self.assertIsNone(streaming.parse_range('bytes=0-1,5-6', 100))
+        self.assertEqual(streaming.parse_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(streaming.parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(streaming.parse_range('bytes=90-500', 100), (90, 99))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(streaming.parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(streaming.parse_range('bytes=-500', 100), (0, 99))
+        with self.assertRaises(ValueError):
+            streaming.parse_range('bytes=-0', 100)
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=100-', 'bytes=20-10'):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                streaming.parse_range(header, 100)
+
+
+class StreamTest(TransactionTestCase):
+    """Відповіді stream_beat і облік прослуховувань: лише GET з початку файлу"""
+
+    def setUp(self):
+        isolate_audio(self)
+        producer = User.objects.create_user('stream_producer', password='stream', role='producer')
+        self.beat = Beat(producer=producer, title='Stream', genre='trap', bpm=120)
+        self.beat.audio_file.save('stream.wav', ContentFile(bytes(range(100))))
+        self.url = reverse('music:stream_beat', kwargs={'pk': self.beat.pk})
+        self.client.force_login(producer)
+        patcher = mock.patch.object(plays, 'record')
+        self.record = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_head_is_not_a_play(self):
+        self.assertEqual(self.client.head(self.url).status_code, 200)
+        self.record.assert_not_called()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.record.assert_called_once_with([('beat', self.beat.pk, self.beat.producer_id)])
+
+    def test_range_and_416(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(90, 100)))
+        # Перемотування - не нове прослуховування
+        self.record.assert_not_called()
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_if_range(self):
+        etag = self.client.head(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response.close()
+        # Файл змінився (інший ETag) - діапазон ігнорується, віддається весь файл
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content)), 100)
+
+
+class ChunkUploadTest(TransactionTestCase):
+    """Обірваний повтор отриманої частини не псує вже записані байти"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        producer = User.objects.create_user('upload_producer', password='upload', role='producer')
+        beat = Beat.objects.bulk_create([Beat(producer=producer, title='Upload', genre='hiphop', bpm=90)])[0]
+        with override_settings(MEDIA_ROOT=self.media.name, BEAT_UPLOAD_CHUNK_SIZE=4):
+            self.upload = uploads.start(beat, producer, 'beat.wav', 8)
+
+    def _write(self, index, data, checksum=None):
+        checksum = checksum or hashlib.sha256(data).hexdigest()
+        uploads.write_chunk(self.upload, index, io.BytesIO(data), checksum)
+
+    def test_truncated_resend_keeps_chunk(self):
+        with override_settings(MEDIA_ROOT=self.media.name):
+            self._write(0, b'good')
+            with self.assertRaises(uploads.UploadError):
+                self._write(0, b'ba', hashlib.sha256(b'bad!').hexdigest())
+            self.assertEqual(uploads.missing_chunks(self.upload), [1])
+            with open(uploads.part_path(self.upload), 'rb') as part:
+                self.assertEqual(part.read(4), b'good')
+
+
+class PlaylistOrderTest(TransactionTestCase):
+    """Нові треки - у кінці, перестановка змінює один рядок, вичерпаний проміжок перенумеровується"""
+
+    def setUp(self):
+        artist = User.objects.create_user('order_artist', password='order', role='artist')
+        album = Album.objects.create(artist=artist, title='Order', release_date=date.today())
+        self.tracks = Track.objects.bulk_create([
+            Track(album=album, title=f'Order {number}', track_number=number, duration=timedelta(seconds=60))
+            for number in range(1, 5)
+        ])
+        listener = User.objects.create_user('order_listener', password='order', role='listener')
+        self.playlist = Playlist.objects.create(user=listener, name='Order')
+
+    def _order(self):
+        return list(self.playlist.entries.order_by('position').values_list('track_id', flat=True))
+
+    def test_tracks_add_appends(self):
+        first, second, third, fourth = (track.pk for track in self.tracks)
+        self.playlist.append_tracks([first, second])
+        self.playlist.tracks.add(third)
+        self.tracks[3].playlists.add(self.playlist)
+        self.assertEqual(self._order(), [first, second, third, fourth])
+        self.playlist.refresh_from_db()
+        self.assertEqual(self.playlist.track_count, 4)
+
+    def test_move_track_takes_midpoint(self):
+        first, second, third, _ = (track.pk for track in self.tracks)
+        self.playlist.append_tracks([first, second, third])
+        step = PlaylistEntry.POSITION_STEP
+        entry = self.playlist.move_track(third, after_track_id=first)
+        self.assertEqual(entry.position, step + step // 2)
+        self.assertEqual(self._order(), [first, third, second])
+        self.assertEqual(self.playlist.move_track(second).position, 0)
+        self.assertEqual(self._order(), [second, first, third])
+
+    def test_exhausted_gap_renumbers(self):
+        first, second, third, _ = (track.pk for track in self.tracks)
+        self.playlist.append_tracks([first, second, third])
+        self.playlist.entries.filter(track_id=second).update(position=PlaylistEntry.POSITION_STEP + 1)
+        self.playlist.move_track(third, after_track_id=first)
+        self.assertEqual(self._order(), [first, third, second])
+        step = PlaylistEntry.POSITION_STEP
+        positions = list(self.playlist.entries.order_by('position').values_list('position', flat=True))
+        self.assertEqual(positions, [step, step + step // 2, 2 * step])
+
+
+class FavoritesCacheTest(TransactionTestCase):
+    """Зміна улюблених скидає закешований масив замість латання на місці"""
+
+    def test_toggle_invalidates_cache(self):
+        artist = User.objects.create_user('fav_artist', password='fav', role='artist')
+        album = Album.objects.create(artist=artist, title='Fav', release_date=date.today())
+        tracks = Track.objects.bulk_create([
+            Track(album=album, title=f'Fav {number}', track_number=number, duration=timedelta(seconds=180))
+            for number in (1, 2)
+        ])
+        listener = User.objects.create_user('fav_listener', password='fav', role='listener')
+        self.assertEqual(len(favorites.track_ids(listener)), 0)
+        favorites.toggle(listener.pk, tracks[0].pk)
+        Favorite.objects.create(user=listener, track=tracks[1])
+        self.assertEqual(list(favorites.track_ids(listener)), [track.pk for track in tracks])
+        self.assertEqual(favorites._timeout(), settings.FAVORITES_LOCAL_CACHE_TIMEOUT)
+
+    def test_late_stale_load_is_not_served(self):
+        artist = User.objects.create_user('stale_artist', password='fav', role='artist')
+        album = Album.objects.create(artist=artist, title='Stale', release_date=date.today())
+        track = Track.objects.bulk_create([
+            Track(album=album, title='Stale', track_number=1, duration=timedelta(seconds=180)),
+        ])[0]
+        listener = User.objects.create_user('stale_listener', password='fav', role='listener')
+        # Читання почалося до коміту toggle (бачило порожній список), а в кеш поклало його після
+        generation = favorites._generation(listener.pk)
+        favorites.toggle(listener.pk, track.pk)
+        cache.set(favorites.KEY.format(listener.pk, generation), b'', favorites._timeout())
+        self.assertIn(track.pk, favorites.track_ids(listener))
+
+
+class ManagerExportTest(TransactionTestCase):
+    """Некоректний ?run= - 400 або 404, а не 500"""
+
+    def test_invalid_run(self):
+        manager = User.objects.create_user('export_manager', password='export', role='label_manager')
+        self.client.force_login(manager)
+        url = reverse('music:manager_export', kwargs={'kind': 'statements'})
+        self.assertEqual(self.client.get(url, {'run': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'run': '²'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'run': '9' * 30}).status_code, 404)
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=None)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Читання REPLICA_VIEWS - з репліки, після POST сесія читає з default"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.listener = User.objects.create_user('replica_listener', password='replica', role='listener')
+        self.client.force_login(self.listener)
+
+    def test_read_only_view_uses_replica(self):
+        response = self.client.get(reverse('music:music_search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.read_database, 'replica')
+
+    def test_other_views_use_default(self):
+        response = self.client.get(reverse('music:playlist_list'))
+        self.assertEqual(response.wsgi_request.read_database, 'default')
+
+    def test_read_your_writes_after_post(self):
+        self.client.post(reverse('music:playlist_create'), {'name': 'Нова'})
+        response = self.client.get(reverse('music:music_search'))
+        self.assertEqual(response.wsgi_request.read_database, 'default')
+
+    def test_read_your_writes_after_get_write(self):
+        self.client.get(reverse('music:playlist_list'))
+        self.assertNotIn(replicas.STICKY_SESSION_KEY, self.client.session)
+        self.client.get(reverse('music:toggle_favorite', kwargs={'track_pk': 1}))
+        response = self.client.get(reverse('music:music_search'))
+        self.assertEqual(response.wsgi_request.read_database, 'default')
+
+    def test_play_beacon_is_not_sticky(self):
+        self.client.post(reverse('music:record_plays'), {'events': []}, content_type='application/json')
+        response = self.client.get(reverse('music:music_search'))
+        self.assertEqual(response.wsgi_request.read_database, 'replica')
+
+    def test_stale_replica_is_skipped(self):
+        with override_settings(REPLICA_MAX_LAG_SECONDS=-1):
+            response = self.client.get(reverse('music:music_search'))
+        self.assertEqual(response.wsgi_request.read_database, 'default')
+
+    def test_backup_copies_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'source.sqlite3')
+            target_path = os.path.join(directory, 'target.sqlite3')
+            with sqlite3.connect(source_path) as source:
+                source.execute('PRAGMA journal_mode=WAL')
+                source.execute('CREATE TABLE plays (id INTEGER PRIMARY KEY)')
+                source.executemany('INSERT INTO plays VALUES (?)', [(number,) for number in range(100)])
+            replicas.backup(source_path, target_path, pages=1)
+            target = sqlite3.connect(target_path)
+            try:
+                self.assertEqual(target.execute('SELECT COUNT(*) FROM plays').fetchone()[0], 100)
+            finally:
+                target.close()
@@ -0,0 +1,188 @@
+# music/uploads.py
+
+"""
+Докачуване завантаження аудіо бітів частинами.
+
+Клієнт створює сесію (ім'я, розмір, необов'язково SHA-256 файлу) і
+надсилає частини окремими PUT з SHA-256 кожної в заголовку. Кожна частина
+читається з тіла запиту шматками по STREAM_BLOCK у тимчасовий файл (у
+пам'яті ніколи не буває навіть цілої частини) і лише після перевірки
+довжини та контрольної суми копіюється у файл-заготовку на своє зміщення:
+обірваний повтор вже отриманої частини не псує записані байти. Після
+обриву зв'язку клієнт питає, яких частин бракує, і досилає тільки їх.
+
+Після останньої частини файл-заготовка переноситься в сховище аудіо
+(music/storage.py): воно хешує її і переносить перейменуванням без
+копіювання, а якщо такий вміст уже є - не пише нічого. Попередній файл
+біту звільняють сигнали після коміту.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BeatUpload, BeatUploadChunk
+
+STREAM_BLOCK = 64 * 1024
+ALLOWED_EXTENSIONS = ('.wav', '.mp3', '.flac', '.aiff', '.aif', '.ogg', '.m4a')
+
+
+class UploadError(ValueError):
+    """Некоректний запит завантаження (повертається клієнту як 400)"""
+
+
+class _PartFile(File):
+    """Готова заготовка; temporary_file_path дозволяє FileSystemStorage просто перемістити файл"""
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def part_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, 'beat_uploads', f'{upload.pk}.part')
+
+
+def start(beat, user, filename, size, sha256=''):
+    """Створює сесію та файл-заготовку потрібного розміру (або повертає незавершену)"""
+    filename = os.path.basename(filename or '')
+    if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise UploadError(f"Дозволені формати: {', '.join(ALLOWED_EXTENSIONS)}")
+    max_size = getattr(settings, 'BEAT_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+    if not 0 < size <= max_size:
+        raise UploadError(f'Розмір файлу має бути від 1 до {max_size} байт')
+    if sha256 and len(sha256) != 64:
+        raise UploadError('sha256 має бути 64 шістнадцятковими символами')
+
+    # Повторний старт того ж файлу (перезавантажена сторінка) продовжує стару сесію
+    existing = BeatUpload.objects.filter(
+        beat=beat, user=user, filename=filename, size=size, sha256=sha256.lower(), status='uploading',
+    ).order_by('-pk').first()
+    if existing is not None and os.path.exists(part_path(existing)):
+        return existing
+
+    upload = BeatUpload.objects.create(
+        beat=beat, user=user, filename=filename, size=size, sha256=sha256.lower(),
+        chunk_size=getattr(settings, 'BEAT_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+    )
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as part:
+        # Розріджений файл: місце на диску виділяється лише під записані частини
+        part.truncate(size)
+    return upload
+
+
+def received_chunks(upload):
+    return sorted(upload.chunks.values_list('index', flat=True))
+
+
+def missing_chunks(upload):
+    received = set(received_chunks(upload))
+    return [index for index in range(upload.chunk_count) if index not in received]
+
+
+def write_chunk(upload, index, stream, checksum):
+    """Пише частину index з потоку stream, перевіряючи довжину та SHA-256"""
+    if upload.status != 'uploading':
+        raise UploadError('Завантаження вже завершено')
+    if not 0 <= index < upload.chunk_count:
+        raise UploadError(f'Номер частини має бути від 0 до {upload.chunk_count - 1}')
+    if not checksum:
+        raise UploadError('Потрібен заголовок X-Chunk-Sha256')
+
+    expected = upload.chunk_length(index)
+    digest = hashlib.sha256()
+    written = 0
+    path = part_path(upload)
+    with tempfile.TemporaryFile(dir=os.path.dirname(path)) as buffer:
+        while written <= expected:
+            block = stream.read(min(STREAM_BLOCK, expected + 1 - written))
+            if not block:
+                break
+            if written + len(block) > expected:
+                raise UploadError(f'Частина {index} довша за {expected} байт')
+            buffer.write(block)
+            digest.update(block)
+            written += len(block)
+
+        if written != expected:
+            raise UploadError(f'Частина {index}: отримано {written} з {expected} байт')
+        if digest.hexdigest() != checksum.lower():
+            raise UploadError(f'Частина {index}: контрольна сума не збігається')
+
+        # Поки байти копіюються, частина не вважається отриманою (обрив посередині - досилання)
+        BeatUploadChunk.objects.filter(upload=upload, index=index).delete()
+        buffer.seek(0)
+        with open(path, 'r+b') as part:
+            part.seek(index * upload.chunk_size)
+            for block in iter(lambda: buffer.read(STREAM_BLOCK), b''):
+                part.write(block)
+
+    BeatUploadChunk.objects.update_or_create(upload=upload, index=index, defaults={'sha256': digest.hexdigest()})
+    BeatUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now())
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete(upload):
+    """Переносить зібраний файл у сховище та прикріплює до біту"""
+    if upload.status != 'uploading':
+        raise UploadError('Завантаження вже завершено')
+    missing = missing_chunks(upload)
+    if missing:
+        raise UploadError(f'Бракує частин: {missing[:20]}')
+
+    path = part_path(upload)
+    if upload.sha256 and _file_sha256(path) != upload.sha256:
+        raise UploadError('Контрольна сума файлу не збігається')
+
+    beat = upload.beat
+    old_name = beat.audio_file.name
+    with open(path, 'rb') as part:
+        name = beat.audio_file.storage.save(
+            beat.audio_file.field.generate_filename(beat, upload.filename),
+            _PartFile(part, name=path),
+        )
+    if os.path.exists(path):
+        os.remove(path)
+
+    with transaction.atomic():
+        beat.audio_file.name = name
+        beat.save(update_fields=['audio_file', 'updated_at'])
+        upload.status = 'complete'
+        upload.save(update_fields=['status', 'updated_at'])
+        upload.chunks.all().delete()
+        if name == old_name:
+            # Той самий вміст: біт уже тримав посилання, нове зайве
+            transaction.on_commit(lambda: beat.audio_file.storage.delete(name))
+    return beat
+
+
+def discard(upload):
+    """Видаляє сесію разом із файлом-заготовкою"""
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
+
+
+def cleanup(max_age=timedelta(days=1)):
+    """Прибирає незавершені сесії без активності довше max_age. Повертає їх кількість"""
+    stale = BeatUpload.objects.filter(status='uploading', updated_at__lt=timezone.now() - max_age)
+    count = 0
+    for upload in stale.iterator():
+        discard(upload)
+        count += 1
+    return count
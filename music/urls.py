@@ -22,6 +22,7 @@ urlpatterns = [
     path('producer/dashboard/', views.producer_dashboard, name='producer_dashboard'),
     path('listener/home/', views.listener_home, name='listener_home'),
     path('manager/dashboard/', views.manager_dashboard, name='manager_dashboard'),
+    path('manager/exports/<str:kind>/', views.manager_export, name='manager_export'),
     
     # Профіль
     path('profile/', views.profile_view, name='profile'),
@@ -46,6 +47,8 @@ urlpatterns = [
     path('playlists/<int:pk>/delete/', views.playlist_delete, name='playlist_delete'),
     path('playlists/<int:playlist_pk>/add/<int:track_pk>/', views.playlist_add_track, name='playlist_add_track'),
     path('playlists/<int:playlist_pk>/remove/<int:track_pk>/', views.playlist_remove_track, name='playlist_remove_track'),
+    path('playlists/<int:pk>/tracks/batch/', views.playlist_batch_tracks, name='playlist_batch_tracks'),
+    path('playlists/<int:pk>/tracks/<int:track_pk>/move/', views.playlist_move_track, name='playlist_move_track'),
 
     # Favorites
     path('favorites/', views.favorites_list, name='favorites_list'),
@@ -53,8 +56,16 @@ urlpatterns = [
 
     # Music Search
     path('search/', views.music_search, name='music_search'),
+    path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
     path('tracks/<int:track_pk>/quick-add/', views.quick_add_to_playlist, name='quick_add_to_playlist'),
 
+    # Play events
+    path('plays/', views.record_plays, name='record_plays'),
+    path('tracks/<int:pk>/stream/', views.stream_track, name='stream_track'),
+    path('beats/<int:pk>/stream/', views.stream_beat, name='stream_beat'),
+    path('tracks/<int:pk>/waveform/', views.waveform_data, {'kind': 'track'}, name='track_waveform'),
+    path('beats/<int:pk>/waveform/', views.waveform_data, {'kind': 'beat'}, name='beat_waveform'),
+
     # Contract CRUD
     path('contracts/', views.contract_list, name='contract_list'),
     path('contracts/create/', views.contract_create, name='contract_create'),
@@ -66,9 +77,14 @@ urlpatterns = [
     # Beat CRUD
     path('beats/', views.beat_list, name='beat_list'),
     path('beats/create/', views.beat_create, name='beat_create'),
+    path('beats/marketplace/', views.beat_marketplace, name='beat_marketplace'),
     path('beats/<int:pk>/', views.beat_detail, name='beat_detail'),
     path('beats/<int:pk>/edit/', views.beat_update, name='beat_update'),
     path('beats/<int:pk>/delete/', views.beat_delete, name='beat_delete'),
+    path('beats/<int:pk>/uploads/', views.beat_upload_start, name='beat_upload_start'),
+    path('beats/uploads/<int:upload_pk>/', views.beat_upload_status, name='beat_upload_status'),
+    path('beats/uploads/<int:upload_pk>/chunks/<int:index>/', views.beat_upload_chunk, name='beat_upload_chunk'),
+    path('beats/uploads/<int:upload_pk>/complete/', views.beat_upload_complete, name='beat_upload_complete'),
     
     # Collaboration CRUD
     path('collaborations/', views.collaboration_list, name='collaboration_list'),
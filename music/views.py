@@ -1,16 +1,20 @@
 # music/views.py
 
-from django.http import JsonResponse
+import json
+
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Sum
-from .forms import BeatForm, CollaborationForm, ContractForm, CustomUserCreationForm, AlbumForm, TrackForm
-from .models import Beat, Collaboration, Contract, User, Album, Genre, Track
-from .models import User, Album, Genre, Track, Playlist, Favorite
+from .forms import BeatForm, BeatMarketplaceFilterForm, CollaborationForm, ContractForm, CustomUserCreationForm, AlbumForm, TrackForm
+from .models import Beat, BeatUpload, Collaboration, Contract, User, Album, Genre, Track
+from .models import User, Album, AudioAnalysis, Genre, Track, Playlist, PlaylistEntry, Favorite, Recommendation, RoyaltyRun, Waveform
 from .forms import CustomUserCreationForm, AlbumForm, TrackForm, PlaylistForm
-from django.db import models
+from django.db import models, transaction
+from django.views.decorators.http import require_GET, require_http_methods, require_POST, require_safe
+from . import autocomplete, exports, favorites, marketplace, plays, rollups, search, streaming, uploads
 from django.contrib.auth import logout
 from django.shortcuts import redirect
 
@@ -99,13 +103,14 @@ def artist_dashboard(request):
     
     albums = Album.objects.filter(artist=request.user)
     tracks = Track.objects.filter(album__artist=request.user)
-    recent_tracks = tracks.order_by('-created_at')[:5]
+    recent_tracks = tracks.select_related('album').order_by('-created_at')[:5]
     
     context = {
         'total_tracks': tracks.count(),
         'total_albums': albums.count(),
         'followers': 1234,  # Заглушка
-        'plays': 45600,  # Заглушка
+        'plays': rollups.total_plays('artist', [request.user.pk]),
+        'plays_trend': rollups.daily_series('artist', [request.user.pk]),
         'recent_tracks': recent_tracks,
     }
     return render(request, 'music/artist_dashboard.html', context)
@@ -152,7 +157,14 @@ def album_create(request):
 def album_detail(request, pk):
     """Детальна інформація про альбом"""
     album = get_object_or_404(Album, pk=pk, artist=request.user)
-    tracks = album.tracks.all().order_by('track_number')
+    tracks = list(album.tracks.all().order_by('track_number'))
+    
+    # Розбіжності введеної тривалості з автоматичним аналізом файлу
+    mismatches = dict(AudioAnalysis.objects.filter(
+        kind='track', object_id__in=[track.pk for track in tracks], status='mismatch',
+    ).values_list('object_id', 'message'))
+    for track in tracks:
+        track.analysis_warning = mismatches.get(track.pk, '')
     
     context = {
         'album': album,
@@ -204,7 +216,7 @@ def track_create(request, album_pk):
     album = get_object_or_404(Album, pk=album_pk, artist=request.user)
     
     if request.method == 'POST':
-        form = TrackForm(request.POST)
+        form = TrackForm(request.POST, request.FILES)
         if form.is_valid():
             track = form.save(commit=False)
             print(track)
@@ -233,7 +245,7 @@ def track_update(request, pk):
     track = get_object_or_404(Track, pk=pk, album__artist=request.user)
     
     if request.method == 'POST':
-        form = TrackForm(request.POST, instance=track)
+        form = TrackForm(request.POST, request.FILES, instance=track)
         if form.is_valid():
             form.save()
             messages.success(request, f'Трек "{track.title}" успішно оновлено!')
@@ -281,13 +293,16 @@ def listener_home(request):
         messages.error(request, 'У вас немає доступу до цієї сторінки')
         return redirect('music:dashboard')
     
-    # Всі альбоми та треки для рекомендацій
-    all_albums = Album.objects.all().select_related('artist', 'genre')[:12]
+    # Передобчислені рекомендації (manage.py compute_recommendations)
+    album_ids = Recommendation.objects.filter(user=request.user).values_list('album_ids', flat=True).first()
+    if album_ids:
+        all_albums = search.in_rank_order(Album.objects.select_related('artist', 'genre'), album_ids)
+    else:
+        # Новий слухач без історії - просто останні альбоми
+        all_albums = Album.objects.all().select_related('artist', 'genre').order_by('-created_at')[:12]
     
     # Плейлисти користувача
-    user_playlists = Playlist.objects.filter(user=request.user).annotate(
-        tracks_count=Count('tracks')
-    )
+    user_playlists = Playlist.objects.filter(user=request.user)
     
     # Улюблені треки
     favorites = Favorite.objects.filter(user=request.user).select_related(
@@ -309,9 +324,7 @@ def playlist_list(request):
         messages.error(request, 'У вас немає доступу до цієї сторінки')
         return redirect('music:dashboard')
     
-    playlists = Playlist.objects.filter(user=request.user).annotate(
-        tracks_count=Count('tracks')
-    )
+    playlists = Playlist.objects.filter(user=request.user)
     
     context = {'playlists': playlists}
     return render(request, 'music/playlist_list.html', context)
@@ -343,7 +356,8 @@ def playlist_create(request):
 def playlist_detail(request, pk):
     """Детальна інформація про плейлист"""
     playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
-    tracks = playlist.tracks.all().select_related('album__artist')
+    entries = playlist.entries.select_related('track__album__artist').order_by('position')
+    tracks = [entry.track for entry in entries]
     
     context = {
         'playlist': playlist,
@@ -393,10 +407,11 @@ def playlist_delete(request, pk):
 def playlist_add_track(request, playlist_pk, track_pk):
     """Додати трек до плейлиста"""
     playlist = get_object_or_404(Playlist, pk=playlist_pk, user=request.user)
-    track = get_object_or_404(Track, pk=track_pk)
     
-    playlist.tracks.add(track)
-    messages.success(request, f'Трек "{track.title}" додано до плейлиста!')
+    if playlist.add_track(track_pk):
+        messages.success(request, 'Трек додано до плейлиста!')
+    else:
+        messages.info(request, 'Трек вже є в плейлисті')
     return redirect('music:playlist_detail', pk=playlist.pk)
 
 
@@ -404,26 +419,96 @@ def playlist_add_track(request, playlist_pk, track_pk):
 def playlist_remove_track(request, playlist_pk, track_pk):
     """Видалити трек з плейлиста"""
     playlist = get_object_or_404(Playlist, pk=playlist_pk, user=request.user)
-    track = get_object_or_404(Track, pk=track_pk)
     
-    playlist.tracks.remove(track)
-    messages.success(request, f'Трек "{track.title}" видалено з плейлиста!')
+    if playlist.remove_tracks([track_pk]):
+        messages.success(request, 'Трек видалено з плейлиста!')
     return redirect('music:playlist_detail', pk=playlist.pk)
 
 
+def _parse_ids(values):
+    """Список ID з JSON/форми; ValueError для некоректних значень"""
+    if values in (None, ''):
+        return []
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return [int(value) for value in values]
+
+
+@login_required
+@require_POST
+def playlist_batch_tracks(request, pk):
+    """Пакетне додавання/видалення треків (або цілого альбому) однією транзакцією"""
+    playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
+    
+    try:
+        if request.content_type == 'application/json':
+            payload = json.loads(request.body or '{}')
+        else:
+            payload = {
+                'add': request.POST.getlist('add'),
+                'remove': request.POST.getlist('remove'),
+                'album': request.POST.get('album'),
+            }
+        add_ids = _parse_ids(payload.get('add'))
+        remove_ids = _parse_ids(payload.get('remove'))
+        album_ids = _parse_ids(payload.get('album'))
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Некоректні дані'}, status=400)
+    
+    if album_ids:
+        add_ids += Track.objects.filter(album_id__in=album_ids).order_by(
+            'album_id', 'track_number'
+        ).values_list('pk', flat=True)
+    
+    with transaction.atomic():
+        removed = playlist.remove_tracks(remove_ids) if remove_ids else 0
+        added = playlist.append_tracks(add_ids) if add_ids else 0
+    
+    playlist.refresh_from_db(fields=['track_count', 'total_duration'])
+    return JsonResponse({
+        'success': True,
+        'added': added,
+        'removed': removed,
+        'track_count': playlist.track_count,
+        'total_duration': int(playlist.total_duration.total_seconds()),
+    })
+
+
+@login_required
+@require_POST
+def playlist_move_track(request, pk, track_pk):
+    """Перемістити трек після іншого (after) або на початок"""
+    playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
+    
+    try:
+        after_ids = _parse_ids(request.POST.get('after'))
+        entry = playlist.move_track(track_pk, after_ids[0] if after_ids else None)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Некоректні дані'}, status=400)
+    except PlaylistEntry.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Трек не знайдено в плейлисті'}, status=404)
+    
+    return JsonResponse({'success': True, 'position': entry.position})
+
+
 # ==================== FAVORITES ====================
 @login_required
 def toggle_favorite(request, track_pk):
-    """Додати/видалити трек з улюблених"""
-    track = get_object_or_404(Track, pk=track_pk)
-    favorite, created = Favorite.objects.get_or_create(user=request.user, track=track)
-    
-    if not created:
-        favorite.delete()
-        messages.success(request, f'Трек "{track.title}" видалено з улюблених')
-    else:
+    """Додати/видалити трек з улюблених (JSON для AJAX, інакше - повернення на сторінку)"""
+    # favorite=1/0 у POST робить запит ідемпотентним (повтор після обриву нічого не зламає)
+    state = {'1': True, '0': False}.get(request.POST.get('favorite'))
+    favorite = favorites.toggle(request.user.pk, track_pk, state)
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if favorite is None:
+            return JsonResponse({'success': False, 'error': 'Трек не знайдено'}, status=404)
+        return JsonResponse({'success': True, 'favorite': favorite})
+    
+    track = get_object_or_404(Track.objects.only('title'), pk=track_pk)
+    if favorite:
         messages.success(request, f'Трек "{track.title}" додано до улюблених')
-    
+    else:
+        messages.success(request, f'Трек "{track.title}" видалено з улюблених')
     return redirect(request.META.get('HTTP_REFERER', 'music:listener_home'))
 
 
@@ -450,8 +535,8 @@ def music_search(request):
     # Отримуємо плейлисти користувача для швидкого додавання
     user_playlists = Playlist.objects.filter(user=request.user) if request.user.role == 'listener' else []
     
-    # Отримуємо ID улюблених треків користувача
-    favorite_track_ids = Favorite.objects.filter(user=request.user).values_list('track_id', flat=True)
+    # ID улюблених треків з кешу (відсортований масив, перевірка без запитів)
+    favorite_track_ids = favorites.track_ids(request.user)
     
     results = {
         'albums': [],
@@ -460,29 +545,16 @@ def music_search(request):
     }
     
     if query:
-        # Пошук альбомів
-        results['albums'] = Album.objects.filter(
-            models.Q(title__icontains=query) | 
-            models.Q(description__icontains=query) |
-            models.Q(genre__name__icontains=query)
-        ).select_related('artist', 'genre')[:10]
-        
-        # Пошук треків
-        results['tracks'] = Track.objects.filter(
-            models.Q(title__icontains=query) |
-            models.Q(album__title__icontains=query) |
-            models.Q(album__artist__username__icontains=query) |
-            models.Q(album__artist__stage_name__icontains=query)
-        ).select_related('album__artist').prefetch_related('playlists')[:20]
-        
-        # Пошук артистів
-        results['artists'] = User.objects.filter(
-            role='artist'
-        ).filter(
-            models.Q(username__icontains=query) |
-            models.Q(stage_name__icontains=query) |
-            models.Q(bio__icontains=query)
-        )[:10]
+        # Ранжований пошук по повнотекстовому індексу
+        results['albums'] = search.search(
+            Album.objects.select_related('artist', 'genre'), query, 'album', 10
+        )
+        results['tracks'] = search.search(
+            Track.objects.select_related('album__artist').prefetch_related('playlists'), query, 'track', 20
+        )
+        results['artists'] = search.search(
+            User.objects.filter(role='artist'), query, 'artist', 10
+        )
     
     context = {
         'query': query,
@@ -493,30 +565,115 @@ def music_search(request):
     return render(request, 'music/music_search.html', context)
 
 
+@login_required
+def search_autocomplete(request):
+    """JSON-підказки під час введення (з індексу в пам'яті, без запитів до БД)"""
+    query = request.GET.get('q', '')
+    suggestions = autocomplete.get_index().lookup(query)
+    return JsonResponse({'query': query, **suggestions})
+
+
 @login_required
 def quick_add_to_playlist(request, track_pk):
     """Швидке додавання треку до плейлиста через AJAX або звичайний POST"""
-    if request.method == 'POST':
-        playlist_id = request.POST.get('playlist_id')
-        track = get_object_or_404(Track, pk=track_pk)
-        
-        if playlist_id:
-            playlist = get_object_or_404(Playlist, pk=playlist_id, user=request.user)
-            
-            # Перевіряємо чи трек вже є в плейлисті
-            if track in playlist.tracks.all():
-                messages.info(request, f'Трек "{track.title}" вже є в плейлисті "{playlist.name}"')
-            else:
-                playlist.tracks.add(track)
-                messages.success(request, f'Трек "{track.title}" додано до плейлиста "{playlist.name}"!')
-        
-        # Якщо це AJAX запит, повертаємо JSON
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return JsonResponse({'success': True})
-        
+    if request.method != 'POST':
+        return redirect('music:music_search')
+    
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    playlist_id = request.POST.get('playlist_id')
+    if not playlist_id or not playlist_id.isdigit():
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': 'Не вказано плейлист'}, status=400)
         return redirect(request.META.get('HTTP_REFERER', 'music:music_search'))
     
-    return redirect('music:music_search')
+    playlist = get_object_or_404(Playlist.objects.only('pk', 'name'), pk=playlist_id, user=request.user)
+    # Один INSERT ... ON CONFLICT DO NOTHING замість перевірки всього плейлиста
+    added = playlist.add_track(track_pk)
+    if not added and not Track.objects.filter(pk=track_pk).exists():
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': 'Трек не знайдено'}, status=404)
+        raise Http404('Трек не знайдено')
+    
+    if is_ajax:
+        playlist.refresh_from_db(fields=['track_count', 'total_duration'])
+        return JsonResponse({
+            'success': True,
+            'added': added,
+            'track_count': playlist.track_count,
+            'total_duration': int(playlist.total_duration.total_seconds()),
+        })
+    
+    title = Track.objects.filter(pk=track_pk).values_list('title', flat=True).first()
+    if added:
+        messages.success(request, f'Трек "{title}" додано до плейлиста "{playlist.name}"!')
+    else:
+        messages.info(request, f'Трек "{title}" вже є в плейлисті "{playlist.name}"')
+    return redirect(request.META.get('HTTP_REFERER', 'music:music_search'))
+
+# ==================== PLAY EVENTS ====================
+MAX_EVENTS_PER_REQUEST = 1000
+
+
+@login_required
+@require_POST
+def record_plays(request):
+    """Прийом подій прослуховування: {"events": [{"track": id} | {"beat": id}, ...]}"""
+    try:
+        if request.content_type == 'application/json':
+            raw_events = json.loads(request.body or '{}').get('events', [])
+        else:
+            raw_events = [{'track': pk} for pk in request.POST.getlist('track')]
+            raw_events += [{'beat': pk} for pk in request.POST.getlist('beat')]
+        
+        events = []
+        for raw in raw_events[:MAX_EVENTS_PER_REQUEST]:
+            kind = 'track' if 'track' in raw else 'beat'
+            object_id = int(raw[kind])
+            if not 0 < object_id <= plays.MAX_ID:
+                raise ValueError(object_id)
+            events.append((kind, object_id, request.user.pk))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Некоректні дані'}, status=400)
+    
+    plays.record(events)
+    return JsonResponse({'success': True, 'accepted': len(events)}, status=202)
+
+
+@login_required
+@require_safe
+def stream_track(request, pk):
+    """Аудіо треку з підтримкою Range (перемотування)"""
+    track = get_object_or_404(Track.objects.only('pk', 'audio_file'), pk=pk)
+    if not track.audio_file:
+        raise Http404('Аудіофайл відсутній')
+    return streaming.serve(request, track.audio_file, 'track', track.pk)
+
+
+@login_required
+@require_safe
+def stream_beat(request, pk):
+    """Аудіо біту з підтримкою Range (перемотування)"""
+    beat = get_object_or_404(Beat.objects.only('pk', 'audio_file'), pk=pk)
+    if not beat.audio_file:
+        raise Http404('Аудіофайл відсутній')
+    return streaming.serve(request, beat.audio_file, 'beat', beat.pk)
+
+
+@login_required
+@require_safe
+def waveform_data(request, kind, pk):
+    """Бінарні піки хвилі (формат - music/waveforms.py); URL з ?v= кешується назавжди"""
+    waveform = get_object_or_404(Waveform.objects.defer('source_name'), kind=kind, object_id=pk)
+    etag = f'"{int(waveform.computed_at.timestamp())}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+    
+    response = HttpResponse(bytes(waveform.data), content_type='application/octet-stream')
+    response['ETag'] = etag
+    response['X-Waveform-Duration'] = f'{waveform.duration:.3f}'
+    response['Cache-Control'] = 'private, max-age=31536000, immutable' if request.GET.get('v') else 'private, no-cache'
+    return response
+
 
 def logout_view(request):
     logout(request)
@@ -544,7 +701,9 @@ def manager_dashboard(request):
         albums_count=Count('album')
     )[:4]
     
-    recent_contracts = Contract.objects.filter(manager=request.user).select_related('artist').order_by('-created_at')[:3]
+    recent_contracts = Contract.objects.filter(manager=request.user).select_related('artist').annotate(
+        months_left=Contract.months_remaining_expression()
+    ).order_by('-created_at')[:3]
     
     context = {
         'total_artists': total_artists,
@@ -555,6 +714,32 @@ def manager_dashboard(request):
     return render(request, 'music/manager_dashboard.html', context)
 
 
+@login_required
+def manager_export(request, kind):
+    """Потоковий експорт контрактів, релізів або роялті (?format=csv|json, ?run=<id>)"""
+    if request.user.role != 'label_manager':
+        messages.error(request, 'У вас немає доступу до цієї сторінки')
+        return redirect('music:dashboard')
+    if kind not in exports.EXPORTS:
+        raise Http404('Невідомий експорт')
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return HttpResponseBadRequest('Формат має бути csv або json')
+    options = {}
+    if kind == 'statements' and request.GET.get('run'):
+        if not request.GET['run'].isdecimal():
+            return HttpResponseBadRequest('run має бути номером розрахунку')
+        options['run'] = get_object_or_404(RoyaltyRun, pk=request.GET['run'])
+
+    response = StreamingHttpResponse(
+        exports.stream(kind, request.user, fmt, **options),
+        content_type=exports.content_type(fmt),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
 # ==================== CONTRACT CRUD ====================
 @login_required
 def contract_list(request):
@@ -563,7 +748,9 @@ def contract_list(request):
         messages.error(request, 'У вас немає доступу до цієї сторінки')
         return redirect('music:dashboard')
     
-    contracts = Contract.objects.filter(manager=request.user).select_related('artist').order_by('-created_at')
+    contracts = Contract.objects.filter(manager=request.user).select_related('artist').annotate(
+        months_left=Contract.months_remaining_expression()
+    ).order_by('-created_at')
     
     context = {'contracts': contracts}
     return render(request, 'music/contract_list.html', context)
@@ -668,26 +855,17 @@ def artist_search(request):
         status__in=['active', 'expiring']
     ).values_list('artist_id', flat=True)
     
-    artists = []
+    artists_with_counts = User.objects.filter(role='artist').annotate(
+        albums_count=Count('album'),
+        tracks_count=Count('album__tracks')
+    ).distinct()
     
     if query:
-        # Пошук артистів
-        artists = User.objects.filter(
-            role='artist'
-        ).filter(
-            models.Q(username__icontains=query) |
-            models.Q(stage_name__icontains=query) |
-            models.Q(bio__icontains=query)
-        ).annotate(
-            albums_count=Count('album'),
-            tracks_count=Count('album__tracks')
-        ).distinct()[:20]
+        # Пошук артистів по тому ж індексу, що й music_search
+        artists = search.search(artists_with_counts, query, 'artist', 20)
     else:
         # Показуємо всіх артистів, якщо немає пошукового запиту
-        artists = User.objects.filter(role='artist').annotate(
-            albums_count=Count('album'),
-            tracks_count=Count('album__tracks')
-        ).distinct()[:20]
+        artists = artists_with_counts[:20]
     
     context = {
         'query': query,
@@ -709,15 +887,20 @@ def producer_dashboard(request):
     
     total_beats = beats.count()
     total_collabs = collabs.filter(status__in=['active', 'recording', 'mixing']).count()
-    total_plays = beats.aggregate(Sum('plays_count'))['plays_count__sum'] or 0
+    beat_ids = beats.values('pk')
+    total_plays = rollups.total_plays('beat', beat_ids)
     
-    active_projects = collabs.filter(status__in=['active', 'recording', 'mixing']).order_by('deadline')[:3]
+    active_projects = (
+        collabs.filter(status__in=['active', 'recording', 'mixing'])
+        .select_related('artist', 'beat').order_by('deadline')[:3]
+    )
     recent_beats = beats.order_by('-created_at')[:6]
     
     context = {
         'total_beats': total_beats,
         'total_collabs': total_collabs,
         'total_plays': total_plays,
+        'plays_trend': rollups.daily_series('beat', beat_ids),
         'active_projects': active_projects,
         'recent_beats': recent_beats,
     }
@@ -738,6 +921,24 @@ def beat_list(request):
     return render(request, 'music/beat_list.html', context)
 
 
+@login_required
+@require_GET
+def beat_marketplace(request):
+    """Каталог бітів усіх продюсерів з фільтрами та фасетами"""
+    form = BeatMarketplaceFilterForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {'available': '1'}
+    beats, next_cursor, facets = marketplace.browse(filters, request.GET.get('after'))
+
+    context = {
+        'form': form,
+        'beats': beats,
+        'facets': facets,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+    }
+    return render(request, 'music/beat_marketplace.html', context)
+
+
 @login_required
 def beat_create(request):
     """Створення біту"""
@@ -746,7 +947,7 @@ def beat_create(request):
         return redirect('music:dashboard')
     
     if request.method == 'POST':
-        form = BeatForm(request.POST)
+        form = BeatForm(request.POST, request.FILES)
         if form.is_valid():
             beat = form.save(commit=False)
             beat.producer = request.user
@@ -764,8 +965,11 @@ def beat_create(request):
 def beat_detail(request, pk):
     """Детальна інформація про біт"""
     beat = get_object_or_404(Beat, pk=pk, producer=request.user)
+    waveform = Waveform.objects.filter(kind='beat', object_id=beat.pk).only('computed_at').first()
+    audio_analysis = AudioAnalysis.objects.filter(kind='beat', object_id=beat.pk).first()
+    matches = beat.fingerprint_matches.select_related('matched_beat__producer')
     
-    context = {'beat': beat}
+    context = {'beat': beat, 'waveform': waveform, 'audio_analysis': audio_analysis, 'matches': matches}
     return render(request, 'music/beat_detail.html', context)
 
 
@@ -775,7 +979,7 @@ def beat_update(request, pk):
     beat = get_object_or_404(Beat, pk=pk, producer=request.user)
     
     if request.method == 'POST':
-        form = BeatForm(request.POST, instance=beat)
+        form = BeatForm(request.POST, request.FILES, instance=beat)
         if form.is_valid():
             form.save()
             messages.success(request, f'Біт "{beat.title}" оновлено!')
@@ -806,6 +1010,75 @@ def beat_delete(request, pk):
     return render(request, 'music/beat_confirm_delete.html', context)
 
 
+# ==================== BEAT UPLOADS ====================
+def _upload_state(upload):
+    return {
+        'success': True,
+        'upload_id': upload.pk,
+        'chunk_size': upload.chunk_size,
+        'chunk_count': upload.chunk_count,
+        'missing': uploads.missing_chunks(upload),
+        'status': upload.status,
+    }
+
+
+@login_required
+@require_POST
+def beat_upload_start(request, pk):
+    """Почати (або продовжити) докачуване завантаження аудіо біту"""
+    beat = get_object_or_404(Beat, pk=pk, producer=request.user)
+    
+    try:
+        payload = json.loads(request.body or '{}')
+        upload = uploads.start(
+            beat, request.user,
+            filename=payload.get('filename'),
+            size=int(payload.get('size') or 0),
+            sha256=payload.get('sha256') or '',
+        )
+    except (ValueError, TypeError, AttributeError) as error:
+        message = str(error) if isinstance(error, uploads.UploadError) else 'Некоректні дані'
+        return JsonResponse({'success': False, 'error': message}, status=400)
+    
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_GET
+def beat_upload_status(request, upload_pk):
+    """Які частини ще потрібно надіслати"""
+    upload = get_object_or_404(BeatUpload, pk=upload_pk, user=request.user)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_http_methods(['PUT'])
+def beat_upload_chunk(request, upload_pk, index):
+    """Одна частина файлу в тілі запиту, SHA-256 у заголовку X-Chunk-Sha256"""
+    upload = get_object_or_404(BeatUpload, pk=upload_pk, user=request.user)
+    
+    try:
+        uploads.write_chunk(upload, index, request, request.headers.get('X-Chunk-Sha256', ''))
+    except uploads.UploadError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+    
+    return JsonResponse({'success': True, 'index': index})
+
+
+@login_required
+@require_POST
+def beat_upload_complete(request, upload_pk):
+    """Зібрати файл і прикріпити до біту"""
+    upload = get_object_or_404(BeatUpload.objects.select_related('beat'), pk=upload_pk, user=request.user)
+    
+    try:
+        beat = uploads.complete(upload)
+    except uploads.UploadError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+    
+    return JsonResponse({'success': True, 'audio_url': beat.audio_file.url})
+
+
 # ==================== COLLABORATION CRUD ====================
 @login_required
 def collaboration_list(request):
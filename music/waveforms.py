@@ -0,0 +1,181 @@
+# music/waveforms.py
+
+"""
+Піки хвилі для плеєра.
+
+WAV декодується модулем wave блоками по BLOCK_FRAMES кадрів, тож у пам'яті
+ніколи не буває всього файлу. Для кожних BASE_FRAMES кадрів береться мінімум
+і максимум по всіх каналах; грубші рівні отримуються з найдетальнішого
+згортанням по LEVEL_FACTOR піків, поки їх не стане менше MIN_PEAKS.
+
+Формат blob (little-endian):
+    заголовок  '<4sBBHIQ'  magic b'WFRM', версія, кількість рівнів, 0, sample_rate, кадрів
+    рівні      '<II'       кадрів на пік, кількість піків (від детального до грубого)
+    дані       int8        пари (min, max) у діапазоні -127..127 для кожного рівня підряд
+
+Рахується у фоновому потоці після збереження аудіофайлу (сигнали) або
+командою compute_waveforms.
+"""
+
+import logging
+import struct
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.db import close_old_connections
+
+from .models import Beat, Track, Waveform
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'WFRM'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIQ')
+LEVEL = struct.Struct('<II')
+BASE_FRAMES = 256
+LEVEL_FACTOR = 4
+MIN_PEAKS = 512
+BLOCK_FRAMES = BASE_FRAMES * 256
+MODELS = {'track': Track, 'beat': Beat}
+
+
+def _samples(raw, width):
+    """Байти PCM -> float32 у діапазоні [-1, 1]"""
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    if width == 3:
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        return values.astype(np.float32) / 8388608
+    if width == 4:
+        return np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    raise wave.Error(f'unsupported sample width {width}')
+
+
+def _fold(mins, maxs, factor):
+    """Грубший рівень: min/max кожних factor сусідніх піків"""
+    count = -(-len(mins) // factor)
+    pad = count * factor - len(mins)
+    if pad:
+        mins = np.concatenate([mins, np.repeat(mins[-1:], pad)])
+        maxs = np.concatenate([maxs, np.repeat(maxs[-1:], pad)])
+    return mins.reshape(count, factor).min(axis=1), maxs.reshape(count, factor).max(axis=1)
+
+
+def peaks(fileobj):
+    """(sample_rate, frames, [(кадрів на пік, mins, maxs), ...]) для WAV-потоку"""
+    with wave.open(fileobj, 'rb') as audio:
+        channels = audio.getnchannels()
+        width = audio.getsampwidth()
+        sample_rate = audio.getframerate()
+        mins, maxs = [], []
+        frames = 0
+        while True:
+            raw = audio.readframes(BLOCK_FRAMES)
+            if not raw:
+                break
+            block = _samples(raw, width).reshape(-1, channels)
+            frames += len(block)
+            low, high = block.min(axis=1), block.max(axis=1)
+            # Блок кратний BASE_FRAMES, тож неповний кошик буває лише в останньому
+            buckets = -(-len(block) // BASE_FRAMES)
+            edges = np.arange(0, buckets * BASE_FRAMES, BASE_FRAMES)
+            mins.append(np.minimum.reduceat(low, edges))
+            maxs.append(np.maximum.reduceat(high, edges))
+
+    if not frames:
+        return sample_rate, 0, []
+    level_mins, level_maxs = np.concatenate(mins), np.concatenate(maxs)
+    levels = [(BASE_FRAMES, level_mins, level_maxs)]
+    frames_per_peak = BASE_FRAMES
+    while len(level_mins) > MIN_PEAKS:
+        level_mins, level_maxs = _fold(level_mins, level_maxs, LEVEL_FACTOR)
+        frames_per_peak *= LEVEL_FACTOR
+        levels.append((frames_per_peak, level_mins, level_maxs))
+    return sample_rate, frames, levels
+
+
+def _quantize(values):
+    return np.clip(np.round(values * 127), -127, 127).astype(np.int8)
+
+
+def encode(sample_rate, frames, levels):
+    parts = [HEADER.pack(MAGIC, VERSION, len(levels), 0, sample_rate, frames)]
+    parts += [LEVEL.pack(frames_per_peak, len(level_mins)) for frames_per_peak, level_mins, _ in levels]
+    for _, level_mins, level_maxs in levels:
+        pairs = np.empty(len(level_mins) * 2, dtype=np.int8)
+        pairs[0::2] = _quantize(level_mins)
+        pairs[1::2] = _quantize(level_maxs)
+        parts.append(pairs.tobytes())
+    return b''.join(parts)
+
+
+def decode(blob):
+    """Зворотне до encode: (sample_rate, frames, [(кадрів на пік, int8 масив пар), ...])"""
+    magic, version, count, _, sample_rate, frames = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a waveform blob')
+    offset = HEADER.size
+    heads = []
+    for _ in range(count):
+        heads.append(LEVEL.unpack_from(blob, offset))
+        offset += LEVEL.size
+    levels = []
+    for frames_per_peak, peak_count in heads:
+        levels.append((frames_per_peak, np.frombuffer(blob, dtype=np.int8, count=peak_count * 2, offset=offset)))
+        offset += peak_count * 2
+    return sample_rate, frames, levels
+
+
+def compute(kind, object_id, force=False):
+    """Рахує та зберігає піки для об'єкта. Повертає Waveform або None"""
+    obj = MODELS[kind].objects.filter(pk=object_id).only('pk', 'audio_file').first()
+    if obj is None or not obj.audio_file:
+        Waveform.objects.filter(kind=kind, object_id=object_id).delete()
+        return None
+
+    name = obj.audio_file.name
+    existing = Waveform.objects.filter(kind=kind, object_id=object_id).first()
+    if existing is not None and existing.source_name == name and not force:
+        return existing
+
+    try:
+        with obj.audio_file.open('rb') as fileobj:
+            sample_rate, frames, levels = peaks(fileobj)
+    except (wave.Error, EOFError, ValueError, OSError) as error:
+        # Не WAV (mp3/flac), обрізаний або зниклий файл - хвилі не буде, плеєр покаже звичайну смугу
+        logger.info('Waveform skipped for %s:%s (%s): %s', kind, object_id, name, error)
+        if existing is not None:
+            existing.delete()
+        return None
+
+    waveform, _ = Waveform.objects.update_or_create(
+        kind=kind, object_id=object_id,
+        defaults={
+            'source_name': name,
+            'duration': frames / sample_rate if sample_rate else 0,
+            'data': encode(sample_rate, frames, levels),
+        },
+    )
+    return waveform
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waveforms')
+
+
+def _run(kind, object_id):
+    try:
+        compute(kind, object_id)
+    except Exception:
+        logger.exception('Waveform failed for %s:%s', kind, object_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(kind, object_id):
+    """Ставить розрахунок у фонову чергу процесу"""
+    _executor.submit(_run, kind, object_id)
@@ -48,7 +48,9 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'music.replicas.ReplicaMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'music.instrumentation.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'my_music_app.urls'
@@ -75,15 +77,83 @@ WSGI_APPLICATION = 'my_music_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite для одночасних записів:
+# - WAL: читачі не блокують записувача і навпаки;
+# - synchronous=NORMAL: у WAL безпечно для цілісності, fsync лише на checkpoint;
+# - busy_timeout: зайнята БД - це очікування (мс), а не миттєве "database is locked";
+# - BEGIN IMMEDIATE: atomic() одразу бере блокування запису. З відкладеним BEGIN
+#   транзакція, що спершу читала, не може підвищити блокування до запису, коли інша
+#   вже пише, і падає з "database is locked" в обхід busy_timeout;
+# - mmap_size/cache_size: читання сторінок з відображеної пам'яті та 64 МБ кешу на з'єднання.
+SQLITE_BUSY_TIMEOUT_MS = 20000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_CACHE_SIZE_KB = 64 * 1024
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+                f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB};'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+        # Постійні з'єднання: PRAGMA та відкриття файлу - раз на 10 хв, а не на кожен запит
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Тестова БД у файлі, а не в пам'яті: WAL і паралельні записувачі (music/tests.py)
+        # працюють лише з файлом
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Репліки для читання на сторінках з REPLICA_VIEWS (music/replicas.py). Локально - копія
+# db.sqlite3, яку оновлює manage.py sync_replicas --interval 5; якщо остання синхронізація
+# старша за REPLICA_MAX_LAG_SECONDS, читання йдуть у default
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+    'OPTIONS': {**DATABASES['default']['OPTIONS'], 'transaction_mode': 'DEFERRED'},
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['music.replicas.ReplicaRouter']
+DATABASE_REPLICAS = ['replica']
+REPLICA_VIEWS = {
+    'music:music_search',
+    'music:listener_home',
+    'music:artist_search',
+    'music:artist_dashboard',
+    'music:producer_dashboard',
+    'music:manager_dashboard',
+}
+REPLICA_MAX_LAG_SECONDS = 15
+# Після не-GET запиту сесія читає з default; не менше за допустиме відставання репліки,
+# інакше після цього вікна можна прочитати копію, зроблену ще до запису
+REPLICA_STICKY_SECONDS = REPLICA_MAX_LAG_SECONDS
+# В'ю, що змінюють дані на GET (посилання в шаблонах): після них сесія теж читає з default
+REPLICA_WRITE_VIEWS = {
+    'music:toggle_favorite',
+    'music:playlist_add_track',
+    'music:playlist_remove_track',
+}
+# POST, після яких сесія не прив'язується до default (маячок прослуховувань шле їх постійно)
+REPLICA_STICKY_EXEMPT_VIEWS = {'music:record_plays'}
+
 AUTH_USER_MODEL = 'music.User'
 
+# Як часто (сек) воркер перебудовує індекс автодоповнення з БД
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+
+# Буфер подій прослуховування: розмір пакета та максимальна затримка запису (сек)
+PLAY_BUFFER_SIZE = 500
+PLAY_BUFFER_SECONDS = 2.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -125,3 +195,45 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Дохід з одного прослуховування для розрахунку роялті ($)
+ROYALTY_RATE_PER_PLAY = '0.004'
+
+# Завантажені файли (аудіо бітів)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Докачуване завантаження бітів: розмір частини та максимальний файл (байт)
+BEAT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+BEAT_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# Префікс internal-location nginx для віддачі аудіо через X-Accel-Redirect
+# (None - файли віддає сам Django через FileResponse/sendfile)
+AUDIO_ACCEL_REDIRECT = None
+
+# Процесів у фоновому пулі аналізу аудіо кожного веб-воркера (команди analyze_audio і
+# fingerprint_beats за замовчуванням беруть усі ядра, див. --workers)
+AUDIO_ANALYSIS_WORKERS = 2
+
+# Скільки секунд живе закешований список улюблених треків користувача: зі спільним кешем
+# (Redis, memcached у CACHES) і з локальним кешем процесу, який інші воркери не скидають
+FAVORITES_CACHE_TIMEOUT = 3600
+FAVORITES_LOCAL_CACHE_TIMEOUT = 10
+
+# Облік запитів до БД на кожен запит (music/instrumentation.py)
+QUERY_INSTRUMENTATION = DEBUG
+# Однакових запитів за один HTTP-запит, після яких це вважається N+1
+QUERY_REPEAT_THRESHOLD = 5
+# Максимум запитів для в'ю (ім'я з urls.py); перевищення - попередження в логері music.queries,
+# а з QUERY_BUDGET_STRICT = True (у тестах) - виняток QueryBudgetExceeded.
+# Значення - запитів прогрітої сторінки за benchmark_views плюс 2 про запас
+QUERY_BUDGETS = {
+    'music:music_search': 13,
+    'music:listener_home': 8,
+    'music:artist_search': 8,
+    'music:manager_dashboard': 8,
+    'music:producer_dashboard': 10,
+    'music:artist_dashboard': 9,
+    'music:beat_marketplace': 6,
+}
+QUERY_BUDGET_STRICT = False
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_music_app.settings')
 
 application = get_wsgi_application()
+
+# Індекс автодоповнення будується у фоні, щоб перший запит процесу на нього не чекав
+from music import autocomplete  # noqa: E402
+
+autocomplete.warm()